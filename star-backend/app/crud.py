@@ -8,7 +8,7 @@ Database operations for creating and managing records.
 
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, func
 from datetime import datetime
 import random
 import string
@@ -24,7 +24,9 @@ except ImportError as e:
     print(f"DEBUG: app.schemas path: {app.schemas.__file__}")
     print(f"DEBUG: dir(app.schemas): {dir(app.schemas)}")
     raise e
-from .models import SevaCatalog, User, Transaction, Devotee, ShaswataSubscription
+from .models import SevaCatalog, User, Transaction, Devotee, ShaswataSubscription, SystemSetting
+from .panchang import PanchangCalculator
+from .shaswata_health import subscription_state, apply_subscription_change, add_subscriber_revenue
 
 # =============================================================================
 # USER MANAGEMENT (AUTH)
@@ -200,6 +202,7 @@ def create_transaction(db: Session, transaction: TransactionCreate, user_id: int
             }
         )
         transaction_id = result.lastrowid
+        add_subscriber_revenue(db, devotee_id, transaction.amount)
         db.commit()
         
         return {
@@ -543,9 +546,20 @@ def create_shaswata_subscription(db: Session, subscription: ShaswataCreate, user
                 }
             )
         
+        # Step 6: Health counters — a first subscription brings all of the devotee's payments in
+        apply_subscription_change(db, None, subscription_state(db, subscription_id))
+        already_subscriber = db.execute(
+            text("SELECT 1 FROM shaswata_subscriptions WHERE devotee_id = :d AND is_active = TRUE AND id != :id LIMIT 1"),
+            {"d": devotee_id, "id": subscription_id}
+        ).first()
+        if not already_subscriber:
+            add_subscriber_revenue(db, devotee_id)
+        elif subscription.amount and subscription.payment_mode:
+            add_subscriber_revenue(db, devotee_id, subscription.amount)
+        
         db.commit()
         
-        # Step 6: Format response
+        # Step 7: Format response
         lunar_date = None
         gregorian_date = None
         
@@ -659,7 +673,9 @@ def log_dispatch(db: Session, subscription_id: int) -> dict:
         if not exists:
             raise ValueError(f"Subscription {subscription_id} not found")
         
-        # Update (SQLite-compatible — no RETURNING clause)
+        # Update (SQLite-compatible — no RETURNING clause). The row stays locked
+        # until commit so concurrent calls cannot apply the same counter move twice.
+        before = subscription_state(db, subscription_id, lock=True)
         db.execute(
             text("""
                 UPDATE shaswata_subscriptions 
@@ -669,6 +685,7 @@ def log_dispatch(db: Session, subscription_id: int) -> dict:
             """),
             {"sub_id": subscription_id}
         )
+        apply_subscription_change(db, before, subscription_state(db, subscription_id))
         
         # Fetch updated values
         row = db.execute(
@@ -701,7 +718,9 @@ def log_feedback_sent(db: Session, subscription_id: int) -> dict:
         if not exists:
             raise ValueError(f"Subscription {subscription_id} not found")
         
-        # Update (SQLite-compatible — no RETURNING clause)
+        # Update (SQLite-compatible — no RETURNING clause). The row stays locked
+        # until commit so concurrent calls cannot apply the same counter move twice.
+        before = subscription_state(db, subscription_id, lock=True)
         db.execute(
             text("""
                 UPDATE shaswata_subscriptions 
@@ -711,6 +730,7 @@ def log_feedback_sent(db: Session, subscription_id: int) -> dict:
             """),
             {"sub_id": subscription_id}
         )
+        apply_subscription_change(db, before, subscription_state(db, subscription_id))
         
         # Fetch updated values
         row = db.execute(
@@ -1216,3 +1236,22 @@ def reset_address_confirmation(db: Session, devotee_id: int):
     db.commit()
     db.refresh(devotee)
     return devotee
+
+
+# =============================================================================
+# PANCHANG SETTINGS
+# =============================================================================
+
+def get_panchang_calculator(db: Session) -> PanchangCalculator:
+    """Builds a PanchangCalculator from the temple location/ayanamsa SystemSettings."""
+    keys = ["temple_lat", "temple_lon", "temple_elevation", "panchang_ayanamsa"]
+    settings = {
+        s.key: s.value
+        for s in db.query(SystemSetting).filter(SystemSetting.key.in_(keys)).all()
+    }
+    return PanchangCalculator(
+        lat=settings.get("temple_lat"),
+        lon=settings.get("temple_lon"),
+        elevation=settings.get("temple_elevation"),
+        ayanamsa=settings.get("panchang_ayanamsa"),
+    )
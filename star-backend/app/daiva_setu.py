@@ -10,13 +10,15 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import re
 import random
 import traceback
 
 from .database import get_db
 from .models import SevaCatalog
+from .crud import get_panchang_calculator
+from .panchang_cache import get_panchang_core
 
 router = APIRouter(
     prefix="/genesis",
@@ -98,9 +100,13 @@ class DaivaSetuEngine:
             actions = [{"label": "Book a Specfic Slot", "action": "open_booking_modal", "seva_id": 1}]
 
         elif intent == "PANCHANG":
-            # Mock Panchang Response (Ideally connect to PanchangCalculator)
-            # In a real LLM scenario, this would be generated.
-            answer = "Today is a spiritually significant day. The current Tithi is **Shukla Paksha Shashthi**, favored by Lord Subramanya. It is an excellent time for *Naga Pratishta*."
+            # Served from the shared Panchang cache (same record as the Priest Dashboard)
+            day = date.today() + timedelta(days=1 if "tomorrow" in query_lower else 0)
+            pc = get_panchang_calculator(self.db)
+            attrs = pc.project(get_panchang_core(self.db, day, pc))["attributes"]
+            when = "Tomorrow" if "tomorrow" in query_lower else "Today"
+            answer = (f"{when} is **{attrs['maasa']} {attrs['paksha']} Paksha {attrs['tithi']}**, "
+                      f"Nakshatra **{attrs['nakshatra']}**, Yoga **{attrs['yoga']}**.")
             actions = [{"label": "View Full Panchangam", "action": "navigate", "page": "panchangam"}]
 
         elif intent == "EDUCATION":
@@ -178,6 +178,7 @@ def init_database():
     
     # Create tables
     ModelsBase.metadata.create_all(bind=engine)
+    _migrate_daily_panchang()
     
     db_type = "PostgreSQL" if _using_postgres else "SQLite"
     print(f"[OK] Database initialized ({db_type})")
@@ -187,11 +188,100 @@ def init_database():
         _run_pg_migrations()
     else:
         _run_sqlite_migrations()
+    _migrate_shaswata_event_key()
     
     # Seed default data
     _seed_defaults()
 
 
+def _migrate_daily_panchang():
+    """
+    daily_panchang is a pure cache. Tables created before it was keyed by
+    (date, location_hash, calc_version) are dropped and recreated empty.
+    """
+    from sqlalchemy import inspect as sa_inspect
+    from .models import DailyPanchang
+    try:
+        cols = {c["name"] for c in sa_inspect(engine).get_columns("daily_panchang")}
+        if "calc_version" not in cols:
+            DailyPanchang.__table__.drop(bind=engine)
+            DailyPanchang.__table__.create(bind=engine)
+            print("[MIGRATE] Recreated daily_panchang cache with (date, location_hash, calc_version) key")
+    except Exception as e:
+        print(f"[WARN] daily_panchang migration: {e}")
+
+
+SHASWATA_EVENT_KEY = "uq_shaswata_events_sub_year_date"
+_shaswata_event_key_ready = None
+
+
+def has_shaswata_event_key() -> bool:
+    """
+    True when the (subscription_id, year, scheduled_date) unique index exists,
+    so event population can use ON CONFLICT DO NOTHING.
+    """
+    global _shaswata_event_key_ready
+    if _shaswata_event_key_ready is None:
+        from sqlalchemy import inspect as sa_inspect
+        try:
+            _shaswata_event_key_ready = SHASWATA_EVENT_KEY in {
+                i["name"] for i in sa_inspect(engine).get_indexes("shaswata_events")
+            }
+        except Exception:
+            _shaswata_event_key_ready = False
+    return _shaswata_event_key_ready
+
+
+def _migrate_shaswata_event_key():
+    """
+    shaswata_events is keyed by (subscription_id, year, scheduled_date) so
+    population can bulk-insert with ON CONFLICT DO NOTHING. On an existing
+    table, `year` is normalized to the year of scheduled_date and the unique
+    index is created. Duplicate events are never removed here: they are
+    reported, the index is left out, and population falls back to
+    INSERT ... WHERE NOT EXISTS until they are resolved by hand.
+    """
+    global _shaswata_event_key_ready
+    _shaswata_event_key_ready = None
+    if has_shaswata_event_key():
+        return
+    year_of = ("CAST(EXTRACT(YEAR FROM scheduled_date) AS INTEGER)" if _using_postgres
+               else "CAST(strftime('%Y', scheduled_date) AS INTEGER)")
+    try:
+        with engine.begin() as conn:
+            conn.execute(sa_text(f"UPDATE shaswata_events SET year = {year_of} WHERE year <> {year_of}"))
+            duplicates = conn.execute(sa_text("""
+                SELECT subscription_id, year, scheduled_date, COUNT(*)
+                FROM shaswata_events
+                GROUP BY subscription_id, year, scheduled_date
+                HAVING COUNT(*) > 1
+                ORDER BY subscription_id, scheduled_date
+            """)).fetchall()
+            if not duplicates:
+                conn.execute(sa_text(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {SHASWATA_EVENT_KEY} "
+                    "ON shaswata_events (subscription_id, year, scheduled_date)"
+                ))
+    except Exception as e:
+        print(f"[ERROR] shaswata_events key migration failed: {e}")
+        print("[ERROR] Shaswata events will be inserted with NOT EXISTS checks until the unique index exists")
+        _shaswata_event_key_ready = False
+        return
+
+    if duplicates:
+        print(f"[ERROR] shaswata_events has {len(duplicates)} duplicated (subscription, date) pairs; "
+              f"unique index {SHASWATA_EVENT_KEY} NOT created. Nothing was deleted.")
+        for sub_id, year, scheduled, count in duplicates[:20]:
+            print(f"        subscription {sub_id}, {scheduled}: {count} events")
+        print("[ERROR] Merge or delete the extra events, then restart. Until then events are "
+              "inserted with NOT EXISTS checks.")
+        _shaswata_event_key_ready = False
+        return
+
+    _shaswata_event_key_ready = True
+    print(f"[MIGRATE] shaswata_events unique key {SHASWATA_EVENT_KEY} added")
+
+
 def _run_pg_migrations():
     """PostgreSQL-specific migration logic."""
     try:
@@ -205,6 +295,8 @@ def _run_pg_migrations():
             conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_shaswata_events_sub ON shaswata_events(subscription_id)"))
             conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_comm_logs_devotee ON communication_logs(devotee_id)"))
             conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_comm_logs_type ON communication_logs(message_type)"))
+            conn.execute(sa_text("ALTER TABLE devotees ADD COLUMN IF NOT EXISTS calendar_token VARCHAR(64)"))
+            conn.execute(sa_text("CREATE UNIQUE INDEX IF NOT EXISTS idx_devotees_calendar_token ON devotees(calendar_token)"))
             conn.commit()
             print("[MIGRATE] PostgreSQL indexes ensured.")
     except Exception as e:
@@ -239,6 +331,9 @@ def _run_sqlite_migrations():
             _add_column_if_missing("devotees", "address_confirmed", "BOOLEAN DEFAULT 0")
             _add_column_if_missing("devotees", "address_confirmed_at", "DATETIME")
             _add_column_if_missing("devotees", "address_confirmation_sent_at", "DATETIME")
+            _add_column_if_missing("devotees", "calendar_token", "VARCHAR(64)")
+            conn.execute(sa_text("CREATE UNIQUE INDEX IF NOT EXISTS idx_devotees_calendar_token ON devotees(calendar_token)"))
+            conn.commit()
             
             # Sync Metadata
             for tbl in ["transactions", "devotees", "shaswata_subscriptions"]:
@@ -358,6 +453,12 @@ def _seed_defaults():
                           description="Ayanamsa system (lahiri / raman / kp)", category="panchang"),
             SystemSetting(key="panchang_cache_version", value="1", value_type="INTEGER",
                           description="Bump to invalidate cached panchang data", category="panchang"),
+            SystemSetting(key="shaswata_tithi_rule", value="udaya", value_type="STRING",
+                          description="Shaswata tithi day: udaya (at sunrise) or IST time HH:MM", category="panchang"),
+            SystemSetting(key="shaswata_adhika_rule", value="nija", value_type="STRING",
+                          description="Shaswata in Adhika masa years: nija / adhika / both", category="panchang"),
+            SystemSetting(key="messaging_provider", value="file", value_type="STRING",
+                          description="Bulk message sender: file (data/outbox) / console", category="messaging"),
         ]
         for setting in panchang_defaults:
             existing = session.query(SystemSetting).filter_by(key=setting.key).first()
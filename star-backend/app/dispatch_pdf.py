@@ -0,0 +1,219 @@
+"""
+S.T.A.R. Prasadam Dispatch PDF
+================================
+Address labels and a post-office manifest for one day's Shaswata events,
+sorted and grouped by pincode / area, in one multi-page A4 PDF:
+
+  - Labels sheet: 3 × 8 labels per page (standard 24-up 70 × 37 mm sheet)
+  - Manifest: one row per parcel, a heading and a count per pincode
+
+Pages are drawn one at a time straight on a canvas while the rows are
+read in batches, so nothing but the finished (compressed) pages is kept;
+the output goes to a spooled temporary file that the endpoint streams
+back. Text is wrapped with simpleSplit and drawn directly (no Paragraph
+markup parsing per label); fonts and colours come from app.pdf_receipt,
+where they are set up once.
+"""
+
+import tempfile
+from datetime import date, datetime
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .pdf_receipt import (
+    KANNADA_FONT, KANNADA_BOLD, SAFFRON, DARK_SAFFRON, DARK_TEXT, MUTED_TEXT, LIGHT_BG, BORDER_COLOR,
+    TEMPLE_NAME_KN, TEMPLE_NAME_EN,
+)
+
+# ═══════════════════════════════════════════════════════════════════════
+# Layout
+# ═══════════════════════════════════════════════════════════════════════
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+
+LABEL_COLUMNS, LABEL_ROWS = 3, 8
+LABEL_WIDTH = PAGE_WIDTH / LABEL_COLUMNS
+LABEL_HEIGHT = PAGE_HEIGHT / LABEL_ROWS
+LABEL_PADDING = 4*mm
+
+MARGIN = 12*mm
+ROW_HEIGHT = 9*mm
+# Manifest columns: (title, width)
+MANIFEST_COLUMNS = [("#", 10*mm), ("Devotee", 42*mm), ("Address", 66*mm),
+                    ("Phone", 26*mm), ("Seva", 30*mm), ("Event", 12*mm)]
+
+FETCH_ROWS = 500                    # Rows read from the database per batch
+SPOOL_BYTES = 4 * 1024 * 1024       # Output kept in memory up to this size, then on disk
+
+SENDER_LINE = f"From: {TEMPLE_NAME_EN}, Tarikere - 577228"
+
+# ═══════════════════════════════════════════════════════════════════════
+# Rows
+# ═══════════════════════════════════════════════════════════════════════
+
+_EVENTS = """
+    SELECT se.id, d.full_name_en, d.address, d.area, COALESCE(d.pincode, ''), d.phone_number, sc.name_eng
+    FROM shaswata_events se
+    JOIN shaswata_subscriptions ss ON se.subscription_id = ss.id
+    JOIN devotees d ON ss.devotee_id = d.id
+    JOIN seva_catalog sc ON ss.seva_id = sc.id
+    WHERE se.scheduled_date = :target
+      AND COALESCE(se.is_active, TRUE) = TRUE
+      {status_filter}
+    ORDER BY COALESCE(d.pincode, ''), COALESCE(d.area, ''), d.full_name_en, se.id
+"""
+
+
+def _rows(db: Session, target_date: date, status: str):
+    """Events of the day in pincode order, read FETCH_ROWS at a time."""
+    query = text(_EVENTS.format(status_filter="AND se.status = :status" if status else ""))
+    result = db.execute(query.execution_options(yield_per=FETCH_ROWS),
+                        {"target": str(target_date), "status": status})
+    for batch in result.partitions():
+        yield from batch
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Pages
+# ═══════════════════════════════════════════════════════════════════════
+
+def _draw_label(c, index: int, row):
+    """Draws label `index` (0 .. 23) of the current page."""
+    event_id, name, address, area, pincode, phone, seva = row
+    column, line = index % LABEL_COLUMNS, index // LABEL_COLUMNS
+    x = column * LABEL_WIDTH + LABEL_PADDING
+    top = PAGE_HEIGHT - line * LABEL_HEIGHT - LABEL_PADDING
+    width = LABEL_WIDTH - 2 * LABEL_PADDING
+
+    # (text, font, size) lines, wrapped to the label width
+    lines = [(line, KANNADA_BOLD, 10) for line in simpleSplit(name or "", KANNADA_BOLD, 10, width)[:2]]
+    for part in (address, area):
+        if part:
+            lines += [(line, KANNADA_FONT, 8.5) for line in simpleSplit(part, KANNADA_FONT, 8.5, width)[:2]]
+    lines.append((f"PIN {pincode or '—'}" + (f"   Ph: {phone}" if phone else ""), "Helvetica-Bold", 8.5))
+
+    y = top
+    c.setFillColor(DARK_TEXT)
+    for line, font, size in lines:
+        y -= size + 1.5
+        c.setFont(font, size)
+        c.drawString(x, y, line)
+
+    c.setFont("Helvetica", 6)
+    c.setFillColor(MUTED_TEXT)
+    bottom = top - LABEL_HEIGHT + 2 * LABEL_PADDING
+    c.drawString(x, bottom, SENDER_LINE)
+    c.drawRightString(x + width, bottom + 7, f"#{event_id}")
+
+
+def _manifest_header(c, target_date: date, page: int) -> float:
+    """Page heading + column titles; returns the y of the first row."""
+    y = PAGE_HEIGHT - MARGIN
+    c.setFillColor(DARK_SAFFRON)
+    c.setFont(KANNADA_BOLD, 12)
+    c.drawCentredString(PAGE_WIDTH / 2, y - 4*mm, TEMPLE_NAME_KN)
+    c.setFillColor(DARK_TEXT)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawCentredString(PAGE_WIDTH / 2, y - 9*mm, f"Prasadam Dispatch Manifest — {target_date.strftime('%d-%m-%Y')}")
+    c.setFont("Helvetica", 7)
+    c.setFillColor(MUTED_TEXT)
+    c.drawRightString(PAGE_WIDTH - MARGIN, y - 9*mm, f"Page {page}")
+    y -= 16*mm
+    c.setFillColor(SAFFRON)
+    c.rect(MARGIN, y - 2*mm, PAGE_WIDTH - 2 * MARGIN, 6*mm, stroke=0, fill=1)
+    c.setFillColor(LIGHT_BG)
+    c.setFont("Helvetica-Bold", 8)
+    x = MARGIN + 1*mm
+    for title, width in MANIFEST_COLUMNS:
+        c.drawString(x, y, title)
+        x += width
+    return y - 7*mm
+
+
+def _manifest_group(c, y: float, pincode, count: int):
+    c.setFillColor(DARK_SAFFRON)
+    c.setFont("Helvetica-Bold", 9)
+    c.drawString(MARGIN, y, f"PIN {pincode or '(none)'} — {count} parcel{'s' if count != 1 else ''}")
+    c.setStrokeColor(BORDER_COLOR)
+    c.line(MARGIN, y - 1.5*mm, PAGE_WIDTH - MARGIN, y - 1.5*mm)
+
+
+def _manifest_row(c, y: float, number: int, row):
+    event_id, name, address, area, pincode, phone, seva = row
+    cells = [str(number), name or "", ", ".join(part for part in (address, area) if part),
+             phone or "", seva or "", str(event_id)]
+    x = MARGIN + 1*mm
+    c.setFillColor(DARK_TEXT)
+    for (title, width), value in zip(MANIFEST_COLUMNS, cells):
+        font = KANNADA_BOLD if title == "Devotee" else KANNADA_FONT
+        lines = simpleSplit(value, font, 7.5, width - 2*mm)[:2] or [""]
+        c.setFont(font, 7.5)
+        for n, line in enumerate(lines):
+            c.drawString(x, y - n * 3.2*mm, line)
+        x += width
+    c.setStrokeColor(BORDER_COLOR)
+    c.setLineWidth(0.3)
+    c.line(MARGIN, y - ROW_HEIGHT + 3*mm, PAGE_WIDTH - MARGIN, y - ROW_HEIGHT + 3*mm)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Document
+# ═══════════════════════════════════════════════════════════════════════
+
+def generate_dispatch_pdf(db: Session, target_date: date, status: str = "PENDING"):
+    """
+    Renders the labels sheet and the manifest for the events scheduled on
+    `target_date` (only `status` ones; None = all) into a spooled
+    temporary file. Returns (file positioned at 0, number of events).
+    The caller closes the file.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    c = canvas.Canvas(output, pagesize=A4, pageCompression=1)
+    c.setTitle(f"Prasadam dispatch {target_date.isoformat()}")
+    c.setAuthor(TEMPLE_NAME_EN)
+
+    # 1. Labels, 24 per page; per-pincode counts kept for the manifest headings
+    count, groups = 0, {}
+    for row in _rows(db, target_date, status):
+        if count and count % (LABEL_COLUMNS * LABEL_ROWS) == 0:
+            c.showPage()
+        _draw_label(c, count % (LABEL_COLUMNS * LABEL_ROWS), row)
+        groups[row[4]] = groups.get(row[4], 0) + 1
+        count += 1
+    if count == 0:
+        c.setFont("Helvetica", 11)
+        c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT / 2,
+                            f"No events to dispatch on {target_date.strftime('%d-%m-%Y')}")
+    c.showPage()
+
+    # 2. Manifest, grouped by pincode (second pass over the same order)
+    page = 1
+    y = _manifest_header(c, target_date, page)
+    current, number = object(), 0
+    for row in _rows(db, target_date, status):
+        needed = ROW_HEIGHT + (8*mm if row[4] != current else 0)
+        if y - needed < MARGIN:
+            c.showPage()
+            page += 1
+            y = _manifest_header(c, target_date, page)
+        if row[4] != current:
+            current = row[4]
+            _manifest_group(c, y, current, groups.get(current, 0))
+            y -= 8*mm
+        number += 1
+        _manifest_row(c, y, number, row)
+        y -= ROW_HEIGHT
+
+    c.setFillColor(MUTED_TEXT)
+    c.setFont("Helvetica", 7)
+    c.drawString(MARGIN, MARGIN / 2, f"{count} parcels, {len(groups)} pincodes • "
+                                     f"generated {datetime.now().strftime('%d-%m-%Y %I:%M %p')}")
+    c.showPage()
+    c.save()
+    output.seek(0)
+    return output, count
@@ -4,13 +4,16 @@ S.T.A.R. Festival Detection Engine
 Rule-based festival detection using Vedic calendar attributes.
 
 Each rule maps a combination of (masa, paksha, tithi, nakshatra, weekday)
-to a festival. Rules are checked in order; multiple can match.
+to a festival. Rules are compiled at import into an index keyed on
+(masa, paksha, tithi); multiple can match, reported in rule order.
 
 Usage:
     from app.festivals import detect_festivals
     festivals = detect_festivals(masa_idx, paksha, tithi_idx, nakshatra_idx, weekday, sankranti)
 """
 
+import threading
+
 # ═══════════════════════════════════════════════════════════════════════
 # FESTIVAL RULES
 # ═══════════════════════════════════════════════════════════════════════
@@ -387,6 +390,50 @@ VEDIC_GLOSSARY = {
 }
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# COMPILED RULE INDEX
+# ═══════════════════════════════════════════════════════════════════════
+# FESTIVAL_RULES is compiled once into:
+#   (masa, paksha, tithi) → {(nakshatra | None, weekday | None): [(order, payload), ...]}
+# Rules leaving masa / paksha / tithi open are copied into every concrete
+# key they cover, so a lookup is one dict access plus the four
+# nakshatra/weekday wildcard buckets, however many rules exist.
+
+_PAKSHAS = ("Shukla", "Krishna")
+
+
+def compile_festival_rules(rules):
+    """Builds the lookup index for `rules` (order is kept for stable output)."""
+    index = {}
+    for order, rule in enumerate(rules):
+        payload = {
+            "name_en": rule["name_en"],
+            "name_kn": rule["name_kn"],
+            "significance": rule["significance"],
+            "type": rule["type"],
+        }
+        masas = range(12) if rule.get("masa") is None else (rule["masa"],)
+        pakshas = _PAKSHAS if rule.get("paksha") is None else (rule["paksha"],)
+        tithis = range(15) if rule.get("tithi") is None else (rule["tithi"],)
+        bucket_key = (rule.get("nakshatra"), rule.get("weekday"))
+        for masa in masas:
+            for paksha in pakshas:
+                for tithi in tithis:
+                    buckets = index.setdefault((masa, paksha, tithi), {})
+                    buckets.setdefault(bucket_key, []).append((order, payload))
+    return index
+
+
+_FESTIVAL_INDEX = compile_festival_rules(FESTIVAL_RULES)
+
+
+def add_festival_rules(rules):
+    """Appends temple-specific (e.g. local utsava) rules and recompiles the index."""
+    global _FESTIVAL_INDEX
+    FESTIVAL_RULES.extend(rules)
+    _FESTIVAL_INDEX = compile_festival_rules(FESTIVAL_RULES)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # DETECTION FUNCTION
 # ═══════════════════════════════════════════════════════════════════════
@@ -408,26 +455,13 @@ def detect_festivals(masa_index, paksha, tithi_index, nakshatra_index, weekday,
     """
     matched = []
 
-    for rule in FESTIVAL_RULES:
-        # Check all specified conditions
-        if rule.get("masa") is not None and rule["masa"] != masa_index:
-            continue
-        if rule.get("paksha") is not None and rule["paksha"] != paksha:
-            continue
-        if rule.get("tithi") is not None and rule["tithi"] != tithi_index:
-            continue
-        if rule.get("nakshatra") is not None and rule["nakshatra"] != nakshatra_index:
-            continue
-        if rule.get("weekday") is not None and rule["weekday"] != weekday:
-            continue
-
-        # All conditions matched
-        matched.append({
-            "name_en": rule["name_en"],
-            "name_kn": rule["name_kn"],
-            "significance": rule["significance"],
-            "type": rule["type"],
-        })
+    buckets = _FESTIVAL_INDEX.get((masa_index, paksha, tithi_index))
+    if buckets:
+        hits = []
+        for key in ((None, None), (nakshatra_index, None), (None, weekday), (nakshatra_index, weekday)):
+            hits.extend(buckets.get(key, ()))
+        hits.sort(key=lambda hit: hit[0])
+        matched = [dict(payload) for _, payload in hits]
 
     # Sankranti is always a festival
     if sankranti:
@@ -441,6 +475,59 @@ def detect_festivals(masa_index, paksha, tithi_index, nakshatra_index, weekday,
     return matched
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# YEARLY CALENDAR
+# ═══════════════════════════════════════════════════════════════════════
+
+# (year, location_hash, calc_version, rule count) → festival list
+_CALENDAR_CACHE = {}
+_CALENDAR_CACHE_MAX = 32
+_calendar_lock = threading.Lock()
+
+
+def festival_calendar(year, calculator=None):
+    """
+    All festivals in Gregorian `year`, in date order, from one pass over the
+    year's language-neutral Panchang cores (same day rule as the daily
+    Panchangam). Cached per year + location.
+
+    Returns:
+        list of dicts: [{"date", "name_en", "name_kn", "significance", "type",
+                         "masa_index", "paksha", "tithi_index"}, ...]
+    """
+    from datetime import date
+    from app.panchang import PanchangCalculator
+
+    pc = calculator or PanchangCalculator()
+    key = (year, pc.location_hash, pc.CALC_VERSION, len(FESTIVAL_RULES))
+    cached = _CALENDAR_CACHE.get(key)
+    if cached is not None:
+        return [dict(f) for f in cached]
+
+    calendar = []
+    # Festivals only need the Pancha-Anga and Sankranti — skip rise/set and moon phase
+    for core in pc.compute_core_range(date(year, 1, 1), date(year, 12, 31), groups=frozenset({"sankranti"})):
+        paksha = "Shukla" if core.tithi < 15 else "Krishna"
+        sankranti = None
+        if core.sankranti is not None:
+            sankranti = PanchangCalculator.sankranti_name(core.sankranti, "en")
+        for festival in detect_festivals(core.masa, paksha, core.tithi % 15,
+                                         core.nakshatra, core.weekday, sankranti):
+            festival.update({
+                "date": core.date.isoformat(),
+                "masa_index": core.masa,
+                "paksha": paksha,
+                "tithi_index": core.tithi % 15,
+            })
+            calendar.append(festival)
+
+    with _calendar_lock:
+        if len(_CALENDAR_CACHE) >= _CALENDAR_CACHE_MAX:
+            _CALENDAR_CACHE.pop(next(iter(_CALENDAR_CACHE)), None)
+        _CALENDAR_CACHE[key] = calendar
+    return [dict(f) for f in calendar]
+
+
 def get_glossary_entry(term):
     """
     Look up a Vedic term in the glossary.
@@ -0,0 +1,269 @@
+"""
+S.T.A.R. Backend - iCalendar Feeds
+===================================
+RFC 5545 (.ics) feeds for calendar apps on the front-office phones:
+
+1. Festivals — the yearly festival calendar (app.festivals.festival_calendar)
+2. Shaswata — upcoming `shaswata_events`, for the temple or one devotee
+
+Calendar apps cannot send a login token, so a devotee's feed URL carries a
+per-devotee secret (`devotees.calendar_token`) instead of relying on the id.
+
+Feeds are written line by line by generators, so a response streams while
+rows are read. Every feed has a cheap version (ETag + Last-Modified)
+computed without building the feed: a poll from a calendar client that
+already has the current copy is answered 304 from one small query.
+"""
+
+import hashlib
+import hmac
+import secrets
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .festivals import FESTIVAL_RULES, festival_calendar
+from .panchang import PanchangCalculator
+
+PRODID = "-//S.T.A.R. Temple//Seva Calendar//EN"
+UID_DOMAIN = "star-temple"
+
+# Content lines are folded at 75 octets (RFC 5545 §3.1)
+FOLD_OCTETS = 75
+
+# Per-devotee feeds include events from the start of last year onwards
+DEVOTEE_HISTORY_YEARS = 1
+
+
+# =============================================================================
+# 1. WRITER
+# =============================================================================
+
+def ical_escape(value) -> str:
+    """Escapes a TEXT value (backslash, semicolon, comma, newline)."""
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line: str) -> str:
+    """Folds one content line to FOLD_OCTETS without splitting a UTF-8 character."""
+    if len(line.encode("utf-8")) <= FOLD_OCTETS:
+        return line + "\r\n"
+    parts, current, size = [], "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        limit = FOLD_OCTETS if not parts else FOLD_OCTETS - 1   # Continuations start with a space
+        if size + width > limit:
+            parts.append(current)
+            current, size = "", 0
+        current += char
+        size += width
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _stamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def write_calendar(name: str, events, stamp: datetime):
+    """
+    Yields the calendar as folded CRLF lines. `events` is an iterable of
+    dicts: {"uid", "date", "summary", "description", "categories"} — all-day
+    events on `date`. `stamp` becomes every DTSTAMP, so an unchanged feed
+    is byte-identical.
+    """
+    yield from (_fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{ical_escape(name)}",
+        "X-WR-TIMEZONE:Asia/Kolkata",
+    ))
+    dtstamp = _stamp(stamp)
+    for event in events:
+        day = event["date"]
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{event['uid']}@{UID_DOMAIN}",
+            f"DTSTAMP:{dtstamp}",
+            f"DTSTART;VALUE=DATE:{day.strftime('%Y%m%d')}",
+            f"DTEND;VALUE=DATE:{(day + timedelta(days=1)).strftime('%Y%m%d')}",
+            f"SUMMARY:{ical_escape(event['summary'])}",
+        ]
+        if event.get("description"):
+            lines.append(f"DESCRIPTION:{ical_escape(event['description'])}")
+        if event.get("categories"):
+            lines.append("CATEGORIES:" + ",".join(ical_escape(c) for c in event["categories"]))
+        lines += ["TRANSP:TRANSPARENT", "END:VEVENT"]
+        yield "".join(_fold(line) for line in lines)
+    yield _fold("END:VCALENDAR")
+
+
+def _etag(*parts) -> str:
+    return '"' + hashlib.md5("|".join(str(p) for p in parts).encode()).hexdigest() + '"'
+
+
+def is_not_modified(headers, etag: str, last_modified: datetime = None) -> bool:
+    """
+    True when the client's copy is current: If-None-Match matches the ETag,
+    or (without If-None-Match) If-Modified-Since is not older than last_modified.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        from email.utils import parsedate_to_datetime
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _as_utc(value):
+    """DB timestamp (datetime, or ISO string on SQLite) → aware UTC datetime."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # SQLite CURRENT_TIMESTAMP is UTC
+    return value.astimezone(timezone.utc)
+
+
+# =============================================================================
+# 2. FESTIVALS
+# =============================================================================
+
+def festival_feed_version(db: Session, calculator: PanchangCalculator, year: int):
+    """(etag, last_modified) of the festival feed: changes with the location, calculator or rules."""
+    row = db.execute(text("""
+        SELECT MAX(updated_at) FROM system_settings WHERE category = 'panchang'
+    """)).fetchone()
+    last_modified = _as_utc(row[0]) if row else None
+    etag = _etag("festivals", year, calculator.location_hash, calculator.CALC_VERSION,
+                 len(FESTIVAL_RULES), last_modified)
+    return etag, last_modified or datetime(year, 1, 1, tzinfo=timezone.utc)
+
+
+def festival_feed(calculator: PanchangCalculator, year: int, stamp: datetime):
+    """Generator of the .ics lines for the festival calendar of `year`."""
+    def _events():
+        for festival in festival_calendar(year, calculator):
+            day = date.fromisoformat(festival["date"])
+            slug = hashlib.md5(festival["name_en"].encode()).hexdigest()[:8]
+            description = festival.get("significance") or ""
+            if festival.get("name_kn"):
+                description = f"{festival['name_kn']}\n{description}".strip()
+            yield {
+                "uid": f"festival-{day.isoformat()}-{slug}",
+                "date": day,
+                "summary": festival["name_en"],
+                "description": description,
+                "categories": ["Festival", festival["type"].title()],
+            }
+
+    return write_calendar(f"Temple Festivals {year}", _events(), stamp)
+
+
+# =============================================================================
+# 3. SHASWATA EVENTS
+# =============================================================================
+
+def _window_filter(start: date, end: date, devotee_id: int):
+    clauses = ["se.scheduled_date >= :start", "COALESCE(se.is_active, TRUE) = TRUE"]
+    params = {"start": str(start)}
+    if end is not None:
+        clauses.append("se.scheduled_date <= :end")
+        params["end"] = str(end)
+    if devotee_id is not None:
+        clauses.append("ss.devotee_id = :devotee_id")
+        params["devotee_id"] = devotee_id
+    return " AND ".join(clauses), params
+
+
+def shaswata_feed_version(db: Session, start: date, end: date = None, devotee_id: int = None):
+    """(etag, last_modified) of a Shaswata feed, from one aggregate over the window."""
+    where, params = _window_filter(start, end, devotee_id)
+    row = db.execute(text(f"""
+        SELECT COUNT(*), COALESCE(SUM(se.id), 0),
+               MAX(COALESCE(se.updated_at, se.created_at)),
+               MAX(ss.last_modified), MAX(d.last_modified)
+        FROM shaswata_events se
+        JOIN shaswata_subscriptions ss ON se.subscription_id = ss.id
+        JOIN devotees d ON ss.devotee_id = d.id
+        WHERE {where}
+    """), params).fetchone()
+    stamps = [s for s in (_as_utc(v) for v in row[2:]) if s is not None]
+    last_modified = max(stamps) if stamps else datetime.combine(start, datetime.min.time(), timezone.utc)
+    etag = _etag("shaswata", start, end, devotee_id, row[0], row[1], last_modified)
+    return etag, last_modified
+
+
+def shaswata_feed(name: str, start: date, end: date, devotee_id: int, stamp: datetime):
+    """
+    Generator of the .ics lines for Shaswata events in [start, end]
+    (end None = no limit), optionally for one devotee. Rows are streamed
+    from the database on a session owned by the generator.
+    """
+    def _events():
+        from .database import SessionLocal
+        where, params = _window_filter(start, end, devotee_id)
+        db = SessionLocal()
+        try:
+            rows = db.execute(text(f"""
+                SELECT se.id, se.scheduled_date, se.status, d.full_name_en,
+                       sc.name_eng, ss.subscription_type, ss.occasion,
+                       ss.maasa, ss.paksha, ss.tithi
+                FROM shaswata_events se
+                JOIN shaswata_subscriptions ss ON se.subscription_id = ss.id
+                JOIN devotees d ON ss.devotee_id = d.id
+                JOIN seva_catalog sc ON ss.seva_id = sc.id
+                WHERE {where}
+                ORDER BY se.scheduled_date, se.id
+            """).execution_options(stream_results=True), params)
+            for row in rows:
+                scheduled = row[1] if isinstance(row[1], date) else date.fromisoformat(str(row[1]))
+                details = [f"Devotee: {row[3]}"]
+                if row[6]:
+                    details.append(f"Occasion: {row[6]}")
+                if row[5] == "LUNAR":
+                    details.append(f"Panchanga: {row[7]} {row[8]} {row[9]}")
+                details.append(f"Status: {row[2]}")
+                yield {
+                    "uid": f"shaswata-event-{row[0]}",
+                    "date": scheduled,
+                    "summary": f"{row[4]} - {row[3]}",
+                    "description": "\n".join(details),
+                    "categories": ["Shaswata", row[5] or "LUNAR"],
+                }
+        finally:
+            db.close()
+
+    return write_calendar(name, _events(), stamp)
+
+
+def devotee_feed_start(today: date = None) -> date:
+    """First date included in a per-devotee feed."""
+    today = today or date.today()
+    return date(today.year - DEVOTEE_HISTORY_YEARS, 1, 1)
+
+
+def devotee_feed_token(db: Session, devotee, rotate: bool = False) -> str:
+    """The devotee's feed secret, issued on first use (or reissued with `rotate`)."""
+    if rotate or not devotee.calendar_token:
+        devotee.calendar_token = secrets.token_urlsafe(24)
+        db.commit()
+    return devotee.calendar_token
+
+
+def is_devotee_feed_token(devotee, token: str) -> bool:
+    """Constant-time check of a feed URL's token against the devotee's secret."""
+    return bool(devotee.calendar_token and token) and hmac.compare_digest(devotee.calendar_token, token)
@@ -0,0 +1,452 @@
+"""
+S.T.A.R. Backend - Job Scheduler
+=================================
+Small durable scheduler for the background work of the backend (event
+population, reminders, backups, cache warmup, cloud sync).
+
+1. Jobs are registered in code (`scheduler.register`) and mirrored in the
+   `scheduled_jobs` table, where their cron schedule / enabled flag can be
+   changed and their metrics are kept. Every run is recorded in `job_runs`.
+2. A tick thread looks for due jobs; a job is claimed with one atomic
+   UPDATE on its row (lock row with a lease), so with several uvicorn
+   workers only one of them runs it. A crashed worker's lease expires.
+3. Claimed jobs run on a bounded thread pool. A failure is retried with
+   exponential backoff up to `max_retries`, then the job waits for its
+   next cron fire.
+
+Per-worker jobs (in-memory cache warmup) skip the lock: every process
+runs them on its own clock, and only their runs are recorded.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, case, func
+
+from .database import SessionLocal
+from .models import ScheduledJob, JobRun
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+TICK_SECONDS = 15               # How often due jobs are looked for
+JOB_WORKERS = 2                 # Threads running jobs in this process
+DEFAULT_LEASE_SECONDS = 1800    # Lock lease; a run longer than this may be taken over
+STARTUP_GRACE_SECONDS = 600     # run_at_startup jobs are skipped if run this recently
+RUNS_KEPT_PER_JOB = 200         # job_runs rows kept per job
+MAX_BACKOFF_SECONDS = 3600
+
+
+# =============================================================================
+# 1. CRON
+# =============================================================================
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (name, low, high) of the five cron fields
+_CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6))
+
+
+class CronSchedule:
+    """
+    Five-field cron expression (minute hour day month weekday) with `*`,
+    lists, ranges and `/step`; weekday 0 = Sunday (7 also accepted).
+    Like cron, when both day and weekday are restricted either may match.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr.strip()
+        fields = CRON_ALIASES.get(self.expr.lower(), self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+        parsed = [self._parse(value, *spec) for value, spec in zip(fields, _CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        self.weekdays = {d % 7 for d in self.weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(value, name, low, high):
+        values = set()
+        limit = 7 if name == "weekday" else high   # 7 = Sunday again
+        for part in value.split(","):
+            body, _slash, step = part.partition("/")
+            step = int(step) if step else 1
+            if body == "*":
+                first, last = low, high
+            elif "-" in body:
+                first, last = (int(v) for v in body.split("-"))
+            else:
+                first = last = int(body)
+                if step > 1:
+                    last = high
+            if not (low <= first <= last <= limit) or step < 1:
+                raise ValueError(f"Invalid cron {name} field: {value!r}")
+            values.update(range(first, last + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First fire time strictly after `moment` (naive local time)."""
+        t = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression never fires: {self.expr!r}")
+
+
+# =============================================================================
+# 2. SCHEDULER
+# =============================================================================
+
+class Job:
+    """A registered job: `func(db)` returns a JSON-able summary (or None)."""
+
+    def __init__(self, name, func, schedule, max_retries=3, retry_backoff_seconds=60,
+                 lease_seconds=DEFAULT_LEASE_SECONDS, run_at_startup=False, per_worker=False):
+        CronSchedule(schedule)  # Validate early
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.run_at_startup = run_at_startup
+        self.per_worker = per_worker
+
+
+class JobScheduler:
+    """
+    Tick thread + bounded worker pool. One global instance (`scheduler`);
+    jobs are registered before `start()`.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.jobs = {}
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._pool = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._running = set()           # Job names running in this process
+        self._running_lock = threading.Lock()
+        self._local_next = {}           # per_worker job -> next run (this process)
+
+    def register(self, name, func, schedule, **options):
+        """Registers a job (see Job for options). Replaces a job of the same name."""
+        self.jobs[name] = Job(name, func, schedule, **options)
+
+    # ── Lifecycle ──
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        try:
+            self._sync_jobs()
+        except Exception as e:
+            print(f"[WARN] Job scheduler: could not sync jobs: {e}")
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        print(f"[OK] Job scheduler started ({len(self.jobs)} jobs, {self.workers} workers, {self.worker_id})")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def _sync_jobs(self):
+        """Creates missing job rows; schedules startup runs and rows without a next run."""
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            for job in self.jobs.values():
+                row = db.get(ScheduledJob, job.name)
+                if row is None:
+                    row = ScheduledJob(
+                        name=job.name, schedule=job.schedule, enabled=True,
+                        max_retries=job.max_retries, retry_backoff_seconds=job.retry_backoff_seconds,
+                        attempt=0, run_count=0, failure_count=0, total_duration_ms=0,
+                    )
+                    db.add(row)
+                if row.next_run_at is None:
+                    row.next_run_at = self._next_fire(row.schedule, now)
+            db.commit()
+
+            for job in self.jobs.values():
+                if job.per_worker:
+                    self._local_next[job.name] = now if job.run_at_startup else self._next_fire(job.schedule, now)
+                elif job.run_at_startup:
+                    # Only if no worker ran it just now (several workers start together)
+                    db.query(ScheduledJob).filter(
+                        ScheduledJob.name == job.name,
+                        or_(ScheduledJob.last_run_at.is_(None),
+                            ScheduledJob.last_run_at < now - timedelta(seconds=STARTUP_GRACE_SECONDS)),
+                    ).update({"next_run_at": now}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _next_fire(schedule, after):
+        try:
+            return CronSchedule(schedule).next_after(after)
+        except ValueError as e:
+            print(f"[WARN] Job scheduler: {e}")
+            return after + timedelta(days=1)
+
+    # ── Tick ──
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[WARN] Job scheduler tick failed: {e}")
+            self._stop.wait(TICK_SECONDS)
+
+    def tick(self):
+        """Claims and submits every due job. Returns the names submitted."""
+        now = datetime.now()
+        submitted = []
+        db = SessionLocal()
+        try:
+            due = db.query(ScheduledJob).filter(
+                ScheduledJob.enabled == True,  # noqa: E712
+                ScheduledJob.next_run_at <= now,
+            ).all()
+            rows = {row.name: row for row in db.query(ScheduledJob).all()}
+            candidates = [row.name for row in due if row.name in self.jobs and not self.jobs[row.name].per_worker]
+            for name in candidates:
+                if name in self._running:
+                    continue
+                if self._claim(db, name, now):
+                    submitted.append(name)
+                    self._submit(self.jobs[name], rows[name].attempt or 0)
+
+            for name, next_at in list(self._local_next.items()):
+                row = rows.get(name)
+                if next_at <= now and name not in self._running and (row is None or row.enabled):
+                    self._local_next[name] = self._next_fire(row.schedule if row else self.jobs[name].schedule, now)
+                    submitted.append(name)
+                    self._submit(self.jobs[name], 0)
+        finally:
+            db.close()
+        return submitted
+
+    def _claim(self, db, name, now) -> bool:
+        """Atomic lock-row claim: True if this worker now owns the job's next run."""
+        job = self.jobs[name]
+        claimed = db.query(ScheduledJob).filter(
+            ScheduledJob.name == name,
+            ScheduledJob.enabled == True,  # noqa: E712
+            ScheduledJob.next_run_at <= now,
+            or_(ScheduledJob.locked_until.is_(None), ScheduledJob.locked_until < now),
+        ).update({
+            "locked_by": self.worker_id,
+            "locked_until": now + timedelta(seconds=job.lease_seconds),
+            "last_run_at": now,
+        }, synchronize_session=False)
+        db.commit()
+        return claimed == 1
+
+    def _submit(self, job, attempt):
+        with self._running_lock:
+            self._running.add(job.name)
+        self._pool.submit(self._execute, job, attempt)
+
+    # ── Run ──
+
+    def _execute(self, job, attempt):
+        started = datetime.now()
+        t0 = time.perf_counter()
+        db = SessionLocal()
+        run = None
+        try:
+            run = JobRun(job_name=job.name, worker=self.worker_id, attempt=attempt,
+                         status="RUNNING", started_at=started)
+            db.add(run)
+            db.commit()
+
+            status, result, error = "SUCCESS", None, None
+            try:
+                result = job.func(db)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                status = "FAILED"
+                error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"[:4000]
+                print(f"[WARN] Job {job.name} failed (attempt {attempt + 1}): {e}")
+
+            duration_ms = int((time.perf_counter() - t0) * 1000)
+            run.status = status
+            run.finished_at = datetime.now()
+            run.duration_ms = duration_ms
+            run.result = json.dumps(result, default=str)[:4000] if result is not None else None
+            run.error = error
+            self._finish(db, job, status, error, attempt, duration_ms)
+            db.commit()
+            self._prune_runs(db, job.name)
+        except Exception as e:
+            db.rollback()
+            print(f"[WARN] Job {job.name}: could not record run: {e}")
+        finally:
+            db.close()
+            with self._running_lock:
+                self._running.discard(job.name)
+
+    def _finish(self, db, job, status, error, attempt, duration_ms):
+        """
+        Updates metrics, schedules the next run (retry or cron) and releases the
+        lock, in one UPDATE. Counters are incremented in SQL: per-worker jobs
+        finish in every process against the same row.
+        """
+        row = db.get(ScheduledJob, job.name)
+        if row is None:
+            return
+        now = datetime.now()
+        failed = status == "FAILED"
+        values = {
+            "run_count": func.coalesce(ScheduledJob.run_count, 0) + 1,
+            "failure_count": func.coalesce(ScheduledJob.failure_count, 0) + (1 if failed else 0),
+            "total_duration_ms": func.coalesce(ScheduledJob.total_duration_ms, 0) + duration_ms,
+            "max_duration_ms": case(
+                (func.coalesce(ScheduledJob.max_duration_ms, 0) < duration_ms, duration_ms),
+                else_=ScheduledJob.max_duration_ms,
+            ),
+            "last_duration_ms": duration_ms,
+            "last_status": status,
+            "last_error": error,
+        }
+        if job.per_worker:
+            values["next_run_at"] = self._local_next.get(job.name) or self._next_fire(row.schedule, now)
+        else:
+            if failed and attempt < (row.max_retries or 0):
+                backoff = min((row.retry_backoff_seconds or 60) * 2 ** attempt, MAX_BACKOFF_SECONDS)
+                values["attempt"] = attempt + 1
+                values["next_run_at"] = now + timedelta(seconds=backoff)
+            else:
+                values["attempt"] = 0
+                values["next_run_at"] = self._next_fire(row.schedule, now)
+            # Released only if still ours (a lease taken over is left alone)
+            mine = ScheduledJob.locked_by == self.worker_id
+            values["locked_by"] = case((mine, None), else_=ScheduledJob.locked_by)
+            values["locked_until"] = case((mine, None), else_=ScheduledJob.locked_until)
+        db.query(ScheduledJob).filter(ScheduledJob.name == job.name) \
+            .update(values, synchronize_session=False)
+
+    @staticmethod
+    def _prune_runs(db, name):
+        cutoff = db.query(JobRun.id).filter(JobRun.job_name == name) \
+            .order_by(JobRun.id.desc()).offset(RUNS_KEPT_PER_JOB).limit(1).scalar()
+        if cutoff is not None:
+            db.query(JobRun).filter(JobRun.job_name == name, JobRun.id <= cutoff) \
+                .delete(synchronize_session=False)
+            db.commit()
+
+
+# =============================================================================
+# 3. ADMIN HELPERS
+# =============================================================================
+
+def job_status(db, name: str = None) -> list:
+    """Jobs with their schedule, state and run metrics."""
+    query = db.query(ScheduledJob).order_by(ScheduledJob.name)
+    if name:
+        query = query.filter(ScheduledJob.name == name)
+    jobs = []
+    for row in query.all():
+        runs = row.run_count or 0
+        jobs.append({
+            "name": row.name,
+            "schedule": row.schedule,
+            "enabled": bool(row.enabled),
+            "registered": row.name in scheduler.jobs,
+            "next_run_at": row.next_run_at.isoformat() if row.next_run_at else None,
+            "last_run_at": row.last_run_at.isoformat() if row.last_run_at else None,
+            "last_status": row.last_status,
+            "last_error": (row.last_error or "").split("\n")[0] or None,
+            "running_on": row.locked_by,
+            "attempt": row.attempt or 0,
+            "metrics": {
+                "runs": runs,
+                "failures": row.failure_count or 0,
+                "avg_duration_ms": round((row.total_duration_ms or 0) / runs) if runs else None,
+                "last_duration_ms": row.last_duration_ms,
+                "max_duration_ms": row.max_duration_ms,
+            },
+        })
+    return jobs
+
+
+def recent_runs(db, name: str, limit: int = 20) -> list:
+    rows = db.query(JobRun).filter(JobRun.job_name == name) \
+        .order_by(JobRun.id.desc()).limit(limit).all()
+    return [{
+        "id": r.id, "worker": r.worker, "attempt": r.attempt, "status": r.status,
+        "started_at": r.started_at.isoformat() if r.started_at else None,
+        "duration_ms": r.duration_ms,
+        "result": json.loads(r.result) if r.result else None,
+        "error": r.error,
+    } for r in rows]
+
+
+def update_job(db, name: str, schedule: str = None, enabled: bool = None, run_now: bool = False):
+    """
+    Changes a job's schedule / enabled flag, or makes it due now.
+    Raises KeyError for unknown jobs, ValueError for bad cron expressions.
+    """
+    row = db.get(ScheduledJob, name)
+    if row is None:
+        raise KeyError(name)
+    now = datetime.now()
+    if schedule is not None:
+        CronSchedule(schedule)
+        row.schedule = schedule
+        row.next_run_at = CronSchedule(schedule).next_after(now)
+    if enabled is not None:
+        row.enabled = enabled
+    if run_now:
+        row.next_run_at = now
+        row.attempt = 0
+        if name in scheduler._local_next:
+            scheduler._local_next[name] = now
+    db.commit()
+    return job_status(db, name)[0]
+
+
+# Global Instance
+scheduler = JobScheduler()
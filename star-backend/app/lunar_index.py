@@ -0,0 +1,208 @@
+"""
+S.T.A.R. Backend - Lunar Date Index
+====================================
+Persistent reverse index: (year, masa, paksha, tithi) → Gregorian dates.
+
+The Panchangam is computed once per (year, location) and stored in
+`lunar_date_index`. `/panchangam/find` then answers with an indexed query
+instead of re-running the ephemeris for every day of the year. (Shaswata
+LUNAR scheduling uses the span-based app.tithi_observance tables instead,
+which also see kshaya tithis.)
+
+An index is "current" when its `lunar_index_builds` row carries the running
+CALC_VERSION. Changing the temple location / ayanamsa changes the location
+hash, so a new index is built next to the old one.
+"""
+
+import threading
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from .models import LunarDateIndex, LunarIndexBuild
+from .panchang import PanchangCalculator, resolve_masa, resolve_paksha, resolve_tithi
+from .panchang_cache import get_panchang_cores
+
+
+# (year, location_hash) pairs with a background build in flight
+_building = set()
+_building_lock = threading.Lock()
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def build_lunar_index(db: Session, year: int, pc: PanchangCalculator) -> int:
+    """
+    (Re)builds the index for one Gregorian year at the calculator's location.
+    Replaces any existing rows for that year + location. Returns the row count.
+    """
+    loc = pc.location_hash
+    rows = []
+    # Only masa / tithi / adhika are indexed: no rise/set, phase or Sankranti work
+    for core in pc.compute_core_range(date(year, 1, 1), date(year, 12, 31), groups=frozenset()):
+        rows.append({
+            "year": year,
+            "location_hash": loc,
+            "masa_index": core.masa,
+            "paksha": "Shukla" if core.tithi < 15 else "Krishna",
+            "tithi_index": core.tithi % 15,
+            "is_adhika": bool(core.is_adhika),
+            "gregorian_date": core.date,
+        })
+
+    db.query(LunarDateIndex).filter(
+        LunarDateIndex.year == year,
+        LunarDateIndex.location_hash == loc,
+    ).delete(synchronize_session=False)
+    db.bulk_insert_mappings(LunarDateIndex, rows)
+
+    build = db.get(LunarIndexBuild, (year, loc))
+    if build is None:
+        build = LunarIndexBuild(year=year, location_hash=loc)
+        db.add(build)
+    build.calc_version = pc.CALC_VERSION
+    build.row_count = len(rows)
+    db.commit()
+    return len(rows)
+
+
+def is_index_current(db: Session, year: int, pc: PanchangCalculator) -> bool:
+    """True if the stored index for this year/location was built with the running CALC_VERSION."""
+    build = db.get(LunarIndexBuild, (year, pc.location_hash))
+    return build is not None and build.calc_version == pc.CALC_VERSION
+
+
+def schedule_index_rebuild(year: int, pc: PanchangCalculator) -> bool:
+    """
+    Builds the index for `year` in a daemon thread (own DB session).
+    Returns False if a build for the same year + location is already running.
+    """
+    key = (year, pc.location_hash)
+    with _building_lock:
+        if key in _building:
+            return False
+        _building.add(key)
+
+    def _run():
+        from .database import SessionLocal
+        db = SessionLocal()
+        try:
+            if not is_index_current(db, year, pc):
+                count = build_lunar_index(db, year, pc)
+                print(f"[BG] Lunar date index built for {year} ({count} days, loc={pc.location_hash})")
+        except Exception as e:
+            db.rollback()
+            print(f"[BG] Lunar date index build error ({year}): {e}")
+        finally:
+            db.close()
+            with _building_lock:
+                _building.discard(key)
+
+    threading.Thread(target=_run, daemon=True).start()
+    return True
+
+
+# =============================================================================
+# LOOKUP
+# =============================================================================
+
+def lookup_lunar_dates(db: Session, year: int, pc: PanchangCalculator,
+                       masa_index: int, paksha: str, tithi_index: int):
+    """
+    Indexed lookup. Returns a sorted list of (date, is_adhika) falling in
+    `year`, or None when no current index exists (a rebuild is scheduled).
+    """
+    if not is_index_current(db, year, pc):
+        schedule_index_rebuild(year, pc)
+        return None
+
+    rows = db.query(LunarDateIndex.gregorian_date, LunarDateIndex.is_adhika).filter(
+        LunarDateIndex.year == year,
+        LunarDateIndex.location_hash == pc.location_hash,
+        LunarDateIndex.masa_index == masa_index,
+        LunarDateIndex.paksha == paksha,
+        LunarDateIndex.tithi_index == tithi_index,
+    ).order_by(LunarDateIndex.gregorian_date).all()
+    return [(r[0], bool(r[1])) for r in rows]
+
+
+def find_lunar_dates(db: Session, pc: PanchangCalculator, start: date, end: date,
+                     masa: str, paksha: str, tithi: str) -> list:
+    """
+    All (date, is_adhika) between `start` and `end` (inclusive) matching the
+    given Masa / Paksha / Tithi names (English, Kannada or common aliases).
+
+    Served from the index; years whose index is missing or stale fall back to
+    a live Panchangam scan while the rebuild runs in the background.
+    Raises ValueError for names that cannot be resolved.
+    """
+    masa_index = resolve_masa(masa)
+    paksha_name = resolve_paksha(paksha)
+    tithi_index = resolve_tithi(tithi)
+    if masa_index is None or paksha_name is None or tithi_index is None:
+        raise ValueError(f"Unrecognised Panchangam date: {masa} / {paksha} / {tithi}")
+
+    matches = []
+    for year in range(start.year, end.year + 1):
+        year_start = max(start, date(year, 1, 1))
+        year_end = min(end, date(year, 12, 31))
+
+        indexed = lookup_lunar_dates(db, year, pc, masa_index, paksha_name, tithi_index)
+        if indexed is not None:
+            matches.extend(m for m in indexed if year_start <= m[0] <= year_end)
+            continue
+
+        live = _scan_range(db, pc, year_start, year_end)
+        matches.extend(live.get((masa_index, paksha_name, tithi_index), []))
+    return matches
+
+
+def lunar_dates_in_range(db: Session, pc: PanchangCalculator, start: date, end: date) -> dict:
+    """
+    Map of (masa_index, paksha, tithi_index) → [(date, is_adhika), ...] for
+    every day from `start` to `end` (inclusive), dates ascending.
+    One index query per year; stale years are computed live.
+    """
+    by_key = {}
+    for year in range(start.year, end.year + 1):
+        year_start = max(start, date(year, 1, 1))
+        year_end = min(end, date(year, 12, 31))
+
+        if is_index_current(db, year, pc):
+            rows = db.query(
+                LunarDateIndex.masa_index, LunarDateIndex.paksha, LunarDateIndex.tithi_index,
+                LunarDateIndex.gregorian_date, LunarDateIndex.is_adhika,
+            ).filter(
+                LunarDateIndex.year == year,
+                LunarDateIndex.location_hash == pc.location_hash,
+                LunarDateIndex.gregorian_date >= year_start,
+                LunarDateIndex.gregorian_date <= year_end,
+            ).order_by(LunarDateIndex.gregorian_date).all()
+            for masa_index, paksha, tithi_index, d, adhika in rows:
+                by_key.setdefault((masa_index, paksha, tithi_index), []).append((d, bool(adhika)))
+            continue
+
+        schedule_index_rebuild(year, pc)
+        for key, dates in _scan_range(db, pc, year_start, year_end).items():
+            by_key.setdefault(key, []).extend(dates)
+    return by_key
+
+
+def _scan_range(db: Session, pc: PanchangCalculator, start: date, end: date) -> dict:
+    """Live fallback: reads each day through the Panchang cache and groups by lunar date."""
+    by_key = {}
+    for core in get_panchang_cores(db, start, end, pc):
+        key = (core.masa, "Shukla" if core.tithi < 15 else "Krishna", core.tithi % 15)
+        by_key.setdefault(key, []).append((core.date, bool(core.is_adhika)))
+    return by_key
+
+
+def warm_lunar_index(pc: PanchangCalculator, years=None):
+    """Schedules background builds for the given years (default: this year and next)."""
+    if years is None:
+        this_year = date.today().year
+        years = (this_year, this_year + 1)
+    for year in years:
+        schedule_index_rebuild(year, pc)
@@ -0,0 +1,561 @@
+"""
+S.T.A.R. Backend - Bulk Messaging
+==================================
+Campaigns of devotee messages (reminders, delivery checks, address
+verification) sent through an outbox:
+
+1. Templates — compiled once at import; rendering is a join of literal
+   pieces and field values.
+2. Campaigns — one query selects every target, bodies are rendered and
+   the whole batch is written to `message_outbox` with one bulk INSERT.
+3. Dispatcher — an asyncio event loop on its own thread claims queued
+   rows in batches (claim token, safe with several workers), hands them
+   to a pool of worker coroutines with per-channel rate limits, and
+   records results in bulk (outbox status + `communication_logs`).
+   Failures are retried with exponential backoff.
+4. Providers — pluggable senders. V1 ships local stand-ins: "file"
+   (JSON lines under data/outbox/) and "console". Chosen by the
+   `messaging_provider` SystemSetting.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from string import Formatter
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+OUTBOX_WORKERS = 8              # Worker coroutines sending messages
+CLAIM_BATCH = 500               # Outbox rows claimed per round
+POLL_SECONDS = 5                # Idle wait between outbox polls (a new campaign wakes it at once)
+MAX_ATTEMPTS = 5                # Sends per message before it is marked FAILED
+RETRY_BASE_SECONDS = 30         # Backoff: 30 s, 60 s, 120 s, ...
+STALE_CLAIM_SECONDS = 600       # SENDING rows older than this (crashed worker) are re-queued
+OUTBOX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "outbox")
+
+DEFAULT_CHANNEL = "WHATSAPP"
+
+
+# =============================================================================
+# 1. TEMPLATES
+# =============================================================================
+
+class MessageTemplate:
+    """A str.format-style template ({field} only), parsed once."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if spec or conversion:
+                raise ValueError(f"Template fields take no format spec: {{{field}}}")
+            self._parts.append((literal, field))
+        self.fields = {field for _literal, field in self._parts if field}
+
+    def render(self, values: dict) -> str:
+        return "".join(
+            literal + ("" if field is None else str(values[field]))
+            for literal, field in self._parts
+        )
+
+
+TEMPLATES = {
+    "REMINDER": MessageTemplate(
+        "🙏 Namaste {name}!\n"
+        "Your Shaswata Seva ({seva}) is scheduled for tomorrow ({date}).\n"
+        "May Lord Subramanya bless you and your family.\n"
+        "- Sri Subramanya Temple"
+    ),
+    "DELIVERY_CHECK": MessageTemplate(
+        "🙏 Namaste {name}!\n"
+        "We dispatched Prasadam for your {seva} seva on {date}.\n"
+        "Did you receive it?\n"
+        "Reply YES or NO.\n"
+        "If your address has changed, please update it.\n"
+        "- Sri Subramanya Temple"
+    ),
+    "ADDRESS_VERIFY": MessageTemplate(
+        "🙏 Namaste {name}!\n"
+        "Your annual Shaswata Seva is coming up soon.\n"
+        "Current address: {address}\n"
+        "Is this correct? Reply YES or send us your new address.\n"
+        "- Sri Subramanya Temple"
+    ),
+}
+
+
+def format_address(address, area, pincode) -> str:
+    return f"{address or ''}, {area or ''} - {pincode or ''}".strip(", -")
+
+
+# =============================================================================
+# 2. CAMPAIGNS
+# =============================================================================
+
+_EVENT_TARGETS = """
+    SELECT se.id, ss.id, d.id, d.full_name_en, d.phone_number,
+           d.address, d.area, d.pincode,
+           sc.name_eng, ss.communication_preference, {date_column}
+    FROM shaswata_events se
+    JOIN shaswata_subscriptions ss ON se.subscription_id = ss.id
+    JOIN devotees d ON ss.devotee_id = d.id
+    JOIN seva_catalog sc ON ss.seva_id = sc.id
+    WHERE COALESCE(se.is_active, TRUE) = TRUE
+      AND {where}
+      AND NOT EXISTS (
+          SELECT 1 FROM communication_logs cl
+          WHERE cl.event_id = se.id AND cl.message_type = :message_type AND cl.status = 'SENT'
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM message_outbox mo
+          WHERE mo.event_id = se.id AND mo.message_type = :message_type AND mo.status != 'FAILED'
+      )
+    ORDER BY se.id
+"""
+
+# kind -> (message_type, date column shown in the message, WHERE on shaswata_events)
+CAMPAIGN_KINDS = {
+    # Events on target_date that are still PENDING ("Pooja tomorrow")
+    "reminders": ("REMINDER", "se.scheduled_date",
+                  "se.scheduled_date = :target AND se.status = 'PENDING'"),
+    # Dispatched on or before target_date without delivery feedback
+    "delivery_checks": ("DELIVERY_CHECK", "se.dispatch_date",
+                        "se.status = 'DISPATCHED' AND se.delivery_status IS NULL "
+                        "AND se.dispatch_date <= :target"),
+    # Events on target_date whose devotee has not confirmed the address
+    "address_verify": ("ADDRESS_VERIFY", "se.scheduled_date",
+                       "se.scheduled_date = :target AND se.status = 'PENDING' "
+                       "AND COALESCE(d.address_confirmed, FALSE) = FALSE"),
+}
+
+
+def default_target_date(kind: str) -> date:
+    """Reminders: tomorrow. Delivery checks: dispatched 4+ days ago. Address checks: in a week."""
+    today = date.today()
+    return {"reminders": today + timedelta(days=1),
+            "delivery_checks": today - timedelta(days=4),
+            "address_verify": today + timedelta(days=7)}[kind]
+
+
+def create_campaign(db: Session, kind: str, target_date: date = None, channel: str = None,
+                    user_id: int = None) -> dict:
+    """
+    Queues one message per target of `kind` (see CAMPAIGN_KINDS) in a
+    single bulk INSERT. Targets already messaged (or queued) for the same
+    event are skipped, so running a campaign twice queues nothing new.
+    `channel` overrides each subscription's communication preference.
+    Raises ValueError for an unknown kind.
+    """
+    if kind not in CAMPAIGN_KINDS:
+        raise ValueError(f"kind must be one of {', '.join(CAMPAIGN_KINDS)}")
+    message_type, date_column, where = CAMPAIGN_KINDS[kind]
+    target_date = target_date or default_target_date(kind)
+    template = TEMPLATES[message_type]
+
+    targets = db.execute(
+        text(_EVENT_TARGETS.format(date_column=date_column, where=where)),
+        {"target": str(target_date), "message_type": message_type},
+    ).fetchall()
+
+    campaign_id = db.execute(text("""
+        INSERT INTO message_campaigns (kind, message_type, target_date, status, total, sent, failed, skipped,
+                                       created_by_user_id)
+        VALUES (:kind, :type, :target, 'QUEUED', 0, 0, 0, 0, :uid)
+        RETURNING id
+    """), {"kind": kind, "type": message_type, "target": str(target_date), "uid": user_id}).scalar()
+
+    rows, skipped = [], 0
+    for (event_id, sub_id, devotee_id, name, phone, address, area, pincode,
+         seva, preference, shown_date) in targets:
+        if not phone:
+            skipped += 1
+            continue
+        rows.append({
+            "cid": campaign_id, "did": devotee_id, "sid": sub_id, "eid": event_id,
+            "type": message_type, "chan": (channel or preference or DEFAULT_CHANNEL).upper(),
+            "to": phone,
+            "body": template.render({
+                "name": name, "seva": seva, "date": shown_date,
+                "address": format_address(address, area, pincode),
+            }),
+        })
+
+    if rows:
+        db.execute(text("""
+            INSERT INTO message_outbox (campaign_id, devotee_id, subscription_id, event_id, message_type,
+                                        channel, recipient, body, status, attempts)
+            VALUES (:cid, :did, :sid, :eid, :type, :chan, :to, :body, 'QUEUED', 0)
+        """), rows)
+    db.execute(text("""
+        UPDATE message_campaigns SET total = :total, skipped = :skipped,
+               status = CASE WHEN :total = 0 THEN 'DONE' ELSE 'QUEUED' END
+        WHERE id = :cid
+    """), {"total": len(rows), "skipped": skipped, "cid": campaign_id})
+    db.commit()
+
+    if rows:
+        outbox_dispatcher.wake()
+    return campaign_status(db, campaign_id)
+
+
+def campaign_status(db: Session, campaign_id: int) -> dict:
+    """Campaign counters plus live outbox counts by status. None if not found."""
+    row = db.execute(text("""
+        SELECT id, kind, message_type, target_date, status, total, sent, failed, skipped, created_at, finished_at
+        FROM message_campaigns WHERE id = :cid
+    """), {"cid": campaign_id}).fetchone()
+    if not row:
+        return None
+    outbox = dict(db.execute(text("""
+        SELECT status, COUNT(*) FROM message_outbox WHERE campaign_id = :cid GROUP BY status
+    """), {"cid": campaign_id}).fetchall())
+    return {
+        "campaign_id": row[0], "kind": row[1], "message_type": row[2],
+        "target_date": str(row[3]) if row[3] else None, "status": row[4],
+        "total": row[5], "sent": row[6], "failed": row[7], "skipped": row[8],
+        "outbox": outbox,
+        "created_at": str(row[9]) if row[9] else None,
+        "finished_at": str(row[10]) if row[10] else None,
+    }
+
+
+def list_campaigns(db: Session, limit: int = 20) -> list:
+    ids = db.execute(text("SELECT id FROM message_campaigns ORDER BY id DESC LIMIT :n"), {"n": limit}).fetchall()
+    return [campaign_status(db, cid) for (cid,) in ids]
+
+
+# =============================================================================
+# 3. PROVIDERS
+# =============================================================================
+
+class MessageProvider:
+    """
+    Sends one message. `send` returns a provider reference or raises.
+    `rate_limits`: messages per second per channel ("*" = any channel).
+    """
+    name = "base"
+    rate_limits = {"*": 50}
+
+    async def send(self, message: dict) -> str:
+        raise NotImplementedError
+
+    def flush(self):
+        """Called after every batch."""
+
+
+class FileProvider(MessageProvider):
+    """Local stand-in: appends each message as a JSON line to data/outbox/YYYY-MM-DD.jsonl."""
+    name = "file"
+    rate_limits = {"*": 1000}
+
+    def __init__(self, directory: str = OUTBOX_DIR):
+        self.directory = directory
+        self._lines = []
+        self._lock = threading.Lock()
+
+    async def send(self, message: dict) -> str:
+        ref = f"file-{message['id']}"
+        line = json.dumps({
+            "ref": ref, "at": datetime.now().isoformat(timespec="seconds"),
+            "channel": message["channel"], "to": message["recipient"],
+            "type": message["message_type"], "body": message["body"],
+        }, ensure_ascii=False)
+        with self._lock:
+            self._lines.append(line)
+        return ref
+
+    def flush(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+        if not lines:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{date.today().isoformat()}.jsonl")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class ConsoleProvider(MessageProvider):
+    """Local stand-in: prints each message (the V1 behaviour)."""
+    name = "console"
+    rate_limits = {"*": 200}
+
+    async def send(self, message: dict) -> str:
+        print(f"\n📱 [{message['channel']}] {message['message_type']} → {message['recipient']}")
+        print(f"   {message['body']}")
+        print(f"   ---")
+        return f"console-{message['id']}"
+
+
+PROVIDERS = {"file": FileProvider, "console": ConsoleProvider}
+DEFAULT_PROVIDER = "file"
+
+
+def get_provider(db: Session) -> MessageProvider:
+    """Provider named by the `messaging_provider` SystemSetting (default: file)."""
+    row = db.execute(text("SELECT value FROM system_settings WHERE key = 'messaging_provider'")).fetchone()
+    name = (row[0] if row and row[0] else DEFAULT_PROVIDER).lower()
+    if name not in PROVIDERS:
+        print(f"[WARN] Unknown messaging provider '{name}'; using '{DEFAULT_PROVIDER}'")
+        name = DEFAULT_PROVIDER
+    return PROVIDERS[name]()
+
+
+# =============================================================================
+# 4. DISPATCHER
+# =============================================================================
+
+class _RateLimiter:
+    """Token bucket: `rate` messages per second, bursts up to `rate`."""
+
+    def __init__(self, rate: float):
+        self.rate = float(rate)
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _utcnow():
+    return datetime.utcnow().replace(microsecond=0)
+
+
+class OutboxDispatcher:
+    """
+    Drains `message_outbox` on an asyncio loop in a daemon thread.
+    One global instance (`outbox_dispatcher`), started with the app.
+    """
+
+    def __init__(self, workers: int = OUTBOX_WORKERS):
+        self.workers = workers
+        self._thread = None
+        self._loop = None
+        self._wake = None
+        self._stopping = False
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "batches": 0, "last_batch_ms": None}
+
+    # ── Lifecycle ──
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._thread_main, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self.wake()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def wake(self):
+        """Start draining now (called after a campaign is queued)."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _run(self):
+        self._wake = asyncio.Event()
+        print(f"[OK] Outbox dispatcher started ({self.workers} workers)")
+        while not self._stopping:
+            try:
+                drained = await self.drain_once()
+            except Exception as e:
+                print(f"[WARN] Outbox dispatcher error: {e}")
+                drained = 0
+            if drained:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    # ── One round ──
+
+    async def drain_once(self) -> int:
+        """Claims one batch, sends it and records the results. Returns the batch size."""
+        batch, provider = await asyncio.to_thread(self._claim_batch)
+        if not batch:
+            return 0
+        t0 = time.perf_counter()
+        limiters = {}
+
+        def limiter_for(channel):
+            if channel not in limiters:
+                limiters[channel] = _RateLimiter(provider.rate_limits.get(channel, provider.rate_limits.get("*", 50)))
+            return limiters[channel]
+
+        queue = asyncio.Queue()
+        for message in batch:
+            queue.put_nowait(message)
+        results = []
+
+        async def worker():
+            while True:
+                try:
+                    message = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await limiter_for(message["channel"]).acquire()
+                try:
+                    ref = await provider.send(message)
+                    results.append((message, ref, None))
+                except Exception as e:
+                    results.append((message, None, f"{type(e).__name__}: {e}"))
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(batch)))))
+        try:
+            await asyncio.to_thread(provider.flush)
+        except Exception as e:
+            # Nothing in this batch reached the provider's destination: retry all of it
+            error = f"{type(e).__name__}: {e}"
+            results = [(message, None, error) for message, _ref, _error in results]
+        await asyncio.to_thread(self._record, results)
+        self.stats["batches"] += 1
+        self.stats["last_batch_ms"] = int((time.perf_counter() - t0) * 1000)
+        return len(batch)
+
+    def _claim_batch(self):
+        """Marks up to CLAIM_BATCH due rows SENDING under a fresh token and returns them."""
+        token = uuid.uuid4().hex
+        now = _utcnow()
+        db = SessionLocal()
+        try:
+            # Re-queue rows left SENDING by a worker that died
+            db.execute(text("""
+                UPDATE message_outbox SET status = 'QUEUED', claim_token = NULL
+                WHERE status = 'SENDING' AND claimed_at < :stale
+            """), {"stale": now - timedelta(seconds=STALE_CLAIM_SECONDS)})
+            ids = [r[0] for r in db.execute(text("""
+                SELECT id FROM message_outbox
+                WHERE status = 'QUEUED' AND (next_attempt_at IS NULL OR next_attempt_at <= :now)
+                ORDER BY id LIMIT :n
+            """), {"now": now, "n": CLAIM_BATCH}).fetchall()]
+            if not ids:
+                db.commit()
+                return [], None
+            id_list = ", ".join(str(int(i)) for i in ids)
+            db.execute(text(f"""
+                UPDATE message_outbox SET status = 'SENDING', claim_token = :token, claimed_at = :now
+                WHERE id IN ({id_list}) AND status = 'QUEUED'
+            """), {"token": token, "now": now})
+            db.commit()
+            rows = db.execute(text("""
+                SELECT id, campaign_id, devotee_id, subscription_id, event_id, message_type,
+                       channel, recipient, body, attempts
+                FROM message_outbox WHERE claim_token = :token ORDER BY id
+            """), {"token": token}).fetchall()
+            keys = ("id", "campaign_id", "devotee_id", "subscription_id", "event_id", "message_type",
+                    "channel", "recipient", "body", "attempts")
+            return [dict(zip(keys, row)) for row in rows], get_provider(db)
+        finally:
+            db.close()
+
+    def _record(self, results):
+        """Writes a batch's outcome: outbox rows, communication_logs and campaign counters."""
+        now = _utcnow()
+        sent = [(m, ref) for m, ref, error in results if error is None]
+        failed = [(m, error) for m, ref, error in results if error is not None]
+        retry = [(m, e) for m, e in failed if m["attempts"] + 1 < MAX_ATTEMPTS]
+        final = [(m, e) for m, e in failed if m["attempts"] + 1 >= MAX_ATTEMPTS]
+
+        db = SessionLocal()
+        try:
+            if sent:
+                db.execute(text("""
+                    UPDATE message_outbox
+                    SET status = 'SENT', attempts = attempts + 1, provider_ref = :ref,
+                        sent_at = :now, claim_token = NULL, last_error = NULL
+                    WHERE id = :id
+                """), [{"id": m["id"], "ref": ref, "now": now} for m, ref in sent])
+            if retry:
+                db.execute(text("""
+                    UPDATE message_outbox
+                    SET status = 'QUEUED', attempts = attempts + 1, last_error = :error,
+                        next_attempt_at = :next, claim_token = NULL
+                    WHERE id = :id
+                """), [{"id": m["id"], "error": e[:1000],
+                        "next": now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** m["attempts"])}
+                       for m, e in retry])
+            if final:
+                db.execute(text("""
+                    UPDATE message_outbox
+                    SET status = 'FAILED', attempts = attempts + 1, last_error = :error, claim_token = NULL
+                    WHERE id = :id
+                """), [{"id": m["id"], "error": e[:1000]} for m, e in final])
+
+            logged = [(m, "SENT", None) for m, _ref in sent] + [(m, "FAILED", e) for m, e in final]
+            if logged:
+                db.execute(text("""
+                    INSERT INTO communication_logs
+                        (devotee_id, subscription_id, event_id, message_type, channel,
+                         recipient_phone, status, error_message, message_preview)
+                    VALUES (:did, :sid, :eid, :type, :chan, :phone, :status, :error, :preview)
+                """), [{
+                    "did": m["devotee_id"], "sid": m["subscription_id"], "eid": m["event_id"],
+                    "type": m["message_type"], "chan": m["channel"], "phone": m["recipient"][:15],
+                    "status": status, "error": error, "preview": m["body"][:200],
+                } for m, status, error in logged])
+
+            campaigns = {m["campaign_id"] for m, _ref, _error in results if m["campaign_id"] is not None}
+            for campaign_id in campaigns:
+                db.execute(text("""
+                    UPDATE message_campaigns SET
+                        sent = (SELECT COUNT(*) FROM message_outbox WHERE campaign_id = :cid AND status = 'SENT'),
+                        failed = (SELECT COUNT(*) FROM message_outbox WHERE campaign_id = :cid AND status = 'FAILED')
+                    WHERE id = :cid
+                """), {"cid": campaign_id})
+                db.execute(text("""
+                    UPDATE message_campaigns SET status = 'DONE', finished_at = CURRENT_TIMESTAMP
+                    WHERE id = :cid AND status != 'DONE' AND NOT EXISTS (
+                        SELECT 1 FROM message_outbox
+                        WHERE campaign_id = :cid AND status IN ('QUEUED', 'SENDING')
+                    )
+                """), {"cid": campaign_id})
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.stats["sent"] += len(sent)
+        self.stats["failed"] += len(final)
+        self.stats["retried"] += len(retry)
+
+
+# Global Instance
+outbox_dispatcher = OutboxDispatcher()
@@ -4,7 +4,7 @@ S.T.A.R. Backend - SQLAlchemy ORM Models
 Defines the database models matching the PostgreSQL schema.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Numeric, DateTime, Date, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, Numeric, DateTime, Date, ForeignKey, Text, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -146,6 +146,9 @@ class Devotee(Base):
     address_confirmed = Column(Boolean, default=False)
     address_confirmed_at = Column(DateTime(timezone=True), nullable=True)
     address_confirmation_sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Secret for the devotee's .ics feed URL (calendar apps cannot send a login token)
+    calendar_token = Column(String(64), unique=True, nullable=True)
     
     # Audit columns
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -272,6 +275,11 @@ class ShaswataEvent(Base):
     # Relationships
     subscription = relationship("ShaswataSubscription", back_populates="events")
 
+    # One event per subscription per scheduled date (population inserts ON CONFLICT DO NOTHING)
+    __table_args__ = (
+        Index("uq_shaswata_events_sub_year_date", "subscription_id", "year", "scheduled_date", unique=True),
+    )
+
     def __repr__(self):
         return f"<ShaswataEvent(id={self.id}, sub={self.subscription_id}, date={self.scheduled_date}, status='{self.status}')>"
 
@@ -416,14 +424,225 @@ class DailyPanchang(Base):
     """
     Cache table for daily Panchangam calculations.
     Pre-computed or lazily cached to ensure instant loading.
+    Stores the language-neutral PanchangCore; each request projects it
+    into its own language. Read and written only via app.panchang_cache.
     """
     __tablename__ = "daily_panchang"
 
-    date = Column(Date, primary_key=True, index=True)           # The date this panchang is for
-    data_json = Column(Text, nullable=False)                     # Full JSON output from PanchangCalculator
-    version = Column(Integer, default=1)                         # Bump when calculation logic changes → invalidates cache
-    location_hash = Column(String(50), nullable=True)            # Hash of lat+lon used for this calculation
+    date = Column(Date, primary_key=True)                            # The date this panchang is for
+    location_hash = Column(String(50), primary_key=True)             # Hash of lat+lon+ayanamsa used for this calculation
+    calc_version = Column(Integer, primary_key=True)                 # PanchangCalculator.CALC_VERSION
+    data_json = Column(Text, nullable=False)                         # PanchangCore.to_json() (indices + instants)
+    version = Column(Integer, default=1)                             # panchang_cache_version setting → admin "clear cache"
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<DailyPanchang(date='{self.date}', loc='{self.location_hash}', version={self.version})>"
+
+
+class LunarDateIndex(Base):
+    """
+    Reverse index: (year, masa, paksha, tithi) → Gregorian date(s).
+    Built once per year and location so `/panchangam/find` and Shaswata LUNAR
+    scheduling answer with an indexed lookup instead of a 380-day scan.
+    An Adhika masa produces a second row for the same (masa, paksha, tithi).
+    """
+    __tablename__ = "lunar_date_index"
+
+    id = Column(Integer, primary_key=True, index=True)
+    year = Column(Integer, nullable=False)                       # Gregorian year the dates fall in
+    location_hash = Column(String(50), nullable=False)           # PanchangCalculator.location_hash
+    masa_index = Column(Integer, nullable=False)                 # 0=Chaitra .. 11=Phalguna
+    paksha = Column(String(10), nullable=False)                  # Shukla | Krishna
+    tithi_index = Column(Integer, nullable=False)                # 0=Pratipada .. 14=Purnima/Amavasya
+    is_adhika = Column(Boolean, default=False)
+    gregorian_date = Column(Date, nullable=False)
+
+    __table_args__ = (
+        Index("idx_lunar_index_lookup", "year", "location_hash", "masa_index", "paksha", "tithi_index"),
+    )
+
+    def __repr__(self):
+        return f"<LunarDateIndex({self.year} m={self.masa_index} {self.paksha} t={self.tithi_index} → {self.gregorian_date})>"
+
+
+class LunarIndexBuild(Base):
+    """
+    One row per (year, location) recording which calculation version the
+    lunar_date_index rows were built with. A mismatch triggers a rebuild.
+    """
+    __tablename__ = "lunar_index_builds"
+
+    year = Column(Integer, primary_key=True)
+    location_hash = Column(String(50), primary_key=True)
+    calc_version = Column(Integer, nullable=False)
+    row_count = Column(Integer, default=0)
+    built_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<LunarIndexBuild(year={self.year}, loc='{self.location_hash}', v={self.calc_version})>"
+
+
+class SchedulerWatermark(Base):
+    """
+    Progress marker of an incremental background job, one row per job.
+    For the Shaswata event scheduler: the newest subscription `last_modified`
+    already processed and the last date of the horizon already populated.
+    """
+    __tablename__ = "scheduler_watermarks"
+
+    name = Column(String(50), primary_key=True)                 # e.g. 'shaswata_events'
+    last_modified = Column(String(40), nullable=True)           # Raw DB value of the newest processed change
+    horizon = Column(Date, nullable=True)                       # Last date already populated
+    cursor = Column(Integer, nullable=True)                     # Last subscription id done by an unfinished chunked run
+    location_hash = Column(String(50), nullable=True)           # Panchang location the horizon was built for
+    calc_version = Column(Integer, nullable=True)
+    rules = Column(String(50), nullable=True)                   # LUNAR matching rules, e.g. 'udaya/nija'
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<SchedulerWatermark('{self.name}' lm={self.last_modified} horizon={self.horizon})>"
+
+
+class ScheduledJob(Base):
+    """
+    A background job run by app.job_scheduler, one row per job.
+    The row doubles as the job's lock: a worker owns a run while
+    `locked_by` is set and `locked_until` (the lease) has not passed, so
+    several uvicorn workers never run the same job at once.
+    Times are naive local time (cron schedules are local).
+    """
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String(50), primary_key=True)                 # e.g. 'shaswata_incremental'
+    schedule = Column(String(50), nullable=False)               # 5-field cron, e.g. '0 * * * *'
+    enabled = Column(Boolean, default=True)
+    max_retries = Column(Integer, default=3)                    # Retries after a failure before waiting for the next fire
+    retry_backoff_seconds = Column(Integer, default=60)         # Doubles on every retry
+
+    # Lock row
+    locked_by = Column(String(100), nullable=True)              # Worker id (host:pid:n) holding the lease
+    locked_until = Column(DateTime, nullable=True)
+
+    # State
+    next_run_at = Column(DateTime, nullable=True)
+    attempt = Column(Integer, default=0)                        # Consecutive failures of the current fire
+    last_run_at = Column(DateTime, nullable=True)
+    last_status = Column(String(20), nullable=True)             # SUCCESS | FAILED
+    last_error = Column(Text, nullable=True)
+
+    # Metrics
+    run_count = Column(Integer, default=0)
+    failure_count = Column(Integer, default=0)
+    total_duration_ms = Column(Integer, default=0)
+    last_duration_ms = Column(Integer, nullable=True)
+    max_duration_ms = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<ScheduledJob('{self.name}' '{self.schedule}' next={self.next_run_at})>"
+
+
+class JobRun(Base):
+    """History of scheduled job runs (newest kept per job, see app.job_scheduler)."""
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String(50), ForeignKey("scheduled_jobs.name", ondelete="CASCADE"), nullable=False, index=True)
+    worker = Column(String(100), nullable=True)
+    attempt = Column(Integer, default=0)
+    status = Column(String(20), default="RUNNING")              # RUNNING | SUCCESS | FAILED
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    result = Column(Text, nullable=True)                        # Summary returned by the job
+    error = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<JobRun({self.job_name} #{self.id} {self.status})>"
+
+
+class MessageCampaign(Base):
+    """
+    A bulk message run (e.g. 'reminders for all of tomorrow's events').
+    Its messages are queued in `message_outbox` and sent by app.messaging.
+    """
+    __tablename__ = "message_campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(30), nullable=False)               # reminders | delivery_checks | address_verify
+    message_type = Column(String(30), nullable=False)       # REMINDER | DELIVERY_CHECK | ADDRESS_VERIFY
+    target_date = Column(Date, nullable=True)               # Event date the campaign is about
+    status = Column(String(20), default="QUEUED")           # QUEUED | DONE
+    total = Column(Integer, default=0)
+    sent = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    skipped = Column(Integer, default=0)                    # Targets without a phone number
+    created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<MessageCampaign({self.id} {self.kind} {self.status} {self.sent}/{self.total})>"
+
+
+class OutboxMessage(Base):
+    """One rendered message waiting to be (or already) handed to the provider."""
+    __tablename__ = "message_outbox"
+    __table_args__ = (
+        Index("ix_message_outbox_status_next", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("message_campaigns.id", ondelete="CASCADE"), nullable=True, index=True)
+    devotee_id = Column(Integer, ForeignKey("devotees.id", ondelete="CASCADE"), nullable=False)
+    subscription_id = Column(Integer, nullable=True)
+    event_id = Column(Integer, nullable=True, index=True)
+    message_type = Column(String(30), nullable=False)
+    channel = Column(String(20), nullable=False)            # WHATSAPP | SMS | EMAIL
+    recipient = Column(String(100), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(20), default="QUEUED")           # QUEUED | SENDING | SENT | FAILED
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)       # Naive UTC; NULL = now
+    claim_token = Column(String(40), nullable=True)         # Batch that is sending it
+    claimed_at = Column(DateTime, nullable=True)
+    provider_ref = Column(String(100), nullable=True)
+    last_error = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxMessage({self.id} {self.message_type} {self.status})>"
+
+
+class ShaswataDailyDigest(Base):
+    """
+    Materialized per-day view of the Shaswata pujas, one-time bookings and
+    revenue (plus the English Panchangam) for the navbar bell and the
+    priest dashboard. Built and patched by app.shaswata_digest.
+    """
+    __tablename__ = "shaswata_daily_digests"
+
+    digest_date = Column(Date, primary_key=True)
+    data_json = Column(Text, nullable=False)                    # Digest dict (see build_digests)
+    devotee_ids = Column(Text, nullable=True)                   # ",3,17," — devotees listed, for patching
+    built_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ShaswataDailyDigest('{self.digest_date}')>"
+
+
+class ShaswataHealthCounter(Base):
+    """
+    Pre-aggregated counters for the Shaswata health dashboard, bucketed by
+    date (see app.shaswata_health). Kept up to date by dispatch, feedback,
+    subscription and booking writes.
+    """
+    __tablename__ = "shaswata_health_counters"
+
+    metric = Column(String(20), primary_key=True)               # dispatch | feedback | revenue
+    bucket = Column(String(10), primary_key=True, default="")   # ISO date, "" = none
+    value = Column(Numeric(14, 2), nullable=False, default=0)
 
     def __repr__(self):
-        return f"<DailyPanchang(date='{self.date}', version={self.version})>"
+        return f"<ShaswataHealthCounter({self.metric}/{self.bucket or '-'}={self.value})>"
@@ -0,0 +1,273 @@
+"""
+S.T.A.R. Muhurta Search
+========================
+Finds auspicious time windows over a date range from a set of constraints,
+e.g. "Shukla Shashthi on a Tuesday, outside Rahu Kala, in the next 6 months".
+
+Everything is evaluated on precomputed tables, never with calculate():
+ - tithi / nakshatra spans: yearly span tables (app.panchang_spans)
+ - sunrise / sunset: RiseSetTable (app.panchang_tables)
+ - masa: LunationTable; festivals: festival_calendar (cached per year)
+
+For each day the daylight interval (sunrise → sunset) is intersected with
+the spans whose tithi / nakshatra are allowed, the windows to avoid (Rahu
+Kala, Yamaganda, ...) are cut out, and what remains is scored.
+"""
+
+import bisect
+from datetime import date, timedelta, timezone
+
+import ephem
+
+from .festivals import festival_calendar
+from .panchang import (
+    PanchangCalculator, MASAS, NAKSHATRAS, TITHIS, VASARAS,
+    resolve_masa, resolve_nakshatra, resolve_paksha, resolve_tithi, resolve_weekday,
+)
+from .panchang_spans import spans_between
+from .panchang_tables import LUNATIONS, RISE_SET
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Windows that can be avoided (keys of PanchangCalculator.day_windows)
+AVOIDABLE = ("rahu", "yama", "gulika", "durmuhurtham")
+
+FESTIVAL_TYPES = ("tithi", "nakshatra", "solar", "special")
+
+# Score bonuses (minutes-equivalent) on top of the window length
+ABHIJIT_BONUS = 30
+AMRIT_BONUS = 15
+FESTIVAL_BONUS = 10
+
+MAX_DAYS = 366
+MAX_RESULTS = 100
+
+
+# =============================================================================
+# CONSTRAINTS
+# =============================================================================
+
+def _split(value):
+    """Comma-separated string or list → list of non-empty stripped strings."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def _resolve_set(values, resolver, count, label):
+    """
+    Names → allowed index set. A leading "!" excludes instead of includes
+    ("!Bharani,!Krittika" = any nakshatra except those). None = no constraint.
+    """
+    include, exclude = set(), set()
+    for name in _split(values):
+        negate = name.startswith("!")
+        index = resolver(name[1:] if negate else name)
+        if index is None:
+            raise ValueError(f"Unrecognised {label}: {name}")
+        (exclude if negate else include).add(index)
+    if not include and not exclude:
+        return None
+    return (include or set(range(count))) - exclude
+
+
+def parse_constraints(tithi=None, paksha=None, nakshatra=None, weekday=None,
+                      masa=None, festival_type=None, avoid=None):
+    """
+    Validates the constraint set and resolves names to indices.
+    Raises ValueError for anything unrecognised.
+    """
+    paksha_name = None
+    if paksha:
+        paksha_name = resolve_paksha(paksha)
+        if paksha_name is None:
+            raise ValueError(f"Unrecognised paksha: {paksha}")
+
+    # Tithi names are per paksha (0-14); expand to the 30-tithi indices
+    tithis = _resolve_set(tithi, resolve_tithi, 15, "tithi")
+    if tithis is not None or paksha_name:
+        in_paksha = tithis if tithis is not None else set(range(15))
+        offsets = {"Shukla": (0,), "Krishna": (15,)}.get(paksha_name, (0, 15))
+        tithis = {i + off for i in in_paksha for off in offsets}
+
+    festival_types = set(_split(festival_type)) or None
+    if festival_types and not festival_types <= set(FESTIVAL_TYPES):
+        raise ValueError(f"festival_type must be one of {', '.join(FESTIVAL_TYPES)}")
+
+    avoid_windows = [w.lower() for w in _split(avoid)]
+    for window in avoid_windows:
+        if window not in AVOIDABLE:
+            raise ValueError(f"avoid must be among {', '.join(AVOIDABLE)}")
+
+    return {
+        "tithi": tithis,
+        "nakshatra": _resolve_set(nakshatra, resolve_nakshatra, 27, "nakshatra"),
+        "weekday": _resolve_set(weekday, resolve_weekday, 7, "weekday"),
+        "masa": _resolve_set(masa, resolve_masa, 12, "masa"),
+        "festival_type": festival_types,
+        "avoid": avoid_windows,
+    }
+
+
+# =============================================================================
+# INTERVAL HELPERS
+# =============================================================================
+
+def _intersect(intervals, allowed):
+    """Intersection of two sorted interval lists."""
+    result = []
+    i = j = 0
+    while i < len(intervals) and j < len(allowed):
+        lo = max(intervals[i][0], allowed[j][0])
+        hi = min(intervals[i][1], allowed[j][1])
+        if lo < hi:
+            result.append((lo, hi))
+        if intervals[i][1] < allowed[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _subtract(intervals, cut):
+    """Removes every (start, end) in `cut` from the sorted interval list."""
+    for c_lo, c_hi in sorted(cut):
+        pieces = []
+        for lo, hi in intervals:
+            if c_hi <= lo or c_lo >= hi:
+                pieces.append((lo, hi))
+                continue
+            if lo < c_lo:
+                pieces.append((lo, c_lo))
+            if c_hi < hi:
+                pieces.append((c_hi, hi))
+        intervals = pieces
+    return intervals
+
+
+def _overlaps(interval, windows):
+    return any(interval[0] < hi and lo < interval[1] for lo, hi in windows)
+
+
+class _SpanIndex:
+    """Sorted (start, end, index) spans with bisect lookups."""
+
+    def __init__(self, spans):
+        self.spans = spans
+        self.starts = [s for s, _e, _i in spans]
+
+    def _first(self, when):
+        return max(bisect.bisect_right(self.starts, when) - 1, 0)
+
+    def allowed(self, allowed, lo, hi):
+        """Sub-intervals of [lo, hi) covered by spans whose index is allowed."""
+        result = []
+        for s, e, idx in self.spans[self._first(lo):]:
+            if s >= hi:
+                break
+            if idx in allowed and e > lo:
+                result.append((max(s, lo), min(e, hi)))
+        return result
+
+    def index_at(self, when):
+        s, e, idx = self.spans[self._first(when)]
+        return idx if s <= when < e else None
+
+
+def _to_ist(when):
+    dt = ephem.Date(when).datetime().replace(tzinfo=timezone.utc).astimezone(IST)
+    return dt.replace(microsecond=0)
+
+
+# =============================================================================
+# SEARCH
+# =============================================================================
+
+def search_muhurta(calculator: PanchangCalculator, start: date, days: int, constraints: dict,
+                   min_minutes: int = 24, limit: int = 10, order: str = "score", lang: str = "en") -> list:
+    """
+    Windows from `start` for `days` days (IST dates) satisfying `constraints`
+    (see parse_constraints), at least `min_minutes` long.
+
+    Each window is scored as its length in minutes plus bonuses for
+    overlapping Abhijit / Amrit Kalam and falling on a festival day.
+    `order` = "score" (best first) or "date" (earliest first).
+    """
+    lang = lang.lower()
+    location = calculator.rise_set_location
+    end = start + timedelta(days=days - 1)
+    range_lo = float(ephem.Date(start.strftime("%Y/%m/%d"))) - 1.0
+    range_hi = float(ephem.Date(end.strftime("%Y/%m/%d"))) + 2.0
+    tithi_spans = _SpanIndex(spans_between(calculator, "tithi", range_lo, range_hi))
+    nakshatra_spans = _SpanIndex(spans_between(calculator, "nakshatra", range_lo, range_hi))
+
+    festivals_by_date = {}
+    for year in range(start.year, end.year + 1):
+        for festival in festival_calendar(year, calculator):
+            festivals_by_date.setdefault(festival["date"], []).append(festival)
+
+    windows = []
+    day = start
+    while day <= end:
+        current, day = day, day + timedelta(days=1)
+        weekday = current.weekday()
+        if constraints["weekday"] is not None and weekday not in constraints["weekday"]:
+            continue
+
+        year_days = RISE_SET.year(location, current.year)
+        sunrise, sunset = year_days[current.timetuple().tm_yday - 1][:2]
+        if sunrise is None or sunset is None:
+            continue
+
+        # Masa at 00:30 UTC, the instant the daily Panchangam uses
+        panchang_instant = float(ephem.Date(current.strftime("%Y/%m/%d"))) + 0.5 / 24
+        _prev, _next, masa_index, is_adhika = LUNATIONS.lunation_at(panchang_instant, calculator.ayanamsa)
+        masa_index %= 12
+        if constraints["masa"] is not None and masa_index not in constraints["masa"]:
+            continue
+
+        festivals = festivals_by_date.get(current.isoformat(), [])
+        if constraints["festival_type"] and not any(f["type"] in constraints["festival_type"] for f in festivals):
+            continue
+
+        intervals = [(sunrise, sunset)]
+        if constraints["tithi"] is not None:
+            intervals = _intersect(intervals, tithi_spans.allowed(constraints["tithi"], sunrise, sunset))
+        if constraints["nakshatra"] is not None:
+            intervals = _intersect(intervals, nakshatra_spans.allowed(constraints["nakshatra"], sunrise, sunset))
+
+        named = PanchangCalculator.day_windows(sunrise, sunset, weekday)
+        for window in constraints["avoid"]:
+            intervals = _subtract(intervals, named[window])
+
+        for lo, hi in intervals:
+            minutes = (hi - lo) * 24 * 60
+            if minutes < min_minutes:
+                continue
+            abhijit = _overlaps((lo, hi), named["abhijit"])
+            amrit = _overlaps((lo, hi), named["amrit"])
+            score = minutes + ABHIJIT_BONUS * abhijit + AMRIT_BONUS * amrit + FESTIVAL_BONUS * bool(festivals)
+            tithi_index = tithi_spans.index_at(lo)
+            nakshatra_index = nakshatra_spans.index_at(lo)
+            windows.append({
+                "date": current.isoformat(),
+                "start": _to_ist(lo).isoformat(),
+                "end": _to_ist(hi).isoformat(),
+                "minutes": round(minutes),
+                "score": round(score, 1),
+                "weekday": VASARAS[lang][weekday],
+                "masa": MASAS[lang][masa_index],
+                "is_adhika": is_adhika,
+                "paksha": "Shukla" if tithi_index is not None and tithi_index < 15 else "Krishna",
+                "tithi": TITHIS[lang][tithi_index] if tithi_index is not None else None,
+                "nakshatra": NAKSHATRAS[lang][nakshatra_index] if nakshatra_index is not None else None,
+                "abhijit": abhijit,
+                "amrit_kalam": amrit,
+                "festivals": [f["name_en"] if lang == "en" else f["name_kn"] for f in festivals],
+            })
+
+    if order == "score":
+        windows.sort(key=lambda w: (-w["score"], w["start"]))
+    return windows[:limit]
@@ -14,10 +14,16 @@ Features:
 """
 
 import ephem
+import hashlib
+import json
 import math
-from datetime import datetime, timedelta
+import struct
+from datetime import date, datetime, timedelta
 
 from app.festivals import detect_festivals, get_glossary_entry, VEDIC_GLOSSARY
+from app.panchang_ayanamsa import get_ayanamsa
+from app.panchang_tables import LUNATIONS, SANKRANTIS, RISE_SET
+from app.panchang_vector import get_backend
 
 # ═══════════════════════════════════════════════════════════════════════
 # CONSTANTS — Vedic Calendar Reference Data
@@ -141,14 +147,285 @@ RASHIS = {
            "ತುಲಾ", "ವೃಶ್ಚಿಕ", "ಧನು", "ಮಕರ", "ಕುಂಭ", "ಮೀನ"]
 }
 
-# Ayanamsa Values (degrees, approximate for modern dates)
-AYANAMSA_TABLE = {
-    "lahiri": 24.14,       # Chitrapaksha — most widely used in India
-    "raman": 22.46,        # B.V. Raman system
-    "kp": 23.97,           # Krishnamurti Paddhati
+# Ayanamsa modes (lahiri / raman / kp) are functions of time tabulated per
+# day — see app.panchang_ayanamsa.
+
+
+# Alternate spellings seen in subscriptions / user input → index
+# (schemas.Maasa uses the Sanskrit forms, the calculator the Kannada-region forms)
+MASA_ALIASES = {
+    "ashwina": 6, "ashvina": 6, "ashvayuja": 6,
+    "karthika": 7, "kartheeka": 7,
+    "margashirsha": 8, "margasira": 8,
+    "pausha": 9,
+}
+
+TITHI_ALIASES = {
+    "shasthi": 5, "shashti": 5, "shasti": 5, "sashti": 5,
+    "purnami": 14, "pournami": 14, "hunnime": 14,
+    "amavasye": 14,
 }
 
 
+def resolve_masa(name):
+    """Returns the Masa index (0=Chaitra..11=Phalguna) for an English/Kannada name, or None."""
+    if not name:
+        return None
+    key = str(name).strip().lower()
+    for lang in ("en", "kn"):
+        for idx, masa in enumerate(MASAS[lang]):
+            if masa.lower() == key:
+                return idx
+    return MASA_ALIASES.get(key)
+
+
+def resolve_paksha(name):
+    """Normalizes a paksha name (English or Kannada) to 'Shukla' / 'Krishna', or None."""
+    key = str(name or "").strip().lower()
+    if key in ("shukla", "ಶುಕ್ಲ"):
+        return "Shukla"
+    if key in ("krishna", "ಕೃಷ್ಣ"):
+        return "Krishna"
+    return None
+
+
+def resolve_tithi(name):
+    """Returns the tithi index within its paksha (0=Pratipada..14=Purnima/Amavasya), or None."""
+    if not name:
+        return None
+    key = str(name).strip().lower()
+    for lang in ("en", "kn"):
+        for idx, tithi in enumerate(TITHIS[lang]):
+            if tithi.lower() == key:
+                return idx % 15
+    return TITHI_ALIASES.get(key)
+
+
+def resolve_nakshatra(name):
+    """Returns the Nakshatra index (0=Ashwini..26=Revati) for an English/Kannada name, or None."""
+    if not name:
+        return None
+    key = str(name).strip().lower()
+    for lang in ("en", "kn"):
+        for idx, nakshatra in enumerate(NAKSHATRAS[lang]):
+            if nakshatra.lower() == key:
+                return idx
+    return None
+
+
+def resolve_weekday(name):
+    """
+    Returns the weekday index (Mon=0..Sun=6) for "Tuesday", "tue", "Bhouma",
+    the Kannada vasara name or a digit, or None.
+    """
+    key = str(name or "").strip().lower()
+    if key.isdigit():
+        return int(key) if int(key) < 7 else None
+    for idx, (vasara_en, vasara_kn) in enumerate(zip(VASARAS["en"], VASARAS["kn"])):
+        sanskrit, english = vasara_en.lower().rstrip(")").split(" (")
+        if key in (sanskrit, english, english[:3], vasara_kn):
+            return idx
+    return None
+
+
+def karana_for_half_tithi(k_index):
+    """Maps a half-tithi number (0-59 across the lunar month) to its KARANAS index."""
+    if k_index == 0:
+        return 10  # Kimstughna
+    if k_index == 58:
+        return 7   # Shakuni
+    if k_index == 59:
+        return 8   # Chatushpada
+    if k_index == 60:
+        return 9   # Naga
+    return (k_index - 1) % 7
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# FIELD SELECTION
+# ═══════════════════════════════════════════════════════════════════════
+
+# Response sections → optional core work they need. The Pancha-Anga,
+# masa and samvatsara are always computed (two body positions + table
+# lookups); the groups below are skipped unless a selected section uses them.
+#   sun       — sunrise / sunset (iterative rise/set search)
+#   moon      — moonrise / moonset (iterative rise/set search)
+#   phase     — illumination, next Purnima / Amavasya
+#   sankranti — solar ingress lookup
+SECTION_GROUPS = {
+    "sun_cycle": {"sun", "moon"},
+    "moon_cycle": {"phase"},
+    "attributes": set(),
+    "inauspicious": {"sun"},
+    "auspicious": {"sun"},
+    "sankranti": {"sankranti"},
+    "festivals": {"sankranti"},
+    "glossary": set(),
+    "description": set(),
+    "meta": set(),
+}
+CORE_GROUPS = frozenset({"sun", "moon", "phase", "sankranti"})
+
+
+def parse_fields(fields):
+    """
+    Normalizes a field selection: None (everything), "attributes,sun_cycle.sunrise"
+    or an iterable of such names → {section: set of sub-keys, or None for all}.
+    Raises ValueError for unknown sections.
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    selection = {}
+    for name in fields:
+        name = name.strip()
+        if not name:
+            continue
+        section, _, key = name.partition(".")
+        if section not in SECTION_GROUPS:
+            raise ValueError(f"Unknown Panchangam field: {section}")
+        if not key:
+            selection[section] = None
+        elif section not in selection:
+            selection[section] = {key}
+        elif selection[section] is not None:
+            selection[section].add(key)
+    return selection or None
+
+
+def groups_for(selection):
+    """Core groups needed to render a parse_fields() selection."""
+    if selection is None:
+        return CORE_GROUPS
+    groups = set()
+    for section, keys in selection.items():
+        if section == "sun_cycle" and keys is not None:
+            if keys & {"sunrise", "sunset"}:
+                groups.add("sun")
+            if keys & {"moonrise", "moonset"}:
+                groups.add("moon")
+        else:
+            groups |= SECTION_GROUPS[section]
+    return frozenset(groups)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# CORE RECORD — Language-neutral Panchangam for one date
+# ═══════════════════════════════════════════════════════════════════════
+
+class PanchangCore:
+    """
+    Compact, language-neutral result of one day's ephemeris work: only
+    indices into the name tables above and UTC instants (ephem day numbers).
+    `PanchangCalculator.project` renders it in any language.
+
+    Encodings are stable: `to_bytes` is a fixed 59-byte struct prefixed with
+    CORE_FORMAT_VERSION; `to_json` is a flat dict with the same fields.
+    """
+
+    __slots__ = (
+        "ordinal", "weekday",
+        "sunrise", "sunset", "moonrise", "moonset",
+        "tithi", "karana", "nakshatra", "yoga",
+        "masa", "is_adhika", "samvatsara", "ritu", "dakshinayana",
+        "sun_rashi", "moon_rashi", "sankranti",
+        "illumination", "next_purnima", "next_amavasya",
+    )
+
+    CORE_FORMAT_VERSION = 1
+
+    # version | ordinal | 4 instants (NaN = none) | 11 small indices | flags |
+    # illumination (tenths of %) | next purnima / amavasya ordinals
+    _STRUCT = struct.Struct("<Bi4d11BBHii")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @property
+    def date(self):
+        return date.fromordinal(self.ordinal)
+
+    def __eq__(self, other):
+        return isinstance(other, PanchangCore) and all(
+            getattr(self, n) == getattr(other, n) for n in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"<PanchangCore({self.date} tithi={self.tithi} nakshatra={self.nakshatra} masa={self.masa})>"
+
+    # ── Binary ──
+
+    def to_bytes(self):
+        nan = float("nan")
+        flags = (1 if self.is_adhika else 0) | (2 if self.dakshinayana else 0)
+        return self._STRUCT.pack(
+            self.CORE_FORMAT_VERSION, self.ordinal,
+            nan if self.sunrise is None else self.sunrise,
+            nan if self.sunset is None else self.sunset,
+            nan if self.moonrise is None else self.moonrise,
+            nan if self.moonset is None else self.moonset,
+            self.weekday, self.tithi, self.karana, self.nakshatra, self.yoga,
+            self.masa, self.samvatsara, self.ritu, self.sun_rashi, self.moon_rashi,
+            255 if self.sankranti is None else self.sankranti,
+            flags, int(round(self.illumination * 10)),
+            self.next_purnima, self.next_amavasya,
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decodes `to_bytes` output. Raises ValueError on a format version mismatch."""
+        if len(data) != cls._STRUCT.size or data[0] != cls.CORE_FORMAT_VERSION:
+            raise ValueError("Unsupported PanchangCore encoding")
+        (_, ordinal, sunrise, sunset, moonrise, moonset,
+         weekday, tithi, karana, nakshatra, yoga, masa, samvatsara, ritu,
+         sun_rashi, moon_rashi, sankranti, flags, illum,
+         next_purnima, next_amavasya) = cls._STRUCT.unpack(data)
+
+        def _instant(x):
+            return None if math.isnan(x) else x
+
+        return cls(
+            ordinal=ordinal, weekday=weekday,
+            sunrise=_instant(sunrise), sunset=_instant(sunset),
+            moonrise=_instant(moonrise), moonset=_instant(moonset),
+            tithi=tithi, karana=karana, nakshatra=nakshatra, yoga=yoga,
+            masa=masa, is_adhika=bool(flags & 1), samvatsara=samvatsara, ritu=ritu,
+            dakshinayana=bool(flags & 2), sun_rashi=sun_rashi, moon_rashi=moon_rashi,
+            sankranti=None if sankranti == 255 else sankranti,
+            illumination=illum / 10, next_purnima=next_purnima, next_amavasya=next_amavasya,
+        )
+
+    # ── JSON ──
+
+    def to_json(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["v"] = self.CORE_FORMAT_VERSION
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        """Decodes `to_json` output. Raises ValueError on a format version mismatch."""
+        data = json.loads(text)
+        if not isinstance(data, dict) or data.get("v") != cls.CORE_FORMAT_VERSION:
+            raise ValueError("Unsupported PanchangCore encoding")
+        return cls(**data)
+
+
+# Precomputed core tables (see app/panchang_store.py), keyed by location hash.
+# Anything with a `.get(ordinal) -> PanchangCore | None` method works.
+_CORE_STORES = {}
+
+
+def register_core_store(location_hash, store):
+    """Serve compute_core for this location from `store`; pass None to unregister."""
+    if store is None:
+        _CORE_STORES.pop(location_hash, None)
+    else:
+        _CORE_STORES[location_hash] = store
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # CORE ENGINE
 # ═══════════════════════════════════════════════════════════════════════
@@ -168,18 +445,46 @@ class PanchangCalculator:
     DEFAULT_AYANAMSA = 'lahiri'
 
     # Cache invalidation version — bump when you change calculation logic
-    CALC_VERSION = 2
+    CALC_VERSION = 3
+
+    # Ranges with at least this many uncached days evaluate the Sun / Moon
+    # longitudes in one vectorized call (see app.panchang_vector)
+    VECTOR_MIN_DAYS = 8
+    VECTOR_CHUNK_DAYS = 366
 
-    def __init__(self, lat=None, lon=None, elevation=None, ayanamsa=None):
+    # Ranges needing rise/set for at least this many days of a year build
+    # that year's RiseSetTable up front; shorter misses compute live and
+    # queue the year for a background build
+    RISE_SET_SYNC_DAYS = 60
+
+    def __init__(self, lat=None, lon=None, elevation=None, ayanamsa=None, backend="auto"):
         """
         Initialize with optional overrides. Falls back to defaults.
         In production, pass values from SystemSettings.
+
+        `backend` picks the longitude backend for range calculations:
+        "auto" (numpy when installed), "numpy" or "ephem". Single days,
+        sunrise / moonrise and illumination always use ephem.
         """
         self.lat = str(lat) if lat else self.DEFAULT_LAT
         self.lon = str(lon) if lon else self.DEFAULT_LON
         self.elevation = int(elevation) if elevation else self.DEFAULT_ELEVATION
         self.ayanamsa_mode = (ayanamsa or self.DEFAULT_AYANAMSA).lower()
-        self.ayanamsa_value = AYANAMSA_TABLE.get(self.ayanamsa_mode, AYANAMSA_TABLE["lahiri"])
+        self.ayanamsa = get_ayanamsa(self.ayanamsa_mode)   # Unknown modes fall back to Lahiri
+        self.backend = backend
+
+    @property
+    def rise_set_location(self):
+        """Key of this location in the shared RiseSetTable (ayanamsa does not affect rise/set)."""
+        return (self.lat, self.lon, self.elevation)
+
+    @property
+    def location_hash(self):
+        """
+        Short hash of the location (lat, lon, elevation) + ayanamsa, used to key
+        cached/precomputed data. Elevation moves sunrise/sunset, so it is part of the key.
+        """
+        return hashlib.md5(f"{self.lat}:{self.lon}:{self.elevation}:{self.ayanamsa_mode}".encode()).hexdigest()[:12]
 
     # ── Utility Methods ──────────────────────────────────────────────
 
@@ -194,10 +499,26 @@ class PanchangCalculator:
         """Returns time string like '06:14 AM'."""
         return dt.strftime("%I:%M %p")
 
-    def get_sidereal_lon(self, obj_lon_rad):
-        """Calculates Sidereal Longitude using configured Ayanamsa."""
-        deg = math.degrees(obj_lon_rad)
-        return (deg - self.ayanamsa_value) % 360
+    def get_sidereal_lon(self, obj_lon_rad, when):
+        """Sidereal longitude (deg) of a J2000 ecliptic longitude at ephem date `when`."""
+        return self.ayanamsa.sidereal(math.degrees(obj_lon_rad), when)
+
+    def ayanamsa_value(self, target_date):
+        """Ayanamsa of date (degrees) at the daily sampling instant (00:30 UTC)."""
+        dt = self._parse_date(target_date)
+        return self.ayanamsa.value(float(ephem.Date(dt.strftime("%Y/%m/%d"))) + 0.5 / 24)
+
+    @staticmethod
+    def _parse_date(target_date):
+        """Normalizes str (YYYY-MM-DD or DD-MM-YYYY), date or datetime input to a datetime."""
+        if isinstance(target_date, str):
+            try:
+                return datetime.strptime(target_date, "%Y-%m-%d")
+            except ValueError:
+                return datetime.strptime(target_date, "%d-%m-%Y")
+        if not isinstance(target_date, datetime):
+            return datetime.combine(target_date, datetime.min.time())
+        return target_date
 
     def _make_observer(self, target_date, hour=0, minute=0, second=0):
         """Creates an ephem.Observer for the configured location at a specific time."""
@@ -210,6 +531,56 @@ class PanchangCalculator:
 
     # ── Kaalas (Inauspicious Time Periods) ───────────────────────────
 
+    # Octant of daylight (0-7) holding each Kaala, per weekday (Mon=0 ... Sun=6)
+    RAHU_OCTANTS   = [1, 6, 4, 5, 3, 2, 7]
+    YAMA_OCTANTS   = [4, 3, 2, 1, 0, 6, 5]
+    GULIKA_OCTANTS = [6, 5, 4, 3, 2, 1, 0]
+
+    # Muhurta of daylight (0-14, ≈48 min each) per weekday (Mon=0 ... Sun=6).
+    # Source: Standard Panchangam references.
+    DURMUHURTHAM_MUHURTAS = {
+        0: [2, 7],     # Monday
+        1: [4, 11],    # Tuesday
+        2: [6, 10],    # Wednesday
+        3: [5, 9],     # Thursday
+        4: [3, 8],     # Friday
+        5: [1, 14],    # Saturday
+        6: [12, 13],   # Sunday
+    }
+    AMRIT_MUHURTA = {
+        0: 2,   # Monday — 3rd muhurta
+        1: 5,   # Tuesday — 6th muhurta
+        2: 1,   # Wednesday — 2nd muhurta
+        3: 10,  # Thursday — 11th muhurta
+        4: 4,   # Friday — 5th muhurta
+        5: 3,   # Saturday — 4th muhurta
+        6: 6,   # Sunday — 7th muhurta
+    }
+    ABHIJIT_MUHURTA = 7    # 8th muhurta, around solar noon
+
+    @classmethod
+    def day_windows(cls, sunrise, sunset, weekday_idx):
+        """
+        (start, end) of every named window of the day, as plain intervals.
+        Works on datetimes or ephem day numbers alike.
+        Keys: rahu, yama, gulika, durmuhurtham, abhijit, amrit.
+        """
+        octant = (sunset - sunrise) / 8
+        muhurta = (sunset - sunrise) / 15
+
+        def _span(unit, index):
+            start = sunrise + unit * index
+            return (start, start + unit)
+
+        return {
+            "rahu": [_span(octant, cls.RAHU_OCTANTS[weekday_idx])],
+            "yama": [_span(octant, cls.YAMA_OCTANTS[weekday_idx])],
+            "gulika": [_span(octant, cls.GULIKA_OCTANTS[weekday_idx])],
+            "durmuhurtham": [_span(muhurta, i) for i in cls.DURMUHURTHAM_MUHURTAS.get(weekday_idx, [])],
+            "abhijit": [_span(muhurta, cls.ABHIJIT_MUHURTA)],
+            "amrit": [_span(muhurta, cls.AMRIT_MUHURTA.get(weekday_idx, 0))],
+        }
+
     @staticmethod
     def calculate_kaalas(sunrise_dt, sunset_dt, weekday_idx):
         """
@@ -219,20 +590,15 @@ class PanchangCalculator:
         duration = sunset_dt - sunrise_dt
         octant = duration / 8
 
-        # Indices for each weekday (Mon=0 ... Sun=6)
-        RAHU_INDICES   = [1, 6, 4, 5, 3, 2, 7]
-        YAMA_INDICES   = [4, 3, 2, 1, 0, 6, 5]
-        GULIKA_INDICES = [6, 5, 4, 3, 2, 1, 0]
-
         def _get_range(indices):
             start = sunrise_dt + (octant * indices[weekday_idx])
             end = start + octant
             return f"{PanchangCalculator._format_time(start)} - {PanchangCalculator._format_time(end)}"
 
         return {
-            "rahukala":  _get_range(RAHU_INDICES),
-            "yamaganda": _get_range(YAMA_INDICES),
-            "gulika":    _get_range(GULIKA_INDICES),
+            "rahukala":  _get_range(PanchangCalculator.RAHU_OCTANTS),
+            "yamaganda": _get_range(PanchangCalculator.YAMA_OCTANTS),
+            "gulika":    _get_range(PanchangCalculator.GULIKA_OCTANTS),
         }
 
     # ── Durmuhurtham ─────────────────────────────────────────────────
@@ -247,20 +613,8 @@ class PanchangCalculator:
         day_duration = sunset_dt - sunrise_dt
         muhurta = day_duration / 15  # Each muhurta ≈ 48 minutes
 
-        # Which muhurta indices are Durmuhurtham for each weekday
-        # (Mon=0 ... Sun=6). Source: Standard Panchangam references.
-        DURMUHURTHAM_MAP = {
-            0: [2, 7],     # Monday
-            1: [4, 11],    # Tuesday
-            2: [6, 10],    # Wednesday
-            3: [5, 9],     # Thursday
-            4: [3, 8],     # Friday
-            5: [1, 14],    # Saturday
-            6: [12, 13],   # Sunday
-        }
-
         periods = []
-        for idx in DURMUHURTHAM_MAP.get(weekday_idx, []):
+        for idx in PanchangCalculator.DURMUHURTHAM_MUHURTAS.get(weekday_idx, []):
             start = sunrise_dt + (muhurta * idx)
             end = start + muhurta
             periods.append(f"{PanchangCalculator._format_time(start)} - {PanchangCalculator._format_time(end)}")
@@ -279,7 +633,7 @@ class PanchangCalculator:
         day_duration = sunset_dt - sunrise_dt
         muhurta = day_duration / 15
         # 8th muhurta (0-indexed = 7)
-        start = sunrise_dt + (muhurta * 7)
+        start = sunrise_dt + (muhurta * PanchangCalculator.ABHIJIT_MUHURTA)
         end = start + muhurta
         return f"{PanchangCalculator._format_time(start)} - {PanchangCalculator._format_time(end)}"
 
@@ -295,18 +649,7 @@ class PanchangCalculator:
         day_duration = sunset_dt - sunrise_dt
         muhurta = day_duration / 15
 
-        # Amrit Kalam muhurta indices per weekday (Mon=0..Sun=6)
-        AMRIT_INDICES = {
-            0: 2,   # Monday — 3rd muhurta
-            1: 5,   # Tuesday — 6th muhurta
-            2: 1,   # Wednesday — 2nd muhurta
-            3: 10,  # Thursday — 11th muhurta
-            4: 4,   # Friday — 5th muhurta
-            5: 3,   # Saturday — 4th muhurta
-            6: 6,   # Sunday — 7th muhurta
-        }
-
-        idx = AMRIT_INDICES.get(weekday_idx, 0)
+        idx = PanchangCalculator.AMRIT_MUHURTA.get(weekday_idx, 0)
         start = sunrise_dt + (muhurta * idx)
         end = start + muhurta
         return f"{PanchangCalculator._format_time(start)} - {PanchangCalculator._format_time(end)}"
@@ -318,215 +661,420 @@ class PanchangCalculator:
         Detects if the Sun transitions from one Rashi to another on this date.
         Returns the Sankranti name (e.g., 'Makara Sankranti') or None.
         """
-        obs = self._make_observer(target_date, hour=0, minute=0, second=0)
-        sun_today = ephem.Sun()
-        sun_today.compute(obs)
-        rashi_today = int(self.get_sidereal_lon(ephem.Ecliptic(sun_today).lon) / 30)
-
-        # Check yesterday
-        yesterday = target_date - timedelta(days=1)
-        obs_y = self._make_observer(yesterday, hour=0, minute=0, second=0)
-        sun_y = ephem.Sun()
-        sun_y.compute(obs_y)
-        rashi_yesterday = int(self.get_sidereal_lon(ephem.Ecliptic(sun_y).lon) / 30)
-
-        if rashi_today != rashi_yesterday:
-            s_suffix = "ಸಂಕ್ರಾಂತಿ" if lang == "kn" else "Sankranti"
-            return f"{RASHIS[lang][rashi_today]} {s_suffix}"
+        return self._detect_sankranti(self._parse_date(target_date), lang.lower())
+
+    def _detect_sankranti(self, target_date, lang):
+        """Sankranti check: a bisect lookup in the shared ingress table."""
+        rashi = SANKRANTIS.on_date(target_date, self.ayanamsa)
+        if rashi is not None:
+            return self.sankranti_name(rashi, lang)
         return None
 
+    @staticmethod
+    def sankranti_name(rashi_index, lang):
+        s_suffix = "ಸಂಕ್ರಾಂತಿ" if lang == "kn" else "Sankranti"
+        return f"{RASHIS[lang][rashi_index]} {s_suffix}"
+
+    def sankrantis(self, year, lang="en"):
+        """
+        All Sankrantis observed in Gregorian `year`, in order:
+        [{"date", "name", "rashi_index", "instant_ist"}, ...]. `date` follows the
+        same rule as the daily Panchangam's `sankranti` field.
+        """
+        lang = lang.lower()
+        lo = ephem.Date(f"{year - 1}/12/31")
+        hi = ephem.Date(f"{year}/12/31")
+        return [
+            {
+                "date": (instant.datetime().date() + timedelta(days=1)).isoformat(),
+                "name": self.sankranti_name(rashi, lang),
+                "rashi_index": rashi,
+                "instant_ist": self._utc_to_ist(instant).strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            for instant, rashi in (
+                (ephem.Date(t), r) for t, r in SANKRANTIS.between(lo, hi, self.ayanamsa)
+            )
+        ]
+
+    def next_sankranti(self, after, lang="en"):
+        """
+        The next solar ingress strictly after `after` (date/datetime/str, UTC).
+        Returns {"name", "rashi_index", "instant_ist"}.
+        """
+        when = ephem.Date(self._parse_date(after))
+        instant, rashi = SANKRANTIS.next_after(when, self.ayanamsa)
+        return {
+            "name": self.sankranti_name(rashi, lang.lower()),
+            "rashi_index": rashi,
+            "instant_ist": self._utc_to_ist(instant).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
     # ═══════════════════════════════════════════════════════════════════
     # MAIN CALCULATION
     # ═══════════════════════════════════════════════════════════════════
 
-    def calculate(self, target_date, lang="en"):
+    def calculate(self, target_date, lang="en", fields=None):
         """
         Calculates the full Panchangam for a given date.
 
         Args:
             target_date: str (YYYY-MM-DD or DD-MM-YYYY) or datetime/date object.
             lang: "en" (English) or "kn" (Kannada). Defaults to "en".
+            fields: optional selection, e.g. "attributes" or
+                ["attributes.tithi", "sun_cycle.sunrise"] (see parse_fields).
+                Only the selected sections are returned, and ephemeris work
+                they do not need (moonrise, sunrise, ...) is skipped.
 
         Returns:
-            dict with all Panchangam data.
+            dict with all Panchangam data (or the selected sections + "date").
         """
         lang = lang.lower()  # Normalize: frontend sends 'EN'/'KN', dict keys are 'en'/'kn'
-        # Input Parsing
-        if isinstance(target_date, str):
-            try:
-                dt_input = datetime.strptime(target_date, "%Y-%m-%d")
-            except ValueError:
-                dt_input = datetime.strptime(target_date, "%d-%m-%Y")
-        else:
-            dt_input = target_date
-            if not isinstance(dt_input, datetime):
-                dt_input = datetime.combine(dt_input, datetime.min.time())
+        selection = parse_fields(fields)
+        core = self.compute_core(target_date, groups=groups_for(selection))
+        return self.project(core, lang, selection)
 
-        # ─────────────────────────────────────────────────────────────
-        # 1. Sunrise / Sunset / Moonrise / Kaalas
-        # ─────────────────────────────────────────────────────────────
-        obs = self._make_observer(dt_input, hour=0, minute=0, second=0)
-        sun = ephem.Sun()
-        moon = ephem.Moon()
+    def calculate_range(self, start_date, end_date, lang="en", fields=None):
+        """
+        Calculates the Panchangam for every date from start_date to end_date (inclusive).
 
-        sunrise_str, sunset_str = "-", "-"
-        moonrise_str = "-"
-        kaalas = {"rahukala": "-", "yamaganda": "-", "gulika": "-"}
-        durmuhurtham_list = []
-        rise_ist, set_ist = None, None
+        One observer, one pair of Sun/Moon bodies and the lunation boundaries
+        (new/full moons, Masa) are shared across the whole range, so a month or
+        a year costs a fraction of N independent calculate() calls.
 
-        try:
-            rise_utc = obs.next_rising(sun)
-            set_utc = obs.next_setting(sun)
-            rise_ist = self._utc_to_ist(rise_utc)
-            set_ist = self._utc_to_ist(set_utc)
-            sunrise_str = self._format_time(rise_ist)
-            sunset_str = self._format_time(set_ist)
+        Yields:
+            dict per date, same shape as calculate() (honouring `fields`).
+        """
+        lang = lang.lower()
+        selection = parse_fields(fields)
+        for core in self.compute_core_range(start_date, end_date, groups=groups_for(selection)):
+            yield self.project(core, lang, selection)
 
-            weekday = dt_input.weekday()
-            kaalas = self.calculate_kaalas(rise_ist, set_ist, weekday)
-            durmuhurtham_list = self.calculate_durmuhurtham(rise_ist, set_ist, weekday)
-        except (ephem.AlwaysUpError, ephem.AlwaysDownError):
-            pass
-        except Exception as e:
-            print(f"Error calculating Sun info: {e}")
+    def compute_core(self, target_date, groups=CORE_GROUPS):
+        """
+        Language-neutral PanchangCore for one date (see `project` for the
+        localized dict). Read from the precomputed table when one is loaded
+        for this location, otherwise computed live.
 
-        # Moonrise & Moonset
-        moonset_str = "-"
-        try:
-            m_rise_utc = obs.next_rising(moon)
-            moonrise_str = self._format_time(self._utc_to_ist(m_rise_utc))
-        except (ephem.AlwaysUpError, ephem.AlwaysDownError):
-            pass
-        except Exception:
-            pass
-        try:
-            m_set_utc = obs.next_setting(moon)
-            moonset_str = self._format_time(self._utc_to_ist(m_set_utc))
-        except (ephem.AlwaysUpError, ephem.AlwaysDownError):
-            pass
-        except Exception:
-            pass
+        `groups` limits live computation to a subset of CORE_GROUPS; fields
+        of skipped groups stay None, so only complete cores may be cached.
+        """
+        dt_input = self._parse_date(target_date)
+        store = _CORE_STORES.get(self.location_hash)
+        core = store.get(dt_input.toordinal()) if store is not None else None
+        return core or self._compute_core(dt_input, _RangeContext(self), groups=groups)
+
+    def compute_core_range(self, start_date, end_date, groups=CORE_GROUPS):
+        """
+        Yields a PanchangCore per date from start_date to end_date (inclusive),
+        computing only `groups` for days not in the precomputed table.
+
+        Days missing from the precomputed table are processed in chunks; when
+        a chunk has VECTOR_MIN_DAYS or more of them, the 00:30 UTC Sun / Moon
+        longitudes for all of them come from one backend call.
+        """
+        day = self._parse_date(start_date)
+        last = self._parse_date(end_date)
+        store = _CORE_STORES.get(self.location_hash)
+        ctx = None
+        while day <= last:
+            chunk = []
+            while day <= last and len(chunk) < self.VECTOR_CHUNK_DAYS:
+                chunk.append((day, store.get(day.toordinal()) if store is not None else None))
+                day += timedelta(days=1)
+
+            missing = [d for d, core in chunk if core is None]
+            if groups & {"sun", "moon"}:
+                for year in {d.year for d in missing}:
+                    if sum(1 for d in missing if d.year == year) >= self.RISE_SET_SYNC_DAYS:
+                        RISE_SET.year(self.rise_set_location, year)
+            lons = {}
+            if len(missing) >= self.VECTOR_MIN_DAYS:
+                instants = [float(ephem.Date(d)) + 0.5 / 24 for d in missing]
+                suns, moons = get_backend(self.backend).sidereal_longitudes(instants, self.ayanamsa.offsets(instants))
+                lons = {d: (float(s), float(m)) for d, s, m in zip(missing, suns, moons)}
+
+            for d, core in chunk:
+                if core is None:
+                    ctx = ctx or _RangeContext(self)
+                    core = self._compute_core(d, ctx, lons.get(d), groups)
+                yield core
+
+    def _compute_core(self, dt_input, ctx, lons=None, groups=CORE_GROUPS):
+        """
+        Runs the ephemeris for one day and keeps only indices and instants.
+        `lons` = precomputed (sun, moon) sidereal longitudes at 00:30 UTC;
+        `groups` = optional work to do (see SECTION_GROUPS).
+        """
+        core = PanchangCore()
+        core.ordinal = dt_input.toordinal()
+        core.weekday = dt_input.weekday()
+
+        # ─────────────────────────────────────────────────────────────
+        # 1. Sunrise / Sunset / Moonrise / Moonset
+        # ─────────────────────────────────────────────────────────────
+        obs = ctx.observer_at(dt_input, hour=0, minute=0)
+        sun = ctx.sun
+        moon = ctx.moon
+
+        riseset = None
+        if groups & {"sun", "moon"}:
+            riseset = RISE_SET.get(self.rise_set_location, dt_input)
+            if riseset is None:
+                RISE_SET.build_in_background(self.rise_set_location, [dt_input.year])
+        if riseset is not None:
+            if "sun" in groups:
+                core.sunrise, core.sunset = riseset[0], riseset[1]
+            if "moon" in groups:
+                core.moonrise, core.moonset = riseset[2], riseset[3]
+        else:
+            if "sun" in groups:
+                try:
+                    rise_utc = obs.next_rising(sun)
+                    set_utc = obs.next_setting(sun)
+                    core.sunrise, core.sunset = float(rise_utc), float(set_utc)
+                except (ephem.AlwaysUpError, ephem.NeverUpError):
+                    pass
+                except Exception as e:
+                    print(f"Error calculating Sun info: {e}")
+
+            if "moon" in groups:
+                try:
+                    core.moonrise = float(obs.next_rising(moon))
+                except Exception:
+                    pass
+                try:
+                    core.moonset = float(obs.next_setting(moon))
+                except Exception:
+                    pass
 
         # ─────────────────────────────────────────────────────────────
         # 2. Panchang Calculation (at 6:00 AM IST = 00:30 UTC)
         # ─────────────────────────────────────────────────────────────
-        obs_calc = self._make_observer(dt_input, hour=0, minute=30, second=0)
-        sun.compute(obs_calc)
-        moon.compute(obs_calc)
+        obs_calc = ctx.observer_at(dt_input, hour=0, minute=30)
+        if lons is not None:
+            s_sid_lon, m_sid_lon = lons
+        else:
+            sun.compute(obs_calc)
+            moon.compute(obs_calc)
+            s_sid_lon = self.get_sidereal_lon(ephem.Ecliptic(sun).lon, obs_calc.date)
+            m_sid_lon = self.get_sidereal_lon(ephem.Ecliptic(moon).lon, obs_calc.date)
 
-        s_lon_rad = ephem.Ecliptic(sun).lon
-        m_lon_rad = ephem.Ecliptic(moon).lon
+        # ── Tithi & Karana ──
+        tithi_float = ((m_sid_lon - s_sid_lon) % 360) / 12.0
+        core.tithi = int(tithi_float) % 30
+        core.karana = karana_for_half_tithi(int(tithi_float * 2))
 
-        s_sid_lon = self.get_sidereal_lon(s_lon_rad)
-        m_sid_lon = self.get_sidereal_lon(m_lon_rad)
+        # ── Nakshatra & Yoga ──
+        core.nakshatra = int(m_sid_lon * (27.0 / 360.0)) % 27
+        core.yoga = int(((s_sid_lon + m_sid_lon) % 360) / (360.0 / 27.0)) % 27
 
-        # ── Tithi ──
-        diff = (m_sid_lon - s_sid_lon) % 360
-        tithi_float = diff / 12.0
-        tithi_index = int(tithi_float) % 30
-        paksha = "Shukla" if tithi_index < 15 else "Krishna"
-        tithi_name = TITHIS[lang][tithi_index]
-        paksha_kn = "ಶುಕ್ಲ" if tithi_index < 15 else "ಕೃಷ್ಣ"
+        # ── Masa & Adhika ──
+        masa_index, is_adhika = ctx.masa_at(ephem.Date(obs_calc.date))
+        core.masa = masa_index % 12
+        core.is_adhika = bool(is_adhika)
 
-        # ── Nakshatra ──
-        n_float = m_sid_lon * (27.0 / 360.0)
-        nakshatra_index = int(n_float) % 27
-        nakshatra_name = NAKSHATRAS[lang][nakshatra_index]
-
-        # ── Yoga ──
-        yoga_sum = (s_sid_lon + m_sid_lon) % 360
-        yoga_index = int(yoga_sum / (360.0 / 27.0)) % 27
-        yoga_name = YOGAS[lang][yoga_index]
-
-        # ── Karana ──
-        k_index = int(tithi_float * 2)
-        if k_index == 0:
-            karana_name = KARANAS[lang][10] # Kimstughna
-        elif k_index >= 58:
-            if k_index == 58: karana_name = KARANAS[lang][7] # Shakuni
-            elif k_index == 59: karana_name = KARANAS[lang][8] # Chatushpada
-            elif k_index == 60: karana_name = KARANAS[lang][9] # Naga
-            else: karana_name = KARANAS[lang][(k_index - 1) % 7]
-        else:
-            karana_name = KARANAS[lang][(k_index - 1) % 7]
+        # ── Samvatsara / Ritu / Ayana ──
+        saka_year = dt_input.year - 78
+        if dt_input.month < 4 and core.masa >= 9:
+            saka_year -= 1
+        core.samvatsara = (saka_year + 11) % 60
+        core.ritu = int(core.masa / 2) % 6
+        core.dakshinayana = 90 <= s_sid_lon < 270
 
-        # ── Masa & Adhika ──
-        obs_date_start = ephem.Date(obs_calc.date)
-        prev_nm = ephem.previous_new_moon(obs_date_start)
-        next_nm = ephem.next_new_moon(obs_date_start)
+        # ── Rashis & Sankranti ──
+        core.sun_rashi = int(s_sid_lon / 30) % 12
+        core.moon_rashi = int(m_sid_lon / 30) % 12
+        if "sankranti" in groups:
+            core.sankranti = SANKRANTIS.on_date(dt_input, self.ayanamsa)
 
-        sun_start = ephem.Sun(); sun_start.compute(prev_nm)
-        sun_end = ephem.Sun(); sun_end.compute(next_nm)
+        if "phase" not in groups:
+            return core
 
-        def get_rashi(obj_lon):
-            return int(self.get_sidereal_lon(obj_lon) / 30)
+        # ── Moon Cycle (Illumination at Noon UTC, Next Purnima/Amavasya) ──
+        moon.compute(ctx.observer_at(dt_input, hour=12, minute=0))
+        core.illumination = round(moon.phase, 1)  # 0-100%
 
-        rashi_start = get_rashi(ephem.Ecliptic(sun_start).lon)
-        rashi_end = get_rashi(ephem.Ecliptic(sun_end).lon)
+        ephem_date = ephem.Date(dt_input.strftime("%Y/%m/%d 12:00:00"))
+        core.next_purnima = ctx.next_full_moon(ephem_date).datetime().date().toordinal()
+        core.next_amavasya = ctx.next_new_moon(ephem_date).datetime().date().toordinal()
+        return core
 
-        if rashi_start == rashi_end:
-            is_adhika = True
-            masa_index = rashi_start + 1
-        else:
-            is_adhika = False
-            masa_index = rashi_end
+    # ═══════════════════════════════════════════════════════════════════
+    # PROJECTION (Core record → localized response)
+    # ═══════════════════════════════════════════════════════════════════
 
-        final_masa_index = masa_index % 12
-        masa_name = MASAS[lang][final_masa_index]
+    def project(self, core, lang="en", selection=None):
+        """
+        Renders a PanchangCore as the localized Panchangam dict returned by
+        `calculate`. Pure formatting — no ephemeris work — so any number of
+        languages can be served from one cached core.
 
-        # ── Vedic Attributes ──
+        `selection` (from parse_fields) limits the output to those sections;
+        sections that are not selected are not evaluated.
+        """
+        lang = lang.lower()
+        dt_input = datetime.fromordinal(core.ordinal)
+        weekday = core.weekday
 
-        # Samvatsara
-        greg_year = dt_input.year
-        saka_year = greg_year - 78
-        if dt_input.month < 4 and final_masa_index >= 9:
-            saka_year -= 1
-        samvatsara_index = (saka_year + 11) % 60
-        samvatsara_name = SAMVATSARAS[lang][samvatsara_index]
+        def want(section):
+            return selection is None or section in selection
 
-        # Ritu
-        ritu_index = int(final_masa_index / 2) % 6
-        ritu_name = RITUS[lang][ritu_index]
+        # ── Sun / Moon cycle & Kaalas ──
+        sunrise_str, sunset_str = "-", "-"
+        kaalas = {"rahukala": "-", "yamaganda": "-", "gulika": "-"}
+        durmuhurtham_list = []
+        rise_ist, set_ist = None, None
+        if core.sunrise is not None and core.sunset is not None:
+            rise_ist = self._utc_to_ist(ephem.Date(core.sunrise))
+            set_ist = self._utc_to_ist(ephem.Date(core.sunset))
+            sunrise_str = self._format_time(rise_ist)
+            sunset_str = self._format_time(set_ist)
+            if want("inauspicious"):
+                kaalas = self.calculate_kaalas(rise_ist, set_ist, weekday)
+                durmuhurtham_list = self.calculate_durmuhurtham(rise_ist, set_ist, weekday)
+
+        moonrise_str = "-"
+        if core.moonrise is not None:
+            moonrise_str = self._format_time(self._utc_to_ist(ephem.Date(core.moonrise)))
+        moonset_str = "-"
+        if core.moonset is not None:
+            moonset_str = self._format_time(self._utc_to_ist(ephem.Date(core.moonset)))
 
-        # Ayana
-        if 90 <= s_sid_lon < 270:
+        # ── Pancha-Anga names ──
+        tithi_index = core.tithi
+        paksha = "Shukla" if tithi_index < 15 else "Krishna"
+        paksha_kn = "ಶುಕ್ಲ" if tithi_index < 15 else "ಕೃಷ್ಣ"
+        tithi_name = TITHIS[lang][tithi_index]
+        nakshatra_name = NAKSHATRAS[lang][core.nakshatra]
+        yoga_name = YOGAS[lang][core.yoga]
+        karana_name = KARANAS[lang][core.karana]
+        masa_name = MASAS[lang][core.masa]
+        samvatsara_name = SAMVATSARAS[lang][core.samvatsara]
+        ritu_name = RITUS[lang][core.ritu]
+        if core.dakshinayana:
             ayana_name = "Dakshinayana" if lang == "en" else "ದಕ್ಷಿಣಾಯನ"
         else:
             ayana_name = "Uttarayana" if lang == "en" else "ಉತ್ತರಾಯಣ"
+        vasara_name = VASARAS[lang][weekday]
+        sun_rashi = RASHIS[lang][core.sun_rashi]
+        moon_rashi = RASHIS[lang][core.moon_rashi]
+        sankranti = self.sankranti_name(core.sankranti, lang) if core.sankranti is not None else None
 
-        # Vasara
-        vasara_name = VASARAS[lang][dt_input.weekday()]
+        # ── Moon Cycle (Phase, Illumination, Next Purnima/Amavasya) ──
+        if want("moon_cycle"):
+            moon_cycle = self._project_moon_cycle(core, paksha)
 
-        # Sun Rashi (for frontend display)
-        sun_rashi_index = int(s_sid_lon / 30)
-        sun_rashi = RASHIS[lang][sun_rashi_index % 12]
+        # ── Festival Detection (v2.0 — Rule Engine) ──
+        # Convert 30-tithi index to 15-tithi within paksha for festival matching
+        festivals = []
+        if want("festivals"):
+            tithi_in_paksha = tithi_index if tithi_index < 15 else tithi_index - 15
+            festivals = detect_festivals(
+                masa_index=core.masa,
+                paksha=paksha,
+                tithi_index=tithi_in_paksha,
+                nakshatra_index=core.nakshatra,
+                weekday=weekday,
+                sankranti=sankranti,
+            )
 
-        # Moon Rashi (for frontend display)
-        moon_rashi_index = int(m_sid_lon / 30)
-        moon_rashi = RASHIS[lang][moon_rashi_index % 12]
+        # ── Auspicious Times (Green Zone) ──
+        abhijit_muhurtha = None
+        amrit_kalam = None
+        if rise_ist and set_ist and want("auspicious"):
+            abhijit_muhurtha = self.calculate_abhijit_muhurtha(rise_ist, set_ist)
+            amrit_kalam = self.calculate_amrit_kalam(rise_ist, set_ist, weekday)
 
-        # ── Sankranti ──
-        sankranti = self.detect_sankranti(dt_input, lang)
+        # ── Glossary Entries for Tooltips ──
+        glossary = {}
+        if want("glossary"):
+            # Tithi
+            entry = get_glossary_entry(TITHIS["en"][tithi_index])
+            if entry:
+                glossary["tithi"] = entry
+            # Yoga
+            entry = get_glossary_entry(YOGAS["en"][core.yoga])
+            if entry:
+                glossary["yoga"] = entry
+            # Karana
+            entry = get_glossary_entry(karana_name)
+            if entry:
+                glossary["karana"] = entry
 
-        # ── Moon Cycle (Phase, Illumination, Next Purnima/Amavasya) ──
-        obs_moon = self._make_observer(dt_input, hour=12, minute=0, second=0)  # Noon UTC
-        moon_phase = ephem.Moon()
-        moon_phase.compute(obs_moon)
-        moon_illumination = round(moon_phase.phase, 1)  # 0-100%
+        # ── Sankalpa Mantra ──
+        description = None
+        if want("description"):
+            description = (
+                f"Shubhe Shobhane Muhurthe {SAMVATSARAS['en'][core.samvatsara]} Nama Samvatsare "
+                f"{ayana_name if lang == 'en' else 'Uttarayana/Dakshinayana'} {RITUS['en'][core.ritu]} Ritau "
+                f"{MASAS['en'][core.masa]} Mase {paksha} Pakshe {TITHIS['en'][tithi_index]} Tithau"
+            )
 
-        # Next Full Moon & New Moon
-        ephem_date = ephem.Date(dt_input.strftime("%Y/%m/%d 12:00:00"))
-        next_full = ephem.next_full_moon(ephem_date)
-        next_new = ephem.next_new_moon(ephem_date)
-        prev_full = ephem.previous_full_moon(ephem_date)
-        prev_new = ephem.previous_new_moon(ephem_date)
+        # ═══════════════════════════════════════════════════════════════
+        # RESPONSE
+        # ═══════════════════════════════════════════════════════════════
+        sections = {
+            "sun_cycle": lambda: {
+                "sunrise": sunrise_str,
+                "sunset": sunset_str,
+                "moonrise": moonrise_str,
+                "moonset": moonset_str
+            },
+            "moon_cycle": lambda: moon_cycle,
+            "attributes": lambda: {
+                "samvatsara": samvatsara_name,
+                "ayana": ayana_name,
+                "ritu": ritu_name,
+                "maasa": masa_name,
+                "paksha": paksha if lang == "en" else paksha_kn,
+                "tithi": tithi_name,
+                "nakshatra": nakshatra_name,
+                "yoga": yoga_name,
+                "karana": karana_name,
+                "vasara_sanskrit": vasara_name,
+                "is_adhika": core.is_adhika,
+                "sun_rashi": sun_rashi,
+                "moon_rashi": moon_rashi,
+            },
+            "inauspicious": lambda: {
+                "rahu": kaalas["rahukala"],
+                "yama": kaalas["yamaganda"],
+                "gulika": kaalas["gulika"],
+                "durmuhurtham": durmuhurtham_list,
+            },
+            "auspicious": lambda: {
+                "abhijit_muhurtha": abhijit_muhurtha,
+                "amrit_kalam": amrit_kalam,
+            },
+            "sankranti": lambda: sankranti,
+            "festivals": lambda: festivals,
+            "glossary": lambda: glossary,
+            "description": lambda: description,
+            "meta": lambda: {
+                "ayanamsa_mode": self.ayanamsa_mode,
+                "ayanamsa_value": round(self.ayanamsa_value(dt_input), 6),
+                "location": {"lat": self.lat, "lon": self.lon, "elevation": self.elevation},
+                "calc_version": self.CALC_VERSION,
+            },
+        }
 
-        next_full_dt = ephem.Date(next_full).datetime()
-        next_new_dt = ephem.Date(next_new).datetime()
+        result = {"date": dt_input.strftime("%Y-%m-%d")}
+        for section, build in sections.items():
+            if not want(section):
+                continue
+            value = build()
+            keys = selection.get(section) if selection else None
+            if keys is not None and isinstance(value, dict):
+                value = {k: v for k, v in value.items() if k in keys}
+            result[section] = value
+        return result
 
-        days_to_purnima = (next_full_dt.date() - dt_input.date()).days
-        days_to_amavasya = (next_new_dt.date() - dt_input.date()).days
+    @staticmethod
+    def _project_moon_cycle(core, paksha):
+        """moon_cycle section: phase name, illumination, next Purnima / Amavasya."""
+        tithi_index = core.tithi
+        days_to_purnima = core.next_purnima - core.ordinal
+        days_to_amavasya = core.next_amavasya - core.ordinal
 
         # Determine Moon Phase Name
         if days_to_purnima == 0:
@@ -563,113 +1111,57 @@ class PanchangCalculator:
                 moon_phase_name = "Nearly New"
                 moon_phase_en = "Nearly New"
 
-        moon_cycle = {
+        return {
             "phase": moon_phase_name,
             "phase_en": moon_phase_en,
-            "illumination": moon_illumination,
-            "next_purnima": next_full_dt.strftime("%Y-%m-%d"),
-            "next_amavasya": next_new_dt.strftime("%Y-%m-%d"),
+            "illumination": core.illumination,
+            "next_purnima": date.fromordinal(core.next_purnima).strftime("%Y-%m-%d"),
+            "next_amavasya": date.fromordinal(core.next_amavasya).strftime("%Y-%m-%d"),
             "days_to_purnima": days_to_purnima,
             "days_to_amavasya": days_to_amavasya,
         }
 
-        # ── Festival Detection (v2.0 — Rule Engine) ──
-        # Convert 30-tithi index to 15-tithi within paksha for festival matching
-        tithi_in_paksha = tithi_index if tithi_index < 15 else tithi_index - 15
-        festivals = detect_festivals(
-            masa_index=final_masa_index,
-            paksha=paksha,
-            tithi_index=tithi_in_paksha,
-            nakshatra_index=nakshatra_index,
-            weekday=dt_input.weekday(),
-            sankranti=sankranti,
-        )
 
-        # ── Auspicious Times (Green Zone) ──
-        abhijit_muhurtha = None
-        amrit_kalam = None
-        if rise_ist and set_ist:
-            abhijit_muhurtha = self.calculate_abhijit_muhurtha(rise_ist, set_ist)
-            amrit_kalam = self.calculate_amrit_kalam(rise_ist, set_ist, dt_input.weekday())
+# ═══════════════════════════════════════════════════════════════════════
+# RANGE CONTEXT — State shared across consecutive days
+# ═══════════════════════════════════════════════════════════════════════
 
-        # ── Glossary Entries for Tooltips ──
-        glossary = {}
-        # Tithi
-        tithi_en_name = TITHIS["en"][tithi_index]
-        entry = get_glossary_entry(tithi_en_name)
-        if entry:
-            glossary["tithi"] = entry
-        # Yoga
-        yoga_en_name = YOGAS["en"][yoga_index]
-        entry = get_glossary_entry(yoga_en_name)
-        if entry:
-            glossary["yoga"] = entry
-        # Karana
-        entry = get_glossary_entry(karana_name)
-        if entry:
-            glossary["karana"] = entry
+class _RangeContext:
+    """
+    Ephemeris state reused while walking a date range.
 
-        # ── Sankalpa Mantra ──
-        tithi_en = TITHIS["en"][tithi_index]
-        masa_en = MASAS["en"][final_masa_index]
-        nakshatra_en = NAKSHATRAS["en"][nakshatra_index]
-        paksha_en = paksha
-        samvatsara_en = SAMVATSARAS["en"][samvatsara_index]
-        
-        description = (
-            f"Shubhe Shobhane Muhurthe {samvatsara_en} Nama Samvatsare "
-            f"{ayana_name if lang == 'en' else 'Uttarayana/Dakshinayana'} {RITUS['en'][ritu_index]} Ritau "
-            f"{masa_en} Mase {paksha_en} Pakshe {tithi_en} Tithau"
-        )
+    Holds a single Observer and Sun/Moon bodies. New/full moons and the
+    masa come from the shared LunationTable, so consecutive days only pay
+    for the point evaluations.
+    """
 
-        # ═══════════════════════════════════════════════════════════════
-        # RESPONSE
-        # ═══════════════════════════════════════════════════════════════
-        return {
-            "date": dt_input.strftime("%Y-%m-%d"),
-            "sun_cycle": {
-                "sunrise": sunrise_str,
-                "sunset": sunset_str,
-                "moonrise": moonrise_str,
-                "moonset": moonset_str
-            },
-            "moon_cycle": moon_cycle,
-            "attributes": {
-                "samvatsara": samvatsara_name,
-                "ayana": ayana_name,
-                "ritu": ritu_name,
-                "maasa": masa_name,
-                "paksha": paksha if lang == "en" else paksha_kn,
-                "tithi": tithi_name,
-                "nakshatra": nakshatra_name,
-                "yoga": yoga_name,
-                "karana": karana_name,
-                "vasara_sanskrit": vasara_name,
-                "is_adhika": is_adhika,
-                "sun_rashi": sun_rashi,
-                "moon_rashi": moon_rashi,
-            },
-            "inauspicious": {
-                "rahu": kaalas["rahukala"],
-                "yama": kaalas["yamaganda"],
-                "gulika": kaalas["gulika"],
-                "durmuhurtham": durmuhurtham_list,
-            },
-            "auspicious": {
-                "abhijit_muhurtha": abhijit_muhurtha,
-                "amrit_kalam": amrit_kalam,
-            },
-            "sankranti": sankranti,
-            "festivals": festivals,
-            "glossary": glossary,
-            "description": description,
-            "meta": {
-                "ayanamsa_mode": self.ayanamsa_mode,
-                "ayanamsa_value": self.ayanamsa_value,
-                "location": {"lat": self.lat, "lon": self.lon, "elevation": self.elevation},
-                "calc_version": self.CALC_VERSION,
-            }
-        }
+    def __init__(self, calculator):
+        self.calc = calculator
+        self.obs = ephem.Observer()
+        self.obs.lat = calculator.lat
+        self.obs.lon = calculator.lon
+        self.obs.elevation = calculator.elevation
+        self.sun = ephem.Sun()
+        self.moon = ephem.Moon()
+
+        self._lunation = None        # (prev_nm, next_nm, masa_index, is_adhika)
+
+    def observer_at(self, dt, hour=0, minute=0):
+        """Moves the shared observer to `dt` at hour:minute UTC and returns it."""
+        self.obs.date = dt.replace(hour=hour, minute=minute, second=0).strftime("%Y/%m/%d %H:%M:%S")
+        return self.obs
+
+    def masa_at(self, when):
+        """Returns (masa_index, is_adhika) for the lunation containing `when`."""
+        if self._lunation is None or not (self._lunation[0] <= when < self._lunation[1]):
+            self._lunation = LUNATIONS.lunation_at(when, self.calc.ayanamsa)
+        return self._lunation[2], self._lunation[3]
+
+    def next_full_moon(self, when):
+        return LUNATIONS.next_full_moon(when)
+
+    def next_new_moon(self, when):
+        return LUNATIONS.next_new_moon(when)
 
 
 # ═══════════════════════════════════════════════════════════════════════
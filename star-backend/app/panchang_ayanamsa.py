@@ -0,0 +1,138 @@
+"""
+S.T.A.R. Ayanamsa
+==================
+Ayanamsa as a function of time for each supported mode, tabulated per day.
+
+Every Sun / Moon longitude in the calculator (ephem.Ecliptic, the vector
+backend, the lunation and Sankranti tables) is referred to the fixed J2000
+ecliptic and equinox, not the equinox of date. The sidereal longitude is
+
+    sidereal = lon_of_date - ayanamsa(t),   lon_of_date = lon_J2000 + p_A(t)
+
+where p_A is the general precession in longitude since J2000, so the amount
+subtracted from the J2000 longitudes is
+
+    offset(t) = ayanamsa(t) - p_A(t)
+
+Both ayanamsa(t) (reported in the Panchangam metadata) and offset(t) are
+evaluated once per day on a grid of ephem day numbers and interpolated
+linearly, so a lookup costs the same as the old per-mode constant.
+"""
+
+import math
+import threading
+
+import ephem
+
+# ═══════════════════════════════════════════════════════════════════════
+# MODELS
+# ═══════════════════════════════════════════════════════════════════════
+
+# mode -> (reference epoch, ayanamsa at the epoch in degrees, rate).
+# rate None: the sidereal zodiac is fixed to the stars and the ayanamsa
+# grows with the IAU 2006 general precession; otherwise a constant rate in
+# arcseconds per Julian year, as the system itself defines it.
+AYANAMSA_MODELS = {
+    # Chitrapaksha, Indian Calendar Reform Committee: 23°15'00.658" on
+    # 1956-03-21 (less the ICRS correction of 16.77")
+    "lahiri": ("1956/3/21", 23.245524743, None),
+    # B.V. Raman: zero in 397 CE, 50 1/3" per year (21°00'52" at J1900)
+    "raman": ("1899/12/31 12:00", 21.01444, 50.3333),
+    # Krishnamurti Paddhati: 22°21'50" at J1900, 50.2388475" per year
+    "kp": ("1899/12/31 12:00", 22.363889, 50.2388475),
+}
+
+DEFAULT_MODE = "lahiri"
+
+# ephem day number of J2000.0 (2000-01-01 12:00)
+J2000 = 36525.0
+
+# Days per lookup block (the grid itself is one value per day)
+BLOCK_DAYS = 512
+
+
+def general_precession(when):
+    """IAU 2006 general precession in longitude p_A (degrees) from J2000 to `when`."""
+    t = (float(when) - J2000) / 36525.0
+    arcsec = t * (5028.796195 + t * (1.1054348 + t * (0.00007964 + t * (-0.000023857 + t * -0.0000000383))))
+    return arcsec / 3600.0
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# PER-DAY TABLE
+# ═══════════════════════════════════════════════════════════════════════
+
+class Ayanamsa:
+    """
+    One ayanamsa mode, with lazily-built blocks of daily values.
+    Use `get_ayanamsa(mode)` so every calculator shares the same tables.
+    """
+
+    def __init__(self, mode=DEFAULT_MODE):
+        mode = (mode or DEFAULT_MODE).lower()
+        self.mode = mode if mode in AYANAMSA_MODELS else DEFAULT_MODE
+        epoch, self._value0, self._rate = AYANAMSA_MODELS[self.mode]
+        self._epoch = float(ephem.Date(epoch))
+        self._blocks = {}          # block index -> (values, offsets), BLOCK_DAYS + 1 points each
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<Ayanamsa({self.mode})>"
+
+    def exact(self, when):
+        """Ayanamsa of date (degrees) at `when`, evaluated from the model."""
+        when = float(when)
+        if self._rate is None:
+            return self._value0 + general_precession(when) - general_precession(self._epoch)
+        return self._value0 + self._rate * (when - self._epoch) / 365.25 / 3600.0
+
+    def _block(self, index):
+        block = self._blocks.get(index)
+        if block is None:
+            with self._lock:
+                block = self._blocks.get(index)
+                if block is None:
+                    first = index * BLOCK_DAYS
+                    values = [self.exact(first + i) for i in range(BLOCK_DAYS + 1)]
+                    offsets = [v - general_precession(first + i) for i, v in enumerate(values)]
+                    block = self._blocks[index] = (values, offsets)
+        return block
+
+    def _lookup(self, when, column):
+        when = float(when)
+        day = math.floor(when)
+        index, i = divmod(day, BLOCK_DAYS)
+        points = self._block(index)[column]
+        return points[i] + (when - day) * (points[i + 1] - points[i])
+
+    def value(self, when):
+        """Ayanamsa of date (degrees) at ephem date `when`, from the daily table."""
+        return self._lookup(when, 0)
+
+    def offset(self, when):
+        """Degrees to subtract from a J2000 ecliptic longitude at `when`."""
+        return self._lookup(when, 1)
+
+    def offsets(self, instants):
+        """offset() for each instant (list, same order)."""
+        return [self._lookup(t, 1) for t in instants]
+
+    def sidereal(self, lon_deg, when):
+        """Sidereal longitude (degrees) of a J2000 ecliptic longitude at `when`."""
+        return (lon_deg - self._lookup(when, 1)) % 360
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_ayanamsa(mode=None) -> Ayanamsa:
+    """Shared Ayanamsa for `mode` (unknown modes fall back to Lahiri)."""
+    key = (mode or DEFAULT_MODE).lower()
+    if key not in AYANAMSA_MODELS:
+        key = DEFAULT_MODE
+    instance = _instances.get(key)
+    if instance is None:
+        with _instances_lock:
+            instance = _instances.setdefault(key, Ayanamsa(key))
+    return instance
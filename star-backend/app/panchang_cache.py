@@ -0,0 +1,226 @@
+"""
+S.T.A.R. Backend - Panchang Cache
+==================================
+The one read path for daily PanchangCore records:
+
+  1. In-process LRU (per worker)
+  2. `daily_panchang` table (shared by workers, survives restarts)
+  3. compute_core (precomputed table or live ephemeris), written back to both
+
+Keys are (date, location_hash, ayanamsa mode, ayanamsa value of the day,
+CALC_VERSION, panchang_cache_version). Changing the temple location
+(lat, lon or elevation) / ayanamsa, upgrading the calculator or bumping the "clear cache" setting
+therefore never serves a stale record.
+
+Concurrent misses for the same key are coalesced: the first request
+computes, the others wait for its result (single-flight), so a burst of
+/daily-sankalpa calls runs the ephemeris once and inserts one row.
+"""
+
+import threading
+from concurrent.futures import Future
+from datetime import date, timedelta
+
+from cachetools import LRUCache
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .crud import get_panchang_calculator
+from .models import DailyPanchang, SystemSetting
+from .panchang import PanchangCalculator, PanchangCore
+
+# Records kept in memory per worker (~5 years of days for one location)
+LRU_MAXSIZE = 2048
+
+
+def panchang_cache_version(db: Session) -> int:
+    """The admin "clear Panchang cache" counter (SystemSetting panchang_cache_version)."""
+    setting = db.query(SystemSetting).filter_by(key="panchang_cache_version").first()
+    try:
+        return int(setting.value) if setting else 1
+    except (TypeError, ValueError):
+        return 1
+
+
+class PanchangCache:
+    """LRU + DailyPanchang table in front of PanchangCalculator.compute_core."""
+
+    def __init__(self, maxsize=LRU_MAXSIZE):
+        self._lru = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._inflight = {}        # key -> Future of the computation in progress
+        self.stats = {"memory": 0, "db": 0, "computed": 0, "coalesced": 0}
+
+    @staticmethod
+    def _key(pc: PanchangCalculator, day: date, cache_version: int):
+        return (day, pc.location_hash, pc.ayanamsa_mode, round(pc.ayanamsa_value(day), 7),
+                pc.CALC_VERSION, cache_version)
+
+    def _remember(self, key, core):
+        with self._lock:
+            self._lru[key] = core
+
+    def clear(self):
+        """Drops the in-memory tier (the table is invalidated by version instead)."""
+        with self._lock:
+            self._lru.clear()
+
+    # ── Single day ───────────────────────────────────────────────────
+
+    def get(self, pc: PanchangCalculator, target_date, cache_version: int = 1) -> PanchangCore:
+        """PanchangCore for one date; at most one computation per key at a time."""
+        day = PanchangCalculator._parse_date(target_date).date()
+        key = self._key(pc, day, cache_version)
+
+        with self._lock:
+            core = self._lru.get(key)
+            if core is not None:
+                self.stats["memory"] += 1
+                return core
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return flight.result()
+
+        try:
+            core = self._load_or_compute(pc, day, cache_version)
+            self._remember(key, core)
+            flight.set_result(core)
+            return core
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _load_or_compute(self, pc, day, cache_version):
+        from .database import SessionLocal
+        db = SessionLocal()
+        try:
+            row = db.get(DailyPanchang, (day, pc.location_hash, pc.CALC_VERSION))
+            if row is not None and row.version == cache_version:
+                try:
+                    core = PanchangCore.from_json(row.data_json)
+                    self.stats["db"] += 1
+                    return core
+                except ValueError:
+                    pass  # Older record format → recompute
+
+            core = pc.compute_core(day)
+            self.stats["computed"] += 1
+            try:
+                if row is None:
+                    db.add(DailyPanchang(
+                        date=day, location_hash=pc.location_hash, calc_version=pc.CALC_VERSION,
+                        data_json=core.to_json(), version=cache_version,
+                    ))
+                else:
+                    row.data_json = core.to_json()
+                    row.version = cache_version
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # Another worker inserted the same row first
+            except Exception as e:
+                db.rollback()
+                print(f"[WARN] Panchang cache write failed: {e}")
+            return core
+        finally:
+            db.close()
+
+    # ── Ranges ───────────────────────────────────────────────────────
+
+    def get_range(self, pc: PanchangCalculator, start_date, end_date, cache_version: int = 1) -> list:
+        """
+        PanchangCore for every date from start_date to end_date (inclusive).
+        Memory hits first, then one table query, then one compute_core_range
+        pass over the remaining days, written back in a single commit.
+        """
+        first = PanchangCalculator._parse_date(start_date).date()
+        last = PanchangCalculator._parse_date(end_date).date()
+        days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+        found = {}
+        with self._lock:
+            for day in days:
+                core = self._lru.get(self._key(pc, day, cache_version))
+                if core is not None:
+                    found[day] = core
+            self.stats["memory"] += len(found)
+        missing = [d for d in days if d not in found]
+        if not missing:
+            return [found[d] for d in days]
+
+        from .database import SessionLocal
+        db = SessionLocal()
+        try:
+            rows = {
+                row.date: row for row in db.query(DailyPanchang).filter(
+                    DailyPanchang.location_hash == pc.location_hash,
+                    DailyPanchang.calc_version == pc.CALC_VERSION,
+                    DailyPanchang.date >= missing[0],
+                    DailyPanchang.date <= missing[-1],
+                )
+            }
+            to_compute = []
+            for day in missing:
+                row = rows.get(day)
+                if row is not None and row.version == cache_version:
+                    try:
+                        found[day] = PanchangCore.from_json(row.data_json)
+                        self.stats["db"] += 1
+                        continue
+                    except ValueError:
+                        pass
+                to_compute.append(day)
+
+            if to_compute:
+                wanted = set(to_compute)
+                for core in pc.compute_core_range(to_compute[0], to_compute[-1]):
+                    day = core.date
+                    if day not in wanted:
+                        continue
+                    found[day] = core
+                    row = rows.get(day)
+                    if row is None:
+                        db.add(DailyPanchang(
+                            date=day, location_hash=pc.location_hash, calc_version=pc.CALC_VERSION,
+                            data_json=core.to_json(), version=cache_version,
+                        ))
+                    else:
+                        row.data_json = core.to_json()
+                        row.version = cache_version
+                self.stats["computed"] += len(to_compute)
+                try:
+                    db.commit()
+                except Exception as e:
+                    db.rollback()  # Rows are optional; a concurrent writer may have won
+                    print(f"[WARN] Panchang cache range write skipped: {e}")
+        finally:
+            db.close()
+
+        with self._lock:
+            for day in missing:
+                self._lru[self._key(pc, day, cache_version)] = found[day]
+        return [found[d] for d in days]
+
+
+# Process-wide cache shared by every endpoint and job
+PANCHANG_CACHE = PanchangCache()
+
+
+def get_panchang_core(db: Session, target_date, pc: PanchangCalculator = None) -> PanchangCore:
+    """Cached PanchangCore for `target_date` at the temple's configured location."""
+    pc = pc or get_panchang_calculator(db)
+    return PANCHANG_CACHE.get(pc, target_date, panchang_cache_version(db))
+
+
+def get_panchang_cores(db: Session, start_date, end_date, pc: PanchangCalculator = None) -> list:
+    """Cached PanchangCore for each date in the range (inclusive)."""
+    pc = pc or get_panchang_calculator(db)
+    return PANCHANG_CACHE.get_range(pc, start_date, end_date, panchang_cache_version(db))
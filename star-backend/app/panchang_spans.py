@@ -0,0 +1,298 @@
+"""
+S.T.A.R. Panchangam Spans
+==========================
+Exact start / end instants of every Tithi, Nakshatra, Yoga and Karana
+over a date range.
+
+`PanchangCalculator.calculate` samples the Pancha-Anga at one instant per
+day, which hides kshaya (skipped) and vriddhi (repeated) tithis. Here the
+Sun / Moon sidereal longitudes are sampled on a coarse grid, every change of
+index between two samples is bracketed, and the boundary crossing is solved
+with regula falsi (Illinois variant). One pass over a year yields all
+transitions.
+"""
+
+import threading
+from concurrent.futures import Future
+
+import ephem
+from datetime import timedelta, timezone
+
+from app.panchang import (
+    PanchangCalculator, TITHIS, NAKSHATRAS, YOGAS, KARANAS, karana_for_half_tithi,
+)
+from app.panchang_vector import get_backend
+
+# ═══════════════════════════════════════════════════════════════════════
+# CONSTANTS
+# ═══════════════════════════════════════════════════════════════════════
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Grid step for bracketing. The shortest span (a karana, ~6° of Moon-Sun
+# elongation) lasts about 10 hours, so 3 hours never skips a transition.
+SAMPLE_STEP_DAYS = 3 / 24.0
+
+# Root-finding tolerance (1 second, in days)
+TOLERANCE_DAYS = 1 / 86400.0
+
+# element → (angle(sun, moon) in degrees, segment width in degrees, segment count)
+ELEMENTS = {
+    "tithi":     (lambda s, m: (m - s) % 360, 12.0, 30),
+    "nakshatra": (lambda s, m: m % 360, 360.0 / 27, 27),
+    "yoga":      (lambda s, m: (s + m) % 360, 360.0 / 27, 27),
+    "karana":    (lambda s, m: (m - s) % 360, 6.0, 60),
+}
+
+
+def _span_name(element, index, lang):
+    """Display name for a segment index of the given element."""
+    if element == "tithi":
+        return TITHIS[lang][index]
+    if element == "nakshatra":
+        return NAKSHATRAS[lang][index]
+    if element == "yoga":
+        return YOGAS[lang][index]
+    return KARANAS[lang][karana_for_half_tithi(index)]
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# LONGITUDE CACHE
+# ═══════════════════════════════════════════════════════════════════════
+
+class _LongitudeCache:
+    """
+    Memoized sidereal Sun / Moon longitudes at the calculator's location.
+    Computed the same way as `PanchangCalculator.calculate`, so a span's
+    index at 00:30 UTC always agrees with the daily Panchangam.
+    """
+
+    def __init__(self, calculator):
+        self.calc = calculator
+        self.obs = ephem.Observer()
+        self.obs.lat = calculator.lat
+        self.obs.lon = calculator.lon
+        self.obs.elevation = calculator.elevation
+        self.sun = ephem.Sun()
+        self.moon = ephem.Moon()
+        self._memo = {}
+
+    def at(self, when):
+        """(sun_sidereal_deg, moon_sidereal_deg) at ephem date `when` (float days)."""
+        key = round(when, 7)
+        if key not in self._memo:
+            self.obs.date = ephem.Date(when)
+            self.sun.compute(self.obs)
+            self.moon.compute(self.obs)
+            self._memo[key] = (
+                self.calc.get_sidereal_lon(ephem.Ecliptic(self.sun).lon, when),
+                self.calc.get_sidereal_lon(ephem.Ecliptic(self.moon).lon, when),
+            )
+        return self._memo[key]
+
+    def prefill(self, instants):
+        """
+        Fills the memo for a whole grid in one backend call. Values near an
+        index boundary are exact (see panchang_vector), so the grid brackets
+        the same transitions; the solver still refines with ephem.
+        """
+        suns, moons = get_backend(self.calc.backend).sidereal_longitudes(instants, self.calc.ayanamsa.offsets(instants))
+        for when, s, m in zip(instants, suns, moons):
+            self._memo[round(when, 7)] = (float(s), float(m))
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# SOLVER
+# ═══════════════════════════════════════════════════════════════════════
+
+def _solve_crossing(cache, angle_fn, boundary, lo, hi):
+    """
+    Instant in [lo, hi] where angle_fn crosses `boundary` (degrees), by
+    Illinois regula falsi on the wrapped offset (negative before, positive after).
+    """
+    def offset(t):
+        s, m = cache.at(t)
+        return (angle_fn(s, m) - boundary + 180.0) % 360.0 - 180.0
+
+    f_lo, f_hi = offset(lo), offset(hi)
+    side = 0
+    while hi - lo > TOLERANCE_DAYS:
+        mid = hi - f_hi * (hi - lo) / (f_hi - f_lo) if f_hi != f_lo else (lo + hi) / 2
+        f_mid = offset(mid)
+        if f_mid > 0:
+            hi, f_hi = mid, f_mid
+            if side == 1:
+                f_lo /= 2
+            side = 1
+        else:
+            lo, f_lo = mid, f_mid
+            if side == -1:
+                f_hi /= 2
+            side = -1
+        if abs(f_mid) < 1e-7:
+            return mid
+    return (lo + hi) / 2
+
+
+def _to_ist(when):
+    """ephem date → timezone-aware IST datetime (second precision)."""
+    dt = ephem.Date(when).datetime().replace(tzinfo=timezone.utc).astimezone(IST)
+    return dt.replace(microsecond=0)
+
+
+def _transitions(cache, grid, element):
+    """[(instant, new_index), ...] for every change of `element` between grid samples."""
+    angle_fn, width, count = ELEMENTS[element]
+
+    def index_at(when):
+        s, m = cache.at(when)
+        return int(angle_fn(s, m) / width) % count
+
+    transitions = []
+    prev_t, prev_idx = grid[0], index_at(grid[0])
+    for t in grid[1:]:
+        idx = index_at(t)
+        if idx != prev_idx:
+            instant = _solve_crossing(cache, angle_fn, (idx * width) % 360, prev_t, t)
+            transitions.append((instant, idx))
+        prev_t, prev_idx = t, idx
+    return transitions
+
+
+def _grid(cache, lo, hi):
+    """Sample instants from lo - 2 days to hi + 2 days (closes the spans at each end)."""
+    grid = []
+    t = lo - 2.0
+    while t <= hi + 2.0:
+        grid.append(t)
+        t += SAMPLE_STEP_DAYS
+    cache.prefill(grid)
+    return grid
+
+
+def compute_spans(calculator: PanchangCalculator, start_date, end_date, elements=None, lang="en"):
+    """
+    Spans of each element overlapping the IST days `start_date`..`end_date`.
+
+    Returns {element: [{"index", "name", "start", "end"}, ...]} with start/end
+    as IST ISO-8601 strings. The first and last span of each element extend
+    beyond the range to their true boundaries.
+    """
+    start_dt = PanchangCalculator._parse_date(start_date)
+    end_dt = PanchangCalculator._parse_date(end_date)
+    elements = list(elements or ELEMENTS)
+    lang = lang.lower()
+
+    # Range in ephem days: 00:00 IST of start → 24:00 IST of end
+    ist_offset = 5.5 / 24.0
+    range_lo = float(ephem.Date(start_dt)) - ist_offset
+    range_hi = float(ephem.Date(end_dt + timedelta(days=1))) - ist_offset
+
+    cache = _LongitudeCache(calculator)
+    grid = _grid(cache, range_lo, range_hi)
+
+    result = {}
+    for element in elements:
+        transitions = _transitions(cache, grid, element)
+        spans = []
+        for (begin, idx), (finish, _next) in zip(transitions, transitions[1:]):
+            if finish <= range_lo or begin >= range_hi:
+                continue
+            spans.append({
+                "index": idx,
+                "name": _span_name(element, idx, lang),
+                "start": _to_ist(begin).isoformat(),
+                "end": _to_ist(finish).isoformat(),
+            })
+        result[element] = spans
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# YEARLY SPAN TABLES
+# ═══════════════════════════════════════════════════════════════════════
+
+# (location_hash, CALC_VERSION, year) -> {element: [(start, end, index), ...]}
+_SPAN_TABLES = {}
+_SPAN_TABLES_MAX = 16
+_span_tables_lock = threading.Lock()
+_span_inflight = {}        # key -> Future of the build in progress
+
+
+def span_table(calculator: PanchangCalculator, year: int):
+    """
+    Raw spans of every element for one Gregorian (UTC) year, as sorted
+    (start, end, index) tuples in ephem days. Spans are kept when they
+    begin inside the year, so consecutive years tile without overlap.
+    Computed once per location + year and kept in memory; concurrent
+    misses for the same year wait for the first build.
+    """
+    key = (calculator.location_hash, calculator.CALC_VERSION, year)
+    with _span_tables_lock:
+        table = _SPAN_TABLES.get(key)
+        if table is not None:
+            return table
+        flight = _span_inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _span_inflight[key] = Future()
+
+    if not leader:
+        return flight.result()
+
+    try:
+        table = _build_span_table(calculator, year)
+        with _span_tables_lock:
+            if len(_SPAN_TABLES) >= _SPAN_TABLES_MAX:
+                _SPAN_TABLES.pop(next(iter(_SPAN_TABLES)), None)
+            _SPAN_TABLES[key] = table
+        flight.set_result(table)
+        return table
+    except Exception as e:
+        flight.set_exception(e)
+        raise
+    finally:
+        with _span_tables_lock:
+            _span_inflight.pop(key, None)
+
+
+def _build_span_table(calculator: PanchangCalculator, year: int):
+    year_lo = float(ephem.Date(f"{year}/1/1"))
+    year_hi = float(ephem.Date(f"{year + 1}/1/1"))
+    cache = _LongitudeCache(calculator)
+    grid = _grid(cache, year_lo, year_hi)
+
+    table = {}
+    for element in ELEMENTS:
+        transitions = _transitions(cache, grid, element)
+        table[element] = [
+            (begin, finish, idx)
+            for (begin, idx), (finish, _next) in zip(transitions, transitions[1:])
+            if year_lo <= begin < year_hi
+        ]
+    return table
+
+
+def warm_span_tables(calculator: PanchangCalculator, years):
+    """Builds the span tables for `years` in a background thread."""
+    def _run():
+        for year in years:
+            try:
+                span_table(calculator, year)
+            except Exception as e:
+                print(f"[BG] Span table {year} failed: {e}")
+
+    threading.Thread(target=_run, daemon=True).start()
+
+
+def spans_between(calculator: PanchangCalculator, element: str, lo: float, hi: float):
+    """(start, end, index) spans of `element` overlapping [lo, hi) (ephem days), in order."""
+    first_year = ephem.Date(lo).triple()[0] - 1   # The span straddling `lo` began in an earlier table
+    last_year = ephem.Date(hi).triple()[0]
+    result = []
+    for year in range(first_year, last_year + 1):
+        result.extend(
+            span for span in span_table(calculator, year)[element]
+            if span[1] > lo and span[0] < hi
+        )
+    return result
@@ -0,0 +1,223 @@
+"""
+S.T.A.R. Panchangam Store
+==========================
+Precomputed multi-year Panchangam for one location, memory-mapped at startup.
+
+`build_panchang_table` computes the language-neutral PanchangCore for every
+day of a span of years, fanning the years out over a ProcessPoolExecutor,
+and writes them as one NumPy structured array (`.npy`, fixed-width rows,
+one per day). `load_panchang_store` memory-maps that file read-only and
+registers it with the calculator, so `compute_core` — and everything built
+on it (calculate, /daily-sankalpa, Shaswata scheduling) — reads the row
+instead of running the ephemeris. Dates outside the file fall back to live
+computation.
+
+The mapping is zero-copy at the file level: pages are read on demand and
+nothing is loaded up front. A lookup is not a zero-copy view, though —
+`PanchangStore.get` decodes its one row into a PanchangCore on purpose,
+because every consumer (project, the cache tiers, Shaswata scheduling)
+works on PanchangCore objects; decoding a row costs microseconds against
+milliseconds of ephemeris.
+
+Files are named after the location hash and CALC_VERSION, so a location,
+ayanamsa or algorithm change simply stops matching the old file.
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from .panchang import PanchangCalculator, PanchangCore, register_core_store
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# RECORD LAYOUT
+# ═══════════════════════════════════════════════════════════════════════
+
+# One row per day. Instants are ephem day numbers (NaN = no rise/set);
+# sankranti 255 = none. Field names match PanchangCore slots.
+CORE_FIELDS = [
+    ("ordinal", "<i4"), ("weekday", "u1"),
+    ("sunrise", "<f8"), ("sunset", "<f8"), ("moonrise", "<f8"), ("moonset", "<f8"),
+    ("tithi", "u1"), ("karana", "u1"), ("nakshatra", "u1"), ("yoga", "u1"),
+    ("masa", "u1"), ("is_adhika", "?"), ("samvatsara", "u1"), ("ritu", "u1"),
+    ("dakshinayana", "?"), ("sun_rashi", "u1"), ("moon_rashi", "u1"), ("sankranti", "u1"),
+    ("illumination", "<f8"), ("next_purnima", "<i4"), ("next_amavasya", "<i4"),
+]
+CORE_DTYPE = np.dtype(CORE_FIELDS) if HAS_NUMPY else None
+
+_INSTANTS = ("sunrise", "sunset", "moonrise", "moonset")
+
+
+def get_store_dir():
+    """star-backend/data/panchang (created on demand)."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    store_dir = os.path.join(backend_dir, "data", "panchang")
+    os.makedirs(store_dir, exist_ok=True)
+    return store_dir
+
+
+def store_path(calculator: PanchangCalculator, store_dir=None):
+    """File holding the precomputed table for this calculator's location + CALC_VERSION."""
+    name = f"panchang_{calculator.location_hash}_v{calculator.CALC_VERSION}.npy"
+    return os.path.join(store_dir or get_store_dir(), name)
+
+
+def _core_to_row(core):
+    row = []
+    for name, _ in CORE_FIELDS:
+        value = getattr(core, name)
+        if value is None:
+            value = math.nan if name in _INSTANTS else 255
+        row.append(value)
+    return tuple(row)
+
+
+_FIELD_NAMES = [name for name, _ in CORE_FIELDS]
+
+
+def _row_to_core(row):
+    fields = dict(zip(_FIELD_NAMES, row.tolist()))
+    for name in _INSTANTS:
+        if math.isnan(fields[name]):
+            fields[name] = None
+    if fields["sankranti"] == 255:
+        fields["sankranti"] = None
+    return PanchangCore(**fields)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# BUILD
+# ═══════════════════════════════════════════════════════════════════════
+
+def _compute_year(args):
+    """Worker: one year of cores as a structured array (runs in a child process)."""
+    lat, lon, elevation, ayanamsa, year = args
+    pc = PanchangCalculator(lat=lat, lon=lon, elevation=elevation, ayanamsa=ayanamsa)
+    register_core_store(pc.location_hash, None)  # A forked child may inherit the old table
+    rows = [_core_to_row(core) for core in pc.compute_core_range(date(year, 1, 1), date(year, 12, 31))]
+    return year, np.array(rows, dtype=CORE_DTYPE)
+
+
+def build_panchang_table(calculator: PanchangCalculator, start_year: int, end_year: int,
+                         workers: int = None, path: str = None, progress=None) -> str:
+    """
+    Computes every day from start_year-01-01 to end_year-12-31 and writes the
+    table atomically to `path` (default: store_path). Returns the path.
+    `progress(year, done, total)` is called as each year finishes.
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("numpy is required to build the Panchang table")
+    if end_year < start_year:
+        raise ValueError("end_year must be >= start_year")
+
+    path = path or store_path(calculator)
+    years = list(range(start_year, end_year + 1))
+    jobs = [(calculator.lat, calculator.lon, calculator.elevation, calculator.ayanamsa_mode, y) for y in years]
+
+    chunks = {}
+    # "spawn": forking a threaded server process can deadlock the children
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for year, chunk in pool.map(_compute_year, jobs):
+            chunks[year] = chunk
+            if progress:
+                progress(year, len(chunks), len(years))
+
+    table = np.concatenate([chunks[y] for y in years])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, table)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# READ (memory-mapped)
+# ═══════════════════════════════════════════════════════════════════════
+
+class PanchangStore:
+    """Read-only, memory-mapped view of a built table; rows are contiguous days."""
+
+    def __init__(self, path):
+        self.path = path
+        self.table = np.load(path, mmap_mode="r")
+        self.first_ordinal = int(self.table["ordinal"][0]) if len(self.table) else 0
+        self.last_ordinal = self.first_ordinal + len(self.table) - 1
+
+    def get(self, ordinal):
+        """
+        PanchangCore for a date ordinal, or None when outside the table.
+        Builds a new PanchangCore from the mapped row (see the module docstring).
+        """
+        if not (self.first_ordinal <= ordinal <= self.last_ordinal):
+            return None
+        return _row_to_core(self.table[ordinal - self.first_ordinal])
+
+    @property
+    def span(self):
+        return date.fromordinal(self.first_ordinal), date.fromordinal(self.last_ordinal)
+
+
+def load_panchang_store(calculator: PanchangCalculator, path: str = None):
+    """
+    Memory-maps the table for this calculator's location (if built) and
+    registers it for compute_core lookups. Returns the store or None.
+    """
+    if not HAS_NUMPY:
+        return None
+    path = path or store_path(calculator)
+    if not os.path.exists(path):
+        return None
+    store = PanchangStore(path)
+    register_core_store(calculator.location_hash, store)
+    return store
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# ADMIN JOB
+# ═══════════════════════════════════════════════════════════════════════
+
+# Status of the last / running background build (read by the admin endpoint)
+BUILD_STATUS = {"running": False, "progress": None, "path": None, "error": None}
+_build_lock = threading.Lock()
+
+
+def start_table_build(calculator: PanchangCalculator, start_year: int, end_year: int, workers: int = None) -> bool:
+    """
+    Builds the table in a background thread and re-registers it when done.
+    Returns False if a build is already running.
+    """
+    with _build_lock:
+        if BUILD_STATUS["running"]:
+            return False
+        BUILD_STATUS.update(running=True, progress=f"0/{end_year - start_year + 1}", error=None)
+
+    def _progress(year, done, total):
+        BUILD_STATUS["progress"] = f"{done}/{total}"
+
+    def _run():
+        try:
+            # Release the current mapping first so the file can be replaced (Windows)
+            register_core_store(calculator.location_hash, None)
+            path = build_panchang_table(calculator, start_year, end_year, workers=workers, progress=_progress)
+            store = load_panchang_store(calculator, path)
+            BUILD_STATUS["path"] = path
+            print(f"[BG] Panchang table built: {store.span[0]} .. {store.span[1]}")
+        except Exception as e:
+            BUILD_STATUS["error"] = str(e)
+            load_panchang_store(calculator)  # Keep serving the previous table if there is one
+            print(f"[BG] Panchang table build error: {e}")
+        finally:
+            BUILD_STATUS["running"] = False
+
+    threading.Thread(target=_run, daemon=True).start()
+    return True
@@ -0,0 +1,359 @@
+"""
+S.T.A.R. Panchangam Tables
+===========================
+Precomputed astronomical event tables shared by every PanchangCalculator.
+
+The per-day Panchangam used to run ephem's iterative searches
+(previous/next new moon, next full moon) and extra Sun evaluations for each
+date. These tables compute the events once, keep them sorted, and answer
+lookups with `bisect`.
+
+ - LunationTable: new / full moon instants, amanta masa index, adhika flag
+ - SankrantiTable: solar ingress (Sankranti) instants per ayanamsa mode
+ - RiseSetTable: daily sunrise / sunset / moonrise / moonset per location
+"""
+
+import bisect
+import math
+import threading
+from datetime import date, datetime, timedelta
+
+import ephem
+
+# ═══════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════
+
+# Supported window (Gregorian years, inclusive). Blocks inside it are built
+# lazily on first use; `warm()` builds the whole window up front. Dates
+# outside the window still work — their blocks are built on demand too.
+LUNATION_WINDOW = (1900, 2100)
+
+# Years computed per lazily-built block (~0.2s of ephem searches)
+LUNATION_BLOCK_YEARS = 20
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# LUNATION TABLE
+# ═══════════════════════════════════════════════════════════════════════
+
+class LunationTable:
+    """
+    Sorted new-moon and full-moon instants (ephem day numbers, UTC) plus the
+    tropical Sun longitude at each new moon.
+
+    Lunation `i` runs from new_moons[i] to new_moons[i + 1]. Its amanta masa
+    follows from the Sun's sidereal rashi at both new moons: no rashi change
+    means an Adhika masa. Because the Sun longitude is stored tropical, one
+    table serves every ayanamsa.
+    """
+
+    def __init__(self, block_years=LUNATION_BLOCK_YEARS):
+        self.block_years = block_years
+        # (new_moons, sun_lon_at_nm, full_moons): sorted ephem floats, and the
+        # tropical Sun longitude (deg) at each new moon. Replaced as a whole.
+        self._data = ([], [], [])
+        self._blocks = {}          # block start year -> (new_moons, sun_lons, full_moons)
+        self._lock = threading.Lock()
+
+    # ── Building ─────────────────────────────────────────────────────
+
+    def _block_start(self, year):
+        return year - (year - LUNATION_WINDOW[0]) % self.block_years
+
+    def _compute_block(self, first_year):
+        """Events with first_year/1/1 <= instant < (first_year + block_years)/1/1."""
+        lo = float(ephem.Date(f"{first_year}/1/1"))
+        hi = float(ephem.Date(f"{first_year + self.block_years}/1/1"))
+        sun = ephem.Sun()
+
+        new_moons, sun_lons = [], []
+        when = ephem.previous_new_moon(lo)
+        while True:
+            when = ephem.next_new_moon(when)
+            if when >= hi:
+                break
+            sun.compute(when)
+            new_moons.append(float(when))
+            sun_lons.append(math.degrees(ephem.Ecliptic(sun).lon))
+
+        full_moons = []
+        when = ephem.previous_full_moon(lo)
+        while True:
+            when = ephem.next_full_moon(when)
+            if when >= hi:
+                break
+            full_moons.append(float(when))
+        return new_moons, sun_lons, full_moons
+
+    def _ensure_year(self, year):
+        start = self._block_start(year)
+        if start in self._blocks:
+            return
+        with self._lock:
+            if start in self._blocks:
+                return
+            block = self._compute_block(start)
+            blocks = dict(self._blocks)
+            blocks[start] = block
+            new_moons, sun_lons, full_moons = [], [], []
+            for key in sorted(blocks):
+                new_moons.extend(blocks[key][0])
+                sun_lons.extend(blocks[key][1])
+                full_moons.extend(blocks[key][2])
+            # Swap in complete lists so concurrent readers never see a partial merge
+            self._data = (new_moons, sun_lons, full_moons)
+            self._blocks = blocks
+
+    def _ensure(self, when):
+        """Makes sure the blocks around `when` (± ~2 lunations) are built."""
+        for edge in (when - 62, when + 62):
+            self._ensure_year(ephem.Date(edge).triple()[0])
+
+    def warm(self, start_year=None, end_year=None):
+        """Builds every block in [start_year, end_year] (default: LUNATION_WINDOW)."""
+        start_year = start_year or LUNATION_WINDOW[0]
+        end_year = end_year or LUNATION_WINDOW[1]
+        for year in range(self._block_start(start_year), end_year + 1, self.block_years):
+            self._ensure_year(year)
+
+    # ── Lookups ──────────────────────────────────────────────────────
+
+    def lunation_at(self, when, ayanamsa):
+        """
+        (prev_new_moon, next_new_moon, masa_index, is_adhika) for the lunation
+        containing `when` (`ayanamsa`: an app.panchang_ayanamsa.Ayanamsa).
+        masa_index may be 12 (wraps to 0 = Chaitra).
+        """
+        when = float(when)
+        self._ensure(when)
+        new_moons, sun_lons, _ = self._data
+        i = bisect.bisect_right(new_moons, when) - 1
+        rashi_start = int(ayanamsa.sidereal(sun_lons[i], new_moons[i]) / 30)
+        rashi_end = int(ayanamsa.sidereal(sun_lons[i + 1], new_moons[i + 1]) / 30)
+        if rashi_start == rashi_end:
+            masa_index, is_adhika = rashi_start + 1, True
+        else:
+            masa_index, is_adhika = rashi_end, False
+        return ephem.Date(new_moons[i]), ephem.Date(new_moons[i + 1]), masa_index, is_adhika
+
+    def next_new_moon(self, when):
+        """First new moon strictly after `when` (ephem.Date)."""
+        when = float(when)
+        self._ensure(when)
+        new_moons = self._data[0]
+        return ephem.Date(new_moons[bisect.bisect_right(new_moons, when)])
+
+    def next_full_moon(self, when):
+        """First full moon strictly after `when` (ephem.Date)."""
+        when = float(when)
+        self._ensure(when)
+        full_moons = self._data[2]
+        return ephem.Date(full_moons[bisect.bisect_right(full_moons, when)])
+
+    def previous_new_moon(self, when):
+        """Last new moon at or before `when` (ephem.Date)."""
+        when = float(when)
+        self._ensure(when)
+        new_moons = self._data[0]
+        return ephem.Date(new_moons[bisect.bisect_right(new_moons, when) - 1])
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# SANKRANTI TABLE
+# ═══════════════════════════════════════════════════════════════════════
+
+# Root-finding tolerance for ingress instants (1 second, in days)
+INGRESS_TOLERANCE_DAYS = 1 / 86400.0
+
+
+class SankrantiTable:
+    """
+    Exact instants at which the sidereal Sun enters each Rashi, built one
+    Gregorian year at a time per ayanamsa mode.
+
+    The Sun longitude is sampled once per day and every rashi change is
+    bisected to one second, so a year costs ~400 Sun evaluations once;
+    "is this date a Sankranti" and "next Sankranti" are then bisect lookups.
+    """
+
+    def __init__(self):
+        self._years = {}           # (ayanamsa mode, year) -> [(instant, rashi_index), ...]
+        self._instants = {}        # same key -> [instant, ...] for bisect
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sidereal_rashi(sun, when, ayanamsa):
+        sun.compute(ephem.Date(when))
+        return int(ayanamsa.sidereal(math.degrees(ephem.Ecliptic(sun).lon), when) / 30)
+
+    def _compute_year(self, year, ayanamsa):
+        sun = ephem.Sun()
+        lo = float(ephem.Date(f"{year}/1/1"))
+        hi = float(ephem.Date(f"{year + 1}/1/1"))
+
+        ingresses = []
+        t_prev = lo
+        r_prev = self._sidereal_rashi(sun, t_prev, ayanamsa)
+        while t_prev < hi:
+            t_next = min(t_prev + 1.0, hi)
+            r_next = self._sidereal_rashi(sun, t_next, ayanamsa)
+            if r_next != r_prev:
+                a, b = t_prev, t_next
+                while b - a > INGRESS_TOLERANCE_DAYS:
+                    mid = (a + b) / 2
+                    if self._sidereal_rashi(sun, mid, ayanamsa) == r_prev:
+                        a = mid
+                    else:
+                        b = mid
+                ingresses.append((b, r_next))
+            t_prev, r_prev = t_next, r_next
+        return ingresses
+
+    def year(self, year, ayanamsa):
+        """[(ephem instant, rashi_index entered), ...] for ingresses during `year` (UTC)."""
+        key = (ayanamsa.mode, year)
+        if key not in self._years:
+            with self._lock:
+                if key not in self._years:
+                    ingresses = self._compute_year(year, ayanamsa)
+                    self._instants[key] = [t for t, _ in ingresses]
+                    self._years[key] = ingresses
+        return self._years[key]
+
+    def between(self, lo, hi, ayanamsa):
+        """Ingresses with lo <= instant < hi (ephem floats), in order."""
+        lo, hi = float(lo), float(hi)
+        result = []
+        for year in range(ephem.Date(lo).triple()[0], ephem.Date(hi).triple()[0] + 1):
+            ingresses = self.year(year, ayanamsa)
+            instants = self._instants[(ayanamsa.mode, year)]
+            start = bisect.bisect_left(instants, lo)
+            end = bisect.bisect_left(instants, hi)
+            result.extend(ingresses[start:end])
+        return result
+
+    def on_date(self, target_date, ayanamsa):
+        """
+        Rashi index entered on `target_date`, or None. A date is a Sankranti
+        when the ingress falls after 00:00 UTC of the previous day and before
+        00:00 UTC of this one (the sampling rule the daily Panchangam uses).
+        """
+        midnight = float(ephem.Date(target_date.strftime("%Y/%m/%d")))
+        hits = self.between(midnight - 1.0, midnight, ayanamsa)
+        return hits[-1][1] if hits else None
+
+    def next_after(self, when, ayanamsa):
+        """(ephem.Date instant, rashi_index) of the first ingress after `when`."""
+        when = float(when)
+        year = ephem.Date(when).triple()[0]
+        while True:
+            ingresses = self.year(year, ayanamsa)
+            instants = self._instants[(ayanamsa.mode, year)]
+            i = bisect.bisect_right(instants, when)
+            if i < len(ingresses):
+                instant, rashi = ingresses[i]
+                return ephem.Date(instant), rashi
+            year += 1
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# RISE / SET TABLE
+# ═══════════════════════════════════════════════════════════════════════
+
+class RiseSetTable:
+    """
+    Sunrise, sunset, moonrise and moonset instants (ephem floats, None when
+    the body does not rise / set) for every day of a year, per location.
+
+    The searches are the same `next_rising` / `next_setting` calls from
+    00:00 UTC that the daily Panchangam makes, so values are identical; each
+    (location, year) is searched once and then served by index. Kaalas,
+    durmuhurtham, abhijit and amrit kalam are arithmetic on these instants.
+
+    Locations are (lat, lon, elevation) as configured in SystemSettings;
+    `invalidate(keep=...)` drops every other location when they change.
+    """
+
+    def __init__(self):
+        self._years = {}           # (location, year) -> [(sunrise, sunset, moonrise, moonset), ...]
+        self._lock = threading.Lock()
+        self._building = set()
+
+    @staticmethod
+    def _compute_year(location, year):
+        lat, lon, elevation = location
+        obs = ephem.Observer()
+        obs.lat, obs.lon, obs.elevation = lat, lon, elevation
+        sun, moon = ephem.Sun(), ephem.Moon()
+
+        days = []
+        day = datetime(year, 1, 1)
+        while day.year == year:
+            obs.date = day.strftime("%Y/%m/%d %H:%M:%S")
+            sunrise = sunset = moonrise = moonset = None
+            try:
+                sunrise, sunset = float(obs.next_rising(sun)), float(obs.next_setting(sun))
+            except (ephem.AlwaysUpError, ephem.NeverUpError):
+                pass
+            except Exception as e:
+                print(f"Error calculating Sun info: {e}")
+            try:
+                moonrise = float(obs.next_rising(moon))
+            except Exception:
+                pass
+            try:
+                moonset = float(obs.next_setting(moon))
+            except Exception:
+                pass
+            days.append((sunrise, sunset, moonrise, moonset))
+            day += timedelta(days=1)
+        return days
+
+    def year(self, location, year):
+        """Builds (if needed) and returns the day list for `year` at `location`."""
+        key = (location, year)
+        if key not in self._years:
+            days = self._compute_year(location, year)
+            with self._lock:
+                self._years.setdefault(key, days)
+        return self._years[key]
+
+    def get(self, location, target_date):
+        """(sunrise, sunset, moonrise, moonset) if the year is built, else None."""
+        days = self._years.get((location, target_date.year))
+        if days is None:
+            return None
+        return days[target_date.toordinal() - date(target_date.year, 1, 1).toordinal()]
+
+    def build_in_background(self, location, years):
+        """Builds the given years in a daemon thread (skips built / in-flight ones)."""
+        with self._lock:
+            todo = [y for y in years if (location, y) not in self._years and (location, y) not in self._building]
+            self._building.update((location, y) for y in todo)
+        if not todo:
+            return
+
+        def _run():
+            try:
+                for y in todo:
+                    self.year(location, y)
+                    print(f"[BG] Rise/set table built for {y} ({location[0]}, {location[1]})")
+            except Exception as e:
+                print(f"[BG] Rise/set table build error: {e}")
+            finally:
+                with self._lock:
+                    self._building.difference_update((location, y) for y in todo)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def invalidate(self, keep=None):
+        """Drops every location except `keep` (the current temple location)."""
+        with self._lock:
+            self._years = {k: v for k, v in self._years.items() if k[0] == keep}
+
+
+# Process-wide shared tables
+LUNATIONS = LunationTable()
+SANKRANTIS = SankrantiTable()
+RISE_SET = RiseSetTable()
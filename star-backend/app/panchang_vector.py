@@ -0,0 +1,309 @@
+"""
+S.T.A.R. Panchangam Ephemeris Backends
+=======================================
+Sun / Moon longitudes for many instants at once.
+
+The Pancha-Anga indices only need the Sun and Moon ecliptic longitudes.
+`EphemBackend` evaluates them one instant at a time with pyephem;
+`NumpyBackend` evaluates whole arrays with truncated analytic series
+(VSOP87 for the Sun, the ELP-2000/82 main terms from Meeus ch. 47 for the
+Moon), referred to the same J2000 ecliptic that `ephem.Ecliptic` uses.
+
+Over 1900-2100 the series agree with ephem to about 1.5" for the Sun and
+under 20" (~0.0056°) for the Moon (see `accuracy_report`).
+Samples that fall within BOUNDARY_GUARD_DEG of a tithi / karana /
+nakshatra / yoga / rashi boundary are re-evaluated with ephem, so the
+indices a range produces are the same as the per-day calculator's.
+
+Rise / set times are not covered here; the calculator keeps using ephem
+for those.
+"""
+
+import math
+
+import ephem
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# ═══════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════
+
+# Samples closer than this to an index boundary are re-checked with ephem.
+# Measured series error over 1900-2100 is < 1.5" (Sun) and < 20" (Moon), so
+# a Sun ± Moon angle is off by < 0.006° — about a third of the guard.
+BOUNDARY_GUARD_DEG = 0.02
+
+# (width in degrees) of every boundary the daily indices depend on, as
+# functions of the sidereal Sun (s) and Moon (m) longitudes. Karana (6°)
+# covers tithi; the Sun rashi (30°) covers the ayana boundaries at 90/270.
+_GUARDED_ANGLES = (
+    (lambda s, m: m - s, 6.0),              # karana / tithi
+    (lambda s, m: m, 360.0 / 27),           # nakshatra
+    (lambda s, m: s + m, 360.0 / 27),       # yoga
+    (lambda s, m: s, 30.0),                 # sun rashi, ayana
+    (lambda s, m: m, 30.0),                 # moon rashi
+)
+
+# ephem day numbers count from 1899-12-31 12:00; J2000.0 is day 36525
+_J2000 = 36525.0
+
+# ═══════════════════════════════════════════════════════════════════════
+# SERIES COEFFICIENTS
+# ═══════════════════════════════════════════════════════════════════════
+
+# VSOP87D heliocentric longitude of the Earth, L0..L3: (A, B, C) → A·cos(B + C·τ)
+_EARTH_L0 = (
+    (175347046, 0, 0), (3341656, 4.6692568, 6283.0758500), (34894, 4.62610, 12566.15170),
+    (3497, 2.7441, 5753.3849), (3418, 2.8289, 3.5231), (3136, 3.6277, 77713.7715),
+    (2676, 4.4181, 7860.4194), (2343, 6.1352, 3930.2097), (1324, 0.7425, 11506.7698),
+    (1273, 2.0371, 529.6910), (1199, 1.1096, 1577.3435), (990, 5.233, 5884.927),
+    (902, 2.045, 26.298), (857, 3.508, 398.149), (780, 1.179, 5223.694),
+    (753, 2.533, 5507.553), (505, 4.583, 18849.228), (492, 4.205, 775.523),
+    (357, 2.920, 0.067), (317, 5.849, 11790.629), (284, 1.899, 796.298),
+    (271, 0.315, 10977.079), (243, 0.345, 5486.778), (206, 4.806, 2544.314),
+    (205, 1.869, 5573.143), (202, 2.458, 6069.777), (156, 0.833, 213.299),
+    (132, 3.411, 2942.463), (126, 1.083, 20.775), (115, 0.645, 0.980),
+    (103, 0.636, 4694.003), (102, 0.976, 15720.839), (102, 4.267, 7.114),
+    (99, 6.21, 2146.17), (98, 0.68, 155.42), (86, 5.98, 161000.69),
+    (85, 1.30, 6275.96), (85, 3.67, 71430.70), (80, 1.81, 17260.15),
+)
+_EARTH_L1 = (
+    (628331966747, 0, 0), (206059, 2.678235, 6283.075850), (4303, 2.6351, 12566.1517),
+    (425, 1.590, 3.523), (119, 5.796, 26.298), (109, 2.966, 1577.344),
+    (93, 2.59, 18849.23), (72, 1.14, 529.69), (68, 1.87, 398.15), (67, 4.41, 5507.55),
+)
+_EARTH_L2 = ((52919, 0, 0), (8720, 1.0721, 6283.0758), (309, 0.867, 12566.152))
+_EARTH_L3 = ((289, 5.844, 6283.076), (35, 0, 0))
+
+# Moon longitude terms (Meeus table 47.A): D, M, M', F multipliers and
+# coefficient in 1e-6 degrees. Terms in M are scaled by E^|M|.
+_MOON_LON = (
+    (0, 0, 1, 0, 6288774), (2, 0, -1, 0, 1274027), (2, 0, 0, 0, 658314), (0, 0, 2, 0, 213618),
+    (0, 1, 0, 0, -185116), (0, 0, 0, 2, -114332), (2, 0, -2, 0, 58793), (2, -1, -1, 0, 57066),
+    (2, 0, 1, 0, 53322), (2, -1, 0, 0, 45758), (0, 1, -1, 0, -40923), (1, 0, 0, 0, -34720),
+    (0, 1, 1, 0, -30383), (2, 0, 0, -2, 15327), (0, 0, 1, 2, -12528), (0, 0, 1, -2, 10980),
+    (4, 0, -1, 0, 10675), (0, 0, 3, 0, 10034), (4, 0, -2, 0, 8548), (2, 1, -1, 0, -7888),
+    (2, 1, 0, 0, -6766), (1, 0, -1, 0, -5163), (1, 1, 0, 0, 4987), (2, -1, 1, 0, 4036),
+    (2, 0, 2, 0, 3994), (4, 0, 0, 0, 3861), (2, 0, -3, 0, 3665), (0, 1, -2, 0, -2689),
+    (2, 0, -1, 2, -2602), (2, -1, -2, 0, 2390), (1, 0, 1, 0, -2348), (2, -2, 0, 0, 2236),
+    (0, 1, 2, 0, -2120), (0, 2, 0, 0, -2069), (2, -2, -1, 0, 2048), (2, 0, 1, -2, -1773),
+    (2, 0, 0, 2, -1595), (4, -1, -1, 0, 1215), (0, 0, 2, 2, -1110), (3, 0, -1, 0, -892),
+    (2, 1, 1, 0, -810), (4, -1, -2, 0, 759), (0, 2, -1, 0, -713), (2, 2, -1, 0, -700),
+    (2, 1, -2, 0, 691), (2, -1, 0, -2, 596), (4, 0, 1, 0, 549), (0, 0, 4, 0, 537),
+    (4, -1, 0, 0, 520), (1, 0, -2, 0, -487), (2, 1, 0, -2, -399), (0, 0, 2, -2, -381),
+    (1, 1, 1, 0, 351), (3, 0, -2, 0, -340), (4, 0, -3, 0, 330), (2, -1, 2, 0, 327),
+    (0, 2, 1, 0, -323), (1, 1, -1, 0, 299), (2, 0, 3, 0, 294),
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# BACKENDS
+# ═══════════════════════════════════════════════════════════════════════
+
+class EphemBackend:
+    """Scalar pyephem evaluation, one instant at a time (the reference)."""
+
+    name = "ephem"
+
+    def tropical_longitudes(self, instants):
+        """(sun_deg, moon_deg) lists for ephem day numbers, J2000 ecliptic."""
+        sun, moon = ephem.Sun(), ephem.Moon()
+        sun_lons, moon_lons = [], []
+        for when in instants:
+            when = ephem.Date(float(when))
+            sun.compute(when)
+            moon.compute(when)
+            sun_lons.append(math.degrees(ephem.Ecliptic(sun).lon))
+            moon_lons.append(math.degrees(ephem.Ecliptic(moon).lon))
+        return sun_lons, moon_lons
+
+    def sidereal_longitudes(self, instants, offsets):
+        """
+        (sun_deg, moon_deg) sidereal, same reduction as PanchangCalculator.get_sidereal_lon.
+        `offsets`: ayanamsa offset per instant (Ayanamsa.offsets) or one value for all.
+        """
+        sun_lons, moon_lons = self.tropical_longitudes(instants)
+        if isinstance(offsets, (int, float)):
+            offsets = [offsets] * len(sun_lons)
+        return ([(s - a) % 360 for s, a in zip(sun_lons, offsets)],
+                [(m - a) % 360 for m, a in zip(moon_lons, offsets)])
+
+
+class NumpyBackend:
+    """Vectorized analytic series; boundary samples are confirmed with ephem."""
+
+    name = "numpy"
+
+    def __init__(self):
+        if not HAS_NUMPY:
+            raise RuntimeError("numpy is required for the vectorized ephemeris backend")
+        self._earth = [np.array(terms, dtype=float) for terms in (_EARTH_L0, _EARTH_L1, _EARTH_L2, _EARTH_L3)]
+        moon = np.array(_MOON_LON, dtype=float)
+        self._moon_args = moon[:, :4]
+        self._moon_coeff = moon[:, 4]
+        self._moon_e_power = np.abs(moon[:, 1])
+        self._delta_t = None
+        self._reference = EphemBackend()
+
+    # ── Time scale ───────────────────────────────────────────────────
+
+    def _terrestrial_time(self, t):
+        """UT ephem days → TT, using ephem's own ΔT model sampled yearly."""
+        if self._delta_t is None:
+            years = np.arange(1800, 2201)
+            seconds = np.array([ephem.delta_t(f"{y}/1/1") for y in years])
+            self._delta_t = (years, seconds)
+        years, seconds = self._delta_t
+        year = 1900.0 + (t - 0.5) / 365.2425
+        return t + np.interp(year, years, seconds) / 86400.0
+
+    # ── Series ───────────────────────────────────────────────────────
+
+    def tropical_longitudes(self, instants):
+        """(sun_deg, moon_deg) arrays for ephem day numbers, J2000 ecliptic."""
+        t = self._terrestrial_time(np.asarray(instants, dtype=float))
+        T = (t - _J2000) / 36525.0
+        T2, T3, T4 = T * T, T ** 3, T ** 4
+
+        # Sun: geocentric = heliocentric Earth + 180°, FK5 correction.
+        # ephem's astrometric positions carry no aberration, so none is applied.
+        tau = T / 10.0
+        earth = sum(
+            (np.cos(terms[:, 1] + np.outer(tau, terms[:, 2])) @ terms[:, 0]) * tau ** power
+            for power, terms in enumerate(self._earth)
+        ) / 1e8
+        sun = np.degrees(earth) + 180.0 - 0.09033 / 3600.0
+
+        # Moon: mean longitude + periodic terms (Meeus ch. 47)
+        Lp = 218.3164477 + 481267.88123421 * T - 0.0015786 * T2 + T3 / 538841 - T4 / 65194000
+        D = 297.8501921 + 445267.1114034 * T - 0.0018819 * T2 + T3 / 545868 - T4 / 113065000
+        M = 357.5291092 + 35999.0502909 * T - 0.0001536 * T2 + T3 / 24490000
+        Mp = 134.9633964 + 477198.8675055 * T + 0.0087414 * T2 + T3 / 69699 - T4 / 14712000
+        F = 93.2720950 + 483202.0175233 * T - 0.0036539 * T2 - T3 / 3526000 + T4 / 863310000
+        A1 = 119.75 + 131.849 * T
+        A2 = 53.09 + 479264.290 * T
+        E = 1 - 0.002516 * T - 0.0000074 * T2
+
+        args = np.radians(np.stack([D, M, Mp, F], axis=1) @ self._moon_args.T)
+        scale = E[:, None] ** self._moon_e_power
+        periodic = (np.sin(args) * scale) @ self._moon_coeff
+        periodic += (3958 * np.sin(np.radians(A1)) + 1962 * np.sin(np.radians(Lp - F))
+                     + 318 * np.sin(np.radians(A2)))
+        moon = Lp + periodic / 1e6
+
+        # Equinox of date → J2000 (general precession in longitude)
+        precession = (5029.0966 * T + 1.11113 * T2) / 3600.0
+        return (sun - precession) % 360, (moon - precession) % 360
+
+    def sidereal_longitudes(self, instants, offsets):
+        """
+        (sun_deg, moon_deg) sidereal arrays. Samples near an index boundary
+        are replaced with ephem values so derived indices match exactly.
+        """
+        instants = np.asarray(instants, dtype=float)
+        offsets = np.broadcast_to(np.asarray(offsets, dtype=float), instants.shape)
+        sun, moon = self.tropical_longitudes(instants)
+        sun = (sun - offsets) % 360
+        moon = (moon - offsets) % 360
+
+        near = np.zeros(len(instants), dtype=bool)
+        for angle_fn, width in _GUARDED_ANGLES:
+            offset = angle_fn(sun, moon) % width
+            near |= (offset < BOUNDARY_GUARD_DEG) | (offset > width - BOUNDARY_GUARD_DEG)
+
+        if near.any():
+            ref_sun, ref_moon = self._reference.sidereal_longitudes(instants[near], offsets[near])
+            sun[near] = ref_sun
+            moon[near] = ref_moon
+        return sun, moon
+
+
+BACKENDS = {"ephem": EphemBackend, "numpy": NumpyBackend}
+
+_instances = {}
+
+
+def get_backend(name="auto"):
+    """
+    Backend instance by name: "ephem", "numpy", or "auto" (numpy when
+    installed, otherwise ephem).
+    """
+    name = (name or "auto").lower()
+    if name == "auto":
+        name = "numpy" if HAS_NUMPY else "ephem"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ephemeris backend: {name}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# INDICES
+# ═══════════════════════════════════════════════════════════════════════
+
+def panchanga_indices(instants, offsets, backend="auto"):
+    """
+    Tithi (0-29), nakshatra (0-26) and yoga (0-26) indices for an array of
+    ephem instants in one call, e.g. 00:30 UTC of every day of a year.
+    `offsets` as for sidereal_longitudes.
+    """
+    sun, moon = get_backend(backend).sidereal_longitudes(instants, offsets)
+    if not HAS_NUMPY:
+        return {
+            "tithi": [int(((m - s) % 360) / 12.0) % 30 for s, m in zip(sun, moon)],
+            "nakshatra": [int(m * (27.0 / 360.0)) % 27 for m in moon],
+            "yoga": [int(((s + m) % 360) / (360.0 / 27.0)) % 27 for s, m in zip(sun, moon)],
+        }
+    sun, moon = np.asarray(sun), np.asarray(moon)
+    return {
+        "tithi": (((moon - sun) % 360) / 12.0).astype(int) % 30,
+        "nakshatra": (moon * (27.0 / 360.0)).astype(int) % 27,
+        "yoga": (((sun + moon) % 360) / (360.0 / 27.0)).astype(int) % 27,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# ACCURACY CHECK
+# ═══════════════════════════════════════════════════════════════════════
+
+def accuracy_report(start_year=1900, end_year=2100, step_days=7.3, ayanamsa_value=23.85):
+    """
+    Compares NumpyBackend against EphemBackend on a grid of instants.
+
+    Returns the max / mean longitude error (arc-seconds) of the raw series
+    and the number of samples whose tithi / nakshatra / yoga disagree
+    after the boundary guard (expected: 0).
+    """
+    numpy_backend, ephem_backend = get_backend("numpy"), get_backend("ephem")
+    lo = float(ephem.Date(f"{start_year}/1/1"))
+    hi = float(ephem.Date(f"{end_year + 1}/1/1"))
+    instants = np.arange(lo, hi, step_days)
+
+    vec_sun, vec_moon = numpy_backend.tropical_longitudes(instants)
+    ref_sun, ref_moon = (np.array(x) for x in ephem_backend.tropical_longitudes(instants))
+    sun_err = ((vec_sun - ref_sun + 180) % 360 - 180) * 3600
+    moon_err = ((vec_moon - ref_moon + 180) % 360 - 180) * 3600
+
+    vec = panchanga_indices(instants, ayanamsa_value, backend="numpy")
+    ref = panchanga_indices(instants, ayanamsa_value, backend="ephem")
+    return {
+        "samples": len(instants),
+        "sun_max_arcsec": round(float(np.abs(sun_err).max()), 2),
+        "sun_mean_arcsec": round(float(sun_err.mean()), 2),
+        "moon_max_arcsec": round(float(np.abs(moon_err).max()), 2),
+        "moon_mean_arcsec": round(float(moon_err.mean()), 2),
+        "index_mismatches": {
+            key: int(np.count_nonzero(np.asarray(vec[key]) != np.asarray(ref[key]))) for key in vec
+        },
+    }
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(accuracy_report(), indent=2))
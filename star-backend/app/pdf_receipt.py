@@ -60,6 +60,72 @@ LIGHT_BG = HexColor("#FFF7ED")       # Warm cream
 BORDER_COLOR = HexColor("#FDBA74")   # Light orange border
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# Styles (built once, shared by every document)
+# ═══════════════════════════════════════════════════════════════════════
+
+_BASE = getSampleStyleSheet()["Normal"]
+
+STYLE_TEMPLE_KN = ParagraphStyle(
+    "TempleKn", parent=_BASE,
+    fontName=KANNADA_BOLD, fontSize=14,
+    alignment=TA_CENTER, textColor=DARK_SAFFRON,
+    spaceAfter=2*mm,
+)
+STYLE_TEMPLE_EN = ParagraphStyle(
+    "TempleEn", parent=_BASE,
+    fontName="Helvetica-Bold", fontSize=10,
+    alignment=TA_CENTER, textColor=DARK_TEXT,
+    spaceAfter=1*mm,
+)
+STYLE_ADDRESS = ParagraphStyle(
+    "Address", parent=_BASE,
+    fontName=KANNADA_FONT, fontSize=8,
+    alignment=TA_CENTER, textColor=MUTED_TEXT,
+    spaceAfter=3*mm,
+)
+STYLE_SEVA_TITLE = ParagraphStyle(
+    "SevaTitle", parent=_BASE,
+    fontName="Helvetica-Bold", fontSize=16,
+    alignment=TA_CENTER, textColor=SAFFRON,
+    spaceAfter=1*mm,
+)
+STYLE_SEVA_KN = ParagraphStyle(
+    "SevaKn", parent=_BASE,
+    fontName=KANNADA_BOLD, fontSize=12,
+    alignment=TA_CENTER, textColor=GOLD,
+    spaceAfter=3*mm,
+)
+STYLE_LABEL = ParagraphStyle(
+    "Label", parent=_BASE,
+    fontName=KANNADA_FONT, fontSize=9,
+    textColor=MUTED_TEXT,
+)
+STYLE_VALUE = ParagraphStyle(
+    "Value", parent=_BASE,
+    fontName=KANNADA_BOLD, fontSize=10,
+    textColor=DARK_TEXT,
+)
+STYLE_AMOUNT = ParagraphStyle(
+    "Amount", parent=_BASE,
+    fontName="Helvetica-Bold", fontSize=18,
+    alignment=TA_CENTER, textColor=DARK_SAFFRON,
+    spaceBefore=2*mm, spaceAfter=2*mm,
+)
+STYLE_FOOTER = ParagraphStyle(
+    "Footer", parent=_BASE,
+    fontName=KANNADA_FONT, fontSize=7,
+    alignment=TA_CENTER, textColor=MUTED_TEXT,
+    spaceAfter=1*mm,
+)
+STYLE_LABEL_RIGHT = ParagraphStyle("DateRight", parent=STYLE_LABEL, alignment=TA_RIGHT)
+STYLE_PAY_MODE = ParagraphStyle("PayMode", parent=STYLE_LABEL, alignment=TA_CENTER, fontSize=9)
+
+TEMPLE_NAME_KN = "ತರೀಕೆರೆ ಶ್ರೀ ಸುಬ್ರಹ್ಮಣ್ಯೇಶ್ವರ ಸ್ವಾಮಿ ದೇವಸ್ಥಾನ"
+TEMPLE_NAME_EN = "Tarikere Sri Subramanyeshwara Swami Temple"
+TEMPLE_ADDRESS_KN = "ಬ್ರಾಹ್ಮಣ ಸೇವಾ ಸಮಿತಿ (ರಿ.) • ದೇವರಪ್ಪ ಬೀದಿ, ತರೀಕೆರೆ - 577228"
+
+
 def _create_qr_image(data_str, size=25*mm):
     """Generate a QR code as a ReportLab-compatible image."""
     if not HAS_QR:
@@ -110,72 +176,13 @@ def generate_receipt_pdf(data: dict) -> bytes:
         rightMargin=12*mm,
     )
 
-    # ── Styles ──────────────────────────────────────────────────
-    styles = getSampleStyleSheet()
-
-    style_temple_kn = ParagraphStyle(
-        "TempleKn", parent=styles["Normal"],
-        fontName=KANNADA_BOLD, fontSize=14,
-        alignment=TA_CENTER, textColor=DARK_SAFFRON,
-        spaceAfter=2*mm,
-    )
-    style_temple_en = ParagraphStyle(
-        "TempleEn", parent=styles["Normal"],
-        fontName="Helvetica-Bold", fontSize=10,
-        alignment=TA_CENTER, textColor=DARK_TEXT,
-        spaceAfter=1*mm,
-    )
-    style_address = ParagraphStyle(
-        "Address", parent=styles["Normal"],
-        fontName=KANNADA_FONT, fontSize=8,
-        alignment=TA_CENTER, textColor=MUTED_TEXT,
-        spaceAfter=3*mm,
-    )
-    style_seva_title = ParagraphStyle(
-        "SevaTitle", parent=styles["Normal"],
-        fontName="Helvetica-Bold", fontSize=16,
-        alignment=TA_CENTER, textColor=SAFFRON,
-        spaceAfter=1*mm,
-    )
-    style_seva_kn = ParagraphStyle(
-        "SevaKn", parent=styles["Normal"],
-        fontName=KANNADA_BOLD, fontSize=12,
-        alignment=TA_CENTER, textColor=GOLD,
-        spaceAfter=3*mm,
-    )
-    style_label = ParagraphStyle(
-        "Label", parent=styles["Normal"],
-        fontName=KANNADA_FONT, fontSize=9,
-        textColor=MUTED_TEXT,
-    )
-    style_value = ParagraphStyle(
-        "Value", parent=styles["Normal"],
-        fontName=KANNADA_BOLD, fontSize=10,
-        textColor=DARK_TEXT,
-    )
-    style_amount = ParagraphStyle(
-        "Amount", parent=styles["Normal"],
-        fontName="Helvetica-Bold", fontSize=18,
-        alignment=TA_CENTER, textColor=DARK_SAFFRON,
-        spaceBefore=2*mm, spaceAfter=2*mm,
-    )
-    style_footer = ParagraphStyle(
-        "Footer", parent=styles["Normal"],
-        fontName=KANNADA_FONT, fontSize=7,
-        alignment=TA_CENTER, textColor=MUTED_TEXT,
-        spaceAfter=1*mm,
-    )
-
     # ── Build Content ───────────────────────────────────────────
     elements = []
 
     # 1. Temple Header
-    elements.append(Paragraph("ತರೀಕೆರೆ ಶ್ರೀ ಸುಬ್ರಹ್ಮಣ್ಯೇಶ್ವರ ಸ್ವಾಮಿ ದೇವಸ್ಥಾನ", style_temple_kn))
-    elements.append(Paragraph(" Tarikere Sri Subramanyeshwara Swami Temple", style_temple_en))
-    elements.append(Paragraph(
-        "ಬ್ರಾಹ್ಮಣ ಸೇವಾ ಸಮಿತಿ (ರಿ.) • ದೇವರಪ್ಪ ಬೀದಿ, ತರೀಕೆರೆ - 577228",
-        style_address
-    ))
+    elements.append(Paragraph(TEMPLE_NAME_KN, STYLE_TEMPLE_KN))
+    elements.append(Paragraph(" " + TEMPLE_NAME_EN, STYLE_TEMPLE_EN))
+    elements.append(Paragraph(TEMPLE_ADDRESS_KN, STYLE_ADDRESS))
 
     # Horizontal rule
     line_table = Table([[""]],
@@ -194,10 +201,8 @@ def generate_receipt_pdf(data: dict) -> bytes:
 
     info_data = [
         [
-            Paragraph(f"<b>Receipt #:</b> {receipt_no}", style_label),
-            Paragraph(f"<b>Date:</b> {date_str}", ParagraphStyle(
-                "DateRight", parent=style_label, alignment=TA_RIGHT
-            )),
+            Paragraph(f"<b>Receipt #:</b> {receipt_no}", STYLE_LABEL),
+            Paragraph(f"<b>Date:</b> {date_str}", STYLE_LABEL_RIGHT),
         ]
     ]
     info_table = Table(info_data, colWidths=[doc.width * 0.5, doc.width * 0.5])
@@ -210,9 +215,9 @@ def generate_receipt_pdf(data: dict) -> bytes:
     # 3. Seva Name (prominent)
     seva_name = data.get("seva_name", "Seva")
     seva_name_kn = data.get("seva_name_kn", "")
-    elements.append(Paragraph(seva_name.upper(), style_seva_title))
+    elements.append(Paragraph(seva_name.upper(), STYLE_SEVA_TITLE))
     if seva_name_kn:
-        elements.append(Paragraph(seva_name_kn, style_seva_kn))
+        elements.append(Paragraph(seva_name_kn, STYLE_SEVA_KN))
 
     # Thin separator
     elements.append(Spacer(1, 2*mm))
@@ -228,8 +233,8 @@ def generate_receipt_pdf(data: dict) -> bytes:
     detail_table_data = []
     for label, value in devotee_rows:
         detail_table_data.append([
-            Paragraph(label, style_label),
-            Paragraph(str(value), style_value),
+            Paragraph(label, STYLE_LABEL),
+            Paragraph(str(value), STYLE_VALUE),
         ])
 
     detail_table = Table(detail_table_data, colWidths=[doc.width * 0.4, doc.width * 0.6])
@@ -247,7 +252,7 @@ def generate_receipt_pdf(data: dict) -> bytes:
     payment_mode = data.get("payment_mode", "CASH")
 
     amount_box_data = [[
-        Paragraph(f"₹ {amount}", style_amount),
+        Paragraph(f"₹ {amount}", STYLE_AMOUNT),
     ]]
     amount_table = Table(amount_box_data, colWidths=[doc.width])
     amount_table.setStyle(TableStyle([
@@ -264,9 +269,7 @@ def generate_receipt_pdf(data: dict) -> bytes:
     upi_txn = data.get("upi_txn_id")
     if upi_txn:
         pay_label += f" (UTR: {upi_txn})"
-    elements.append(Paragraph(pay_label, ParagraphStyle(
-        "PayMode", parent=style_label, alignment=TA_CENTER, fontSize=9,
-    )))
+    elements.append(Paragraph(pay_label, STYLE_PAY_MODE))
     elements.append(Spacer(1, 4*mm))
 
     # 6. QR Code + Verification
@@ -277,7 +280,7 @@ def generate_receipt_pdf(data: dict) -> bytes:
         qr_table = Table(
             [[qr_img, Paragraph(
                 f"<font size=7 color='#64748B'>Scan to verify<br/>Receipt #{receipt_no}</font>",
-                style_footer
+                STYLE_FOOTER
             )]],
             colWidths=[30*mm, doc.width - 30*mm],
         )
@@ -294,12 +297,12 @@ def generate_receipt_pdf(data: dict) -> bytes:
 
     staff = data.get("staff_name", "")
     if staff:
-        elements.append(Paragraph(f"Issued by: {staff}", style_footer))
+        elements.append(Paragraph(f"Issued by: {staff}", STYLE_FOOTER))
 
-    elements.append(Paragraph("ಸರ್ವೇ ಜನಾಃ ಸುಖಿನೋ ಭವಂತು • Sarve Janah Sukhino Bhavantu", style_footer))
+    elements.append(Paragraph("ಸರ್ವೇ ಜನಾಃ ಸುಖಿನೋ ಭವಂತು • Sarve Janah Sukhino Bhavantu", STYLE_FOOTER))
     elements.append(Paragraph(
         "This is a computer-generated receipt. No signature required.",
-        style_footer
+        STYLE_FOOTER
     ))
 
     # ── Build PDF ───────────────────────────────────────────────
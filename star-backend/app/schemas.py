@@ -5,7 +5,7 @@ Request and response models for API validation.
 """
 
 from pydantic import BaseModel, Field, model_validator, field_validator
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from enum import Enum
 from datetime import date, datetime
@@ -302,6 +302,18 @@ class ShaswataDispatchAdhoc(BaseModel):
     dispatch_method: str = Field("POST", max_length=20, description="Dispatch method (POST, COURIER, HAND)")
 
 
+class ShaswataDispatchItem(BaseModel):
+    """One event of a bulk dispatch"""
+    event_id: int = Field(..., description="ID of the shaswata event")
+    dispatch_ref: Optional[str] = Field(None, max_length=50, description="Courier/Post reference number")
+    dispatch_method: str = Field("POST", max_length=20, description="Dispatch method (POST, COURIER, HAND)")
+
+
+class ShaswataDispatchBatch(BaseModel):
+    """Schema for bulk event dispatch (a courier batch in one call)"""
+    items: List[ShaswataDispatchItem] = Field(..., min_length=1, max_length=5000)
+
+
 # =============================================================================
 # Response Schemas (for sending data)
 # =============================================================================
@@ -0,0 +1,322 @@
+"""
+S.T.A.R. Backend - Shaswata Daily Digest
+=========================================
+Materialized per-day view behind `/shaswata/tomorrow` (navbar bell) and
+`/daily-sankalpa` (priest dashboard): one `shaswata_daily_digests` row per
+date holding that day's Shaswata pujas (devotee, seva, address
+confirmation state), one-time bookings, revenue and the English
+Panchangam, so both endpoints answer with a primary-key read.
+
+1. Build — a range of days at once: LUNAR subscriptions are matched with
+   the same tithi observance rules as the event scheduler
+   (app.shaswata_service), details come from one join per range.
+2. Refresh — the scheduler rebuilds the window around today; writes
+   (subscriptions, bookings, devotee address changes) patch only the
+   stored days they touch. Days never built are built on first read.
+3. Invalidation — changing the Panchang location, the matching rules or
+   the Panchang cache version, editing the seva catalog or importing
+   legacy data drops every row. Writes call invalidate_digests after
+   their commit, so a failed update never fails the write.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from .crud import get_panchang_calculator
+from .panchang_cache import get_panchang_cores
+from .shaswata_service import (
+    matching_rules, _lunar_dates, _subscriptions_on, _event_candidates, _SUBSCRIPTION_COLUMNS,
+)
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DIGEST_DAYS_BEHIND = 1          # Materialized window: yesterday ..
+DIGEST_DAYS_AHEAD = 7           # .. a week ahead
+
+# Settings whose change makes every stored digest stale
+DIGEST_SETTING_KEYS = {
+    "temple_lat", "temple_lon", "temple_elevation", "panchang_ayanamsa",
+    "shaswata_tithi_rule", "shaswata_adhika_rule", "panchang_cache_version",
+}
+
+MONTH_NAMES = ["", "January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December"]
+
+
+def _as_date(value) -> date:
+    """DB date/datetime (SQLite returns text through raw SQL) → date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def daily_festivals(panchangam: dict, core) -> list:
+    """Festival banner of the priest dashboard for one day."""
+    if panchangam.get("is_festival"):
+        return [panchangam["is_festival"]]
+    return ["Shiva Rathri (Upcoming)", "Pradosha"] if core.masa == 10 else ["Daily Sevas"]
+
+
+# =============================================================================
+# 1. BUILD
+# =============================================================================
+
+_SHASWATA_DETAILS = text("""
+    SELECT ss.id, d.id, d.full_name_en, d.phone_number, d.gothra_en, d.nakshatra, d.rashi,
+           d.address, d.area, d.pincode, sc.name_eng,
+           ss.subscription_type, ss.maasa, ss.paksha, ss.tithi, ss.event_day, ss.event_month,
+           ss.occasion, ss.notes, d.address_confirmed, d.address_confirmation_sent_at
+    FROM shaswata_subscriptions ss
+    JOIN devotees d ON ss.devotee_id = d.id
+    JOIN seva_catalog sc ON ss.seva_id = sc.id
+    WHERE ss.id IN :ids
+""").bindparams(bindparam("ids", expanding=True))
+
+# One-time bookings count on their seva date and on the day they were booked
+_BOOKINGS = text("""
+    SELECT t.id, t.devotee_name, d.phone_number, d.gothra_en, s.name_eng, t.notes, d.address,
+           d.nakshatra, d.rashi, t.amount_paid, t.seva_date, t.transaction_date, t.devotee_id
+    FROM transactions t
+    JOIN devotees d ON t.devotee_id = d.id
+    JOIN seva_catalog s ON t.seva_id = s.id
+    WHERE (t.seva_date >= :start AND t.seva_date <= :end)
+       OR (t.transaction_date >= :start AND t.transaction_date < :after)
+    ORDER BY t.id
+""")
+
+
+def _shaswata_entry(row) -> dict:
+    (sub_id, devotee_id, name, phone, gothra, nakshatra, rashi, address, area, pincode, seva,
+     sub_type, maasa, paksha, tithi, event_day, event_month, occasion, notes,
+     address_confirmed, confirmation_sent_at) = row
+    if sub_type == "LUNAR":
+        date_info = f"{maasa} {paksha} {tithi}"
+    else:
+        month_str = MONTH_NAMES[event_month] if event_month and 0 < event_month <= 12 else str(event_month)
+        date_info = f"{month_str} {event_day}"
+    return {
+        "id": sub_id, "devotee_id": devotee_id, "name": name, "phone": phone, "gothra": gothra,
+        "nakshatra": nakshatra, "rashi": rashi, "address": address, "area": area, "pincode": pincode,
+        "seva": seva, "date_info": date_info, "notes": notes, "occasion": occasion, "type": sub_type,
+        "address_confirmed": bool(address_confirmed),
+        "confirmation_sent": confirmation_sent_at is not None,
+    }
+
+
+def build_digests(db: Session, start: date, end: date) -> dict:
+    """
+    date → digest for every day from `start` to `end` (inclusive), read from
+    the source tables. Does not store anything.
+    """
+    pc = get_panchang_calculator(db)
+    rules = matching_rules(db)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    # Shaswata: which subscriptions fall on which day, then their details in one query
+    lunar_dates = _lunar_dates(pc, rules, start, end)
+    candidates = _event_candidates(_subscriptions_on(db, lunar_dates, start, end), start, end, lunar_dates, rules)
+    details = {}
+    if candidates:
+        ids = sorted({sub_id for sub_id, _day in candidates})
+        details = {row[0]: _shaswata_entry(row) for row in db.execute(_SHASWATA_DETAILS, {"ids": ids})}
+    shaswata = {day: [] for day in days}
+    for sub_id, day in candidates:
+        if sub_id in details:
+            shaswata[day].append(details[sub_id])
+
+    bookings = {day: [] for day in days}
+    revenue = {day: 0.0 for day in days}
+    devotees = {day: set() for day in days}
+    for row in db.execute(_BOOKINGS, {"start": str(start), "end": str(end), "after": str(end + timedelta(days=1))}):
+        entry = {
+            "id": row[0], "name": row[1], "phone": row[2], "gothra": row[3], "seva": row[4],
+            "date_info": "One-Time", "notes": row[5] or "Booked via App", "address": row[6],
+            "nakshatra": row[7], "rashi": row[8], "type": "BOOKING",
+        }
+        on = {_as_date(row[10])} if row[10] is not None else set()
+        if row[11] is not None:
+            on.add(_as_date(row[11]))
+        for day in on:
+            if day in bookings:
+                bookings[day].append(entry)
+                revenue[day] += float(row[9] or 0)
+                devotees[day].add(row[12])
+
+    digests = {}
+    for core in get_panchang_cores(db, start, end, pc):
+        day = date.fromordinal(core.ordinal)
+        panchangam = pc.project(core)
+        pujas = sorted(shaswata[day], key=lambda p: (p["type"] != "LUNAR", p["id"]))
+        digests[day] = {
+            "date": day.isoformat(),
+            "shaswata": pujas,
+            "bookings": bookings[day],
+            "revenue": revenue[day],
+            "panchangam": panchangam,
+            "festivals": daily_festivals(panchangam, core),
+            "devotee_ids": sorted(devotees[day] | {p["devotee_id"] for p in pujas}),
+        }
+    return digests
+
+
+# =============================================================================
+# 2. STORE / READ
+# =============================================================================
+
+def _store(db: Session, digests: dict):
+    """Upserts digest rows. Does not commit."""
+    if not digests:
+        return
+    db.execute(text("""
+        INSERT INTO shaswata_daily_digests (digest_date, data_json, devotee_ids, built_at)
+        VALUES (:day, :data, :devotees, CURRENT_TIMESTAMP)
+        ON CONFLICT (digest_date) DO UPDATE SET
+            data_json = excluded.data_json, devotee_ids = excluded.devotee_ids, built_at = excluded.built_at
+    """), [
+        {
+            "day": str(day),
+            "data": json.dumps({k: v for k, v in digest.items() if k != "devotee_ids"},
+                               ensure_ascii=False, default=str),
+            # ",3,17," so one devotee's days are found with LIKE '%,17,%'
+            "devotees": "," + ",".join(str(d) for d in digest["devotee_ids"]) + ",",
+        }
+        for day, digest in digests.items()
+    ])
+
+
+def get_digest(db: Session, day: date) -> dict:
+    """The digest of `day`: a primary-key read, built and stored first if missing."""
+    data = db.execute(
+        text("SELECT data_json FROM shaswata_daily_digests WHERE digest_date = :day"),
+        {"day": str(day)},
+    ).scalar()
+    if data is not None:
+        return json.loads(data)
+    digest = build_digests(db, day, day)[day]
+    _store(db, {day: digest})
+    db.commit()
+    digest.pop("devotee_ids")
+    return json.loads(json.dumps(digest, default=str))
+
+
+# =============================================================================
+# 3. REFRESH
+# =============================================================================
+
+def refresh_digests(db: Session, days_behind: int = DIGEST_DAYS_BEHIND,
+                    days_ahead: int = DIGEST_DAYS_AHEAD) -> dict:
+    """
+    Scheduled job: rebuilds the digests from `days_behind` days ago to
+    `days_ahead` days ahead and drops rows outside that window.
+    """
+    today = date.today()
+    start, end = today - timedelta(days=days_behind), today + timedelta(days=days_ahead)
+    digests = build_digests(db, start, end)
+    dropped = db.execute(
+        text("DELETE FROM shaswata_daily_digests WHERE digest_date < :start OR digest_date > :end"),
+        {"start": str(start), "end": str(end)},
+    ).rowcount
+    _store(db, digests)
+    db.commit()
+    return {"days": len(digests), "dropped": max(dropped, 0), "start": str(start), "end": str(end)}
+
+
+def patch_digests(db: Session, devotee_id: int = None, subscription_id: int = None,
+                  transaction_id: int = None, days=()) -> int:
+    """
+    Rebuilds the stored digests a change touches:
+    - a transaction: its seva date and booking date
+    - a subscription: the stored days it now falls on, within the refresh
+      window (stored days outside it are dropped and rebuilt on read)
+    - a devotee (also implied by the two above): the stored days listing them
+    - `days`: those days
+    Returns the number of days rebuilt. Commits.
+    """
+    stored = {_as_date(d) for (d,) in db.execute(text("SELECT digest_date FROM shaswata_daily_digests"))}
+    if not stored:
+        return 0
+    days = set(days)
+
+    if transaction_id is not None:
+        row = db.execute(text("SELECT devotee_id, seva_date, transaction_date FROM transactions WHERE id = :id"),
+                         {"id": transaction_id}).fetchone()
+        if row:
+            devotee_id = devotee_id or row[0]
+            days |= {_as_date(value) for value in row[1:] if value is not None}
+
+    if subscription_id is not None:
+        row = db.execute(text(f"""
+            SELECT {_SUBSCRIPTION_COLUMNS}, devotee_id FROM shaswata_subscriptions
+            WHERE id = :id AND is_active = :active
+        """), {"id": subscription_id, "active": True}).fetchone()
+        if row:
+            devotee_id = devotee_id or row[-1]
+            # Matching is bounded to the refresh window, whatever old or far-off
+            # days have been read through get_digest
+            today = date.today()
+            start, end = today - timedelta(days=DIGEST_DAYS_BEHIND), today + timedelta(days=DIGEST_DAYS_AHEAD)
+            outside = {day for day in stored if day < start or day > end}
+            if outside:
+                db.execute(
+                    text("DELETE FROM shaswata_daily_digests WHERE digest_date < :start OR digest_date > :end"),
+                    {"start": str(start), "end": str(end)},
+                )
+                stored -= outside
+            pc = get_panchang_calculator(db)
+            rules = matching_rules(db)
+            lunar_dates = _lunar_dates(pc, rules, start, end)
+            days |= {day for _sub, day in _event_candidates([row[:-1]], start, end, lunar_dates, rules)}
+
+    if devotee_id is not None:
+        days |= {_as_date(d) for (d,) in db.execute(
+            text("SELECT digest_date FROM shaswata_daily_digests WHERE devotee_ids LIKE :pattern"),
+            {"pattern": f"%,{int(devotee_id)},%"},
+        )}
+
+    days = sorted(days & stored)
+    # Consecutive days are built together
+    run_start = None
+    for n, day in enumerate(days):
+        run_start = run_start or day
+        if n + 1 == len(days) or days[n + 1] != day + timedelta(days=1):
+            _store(db, build_digests(db, run_start, day))
+            run_start = None
+    db.commit()
+    return len(days)
+
+
+def clear_digests(db: Session) -> int:
+    """Drops every stored digest (rebuilt on read / by the next refresh). Commits."""
+    dropped = db.execute(text("DELETE FROM shaswata_daily_digests")).rowcount
+    db.commit()
+    return max(dropped, 0)
+
+
+def invalidate_digests(db: Session, **change):
+    """
+    Post-commit hook for writes the digests depend on: patch_digests(**change),
+    or clear_digests when called without a change. Never raises, since the
+    write it follows is already committed: on failure every stored digest is
+    dropped so reads rebuild them instead of serving stale data.
+    """
+    try:
+        if change:
+            patch_digests(db, **change)
+        else:
+            clear_digests(db)
+    except Exception as e:
+        db.rollback()
+        print(f"[WARN] Shaswata digest update failed ({e}); dropping stored digests")
+        try:
+            clear_digests(db)
+        except Exception as e:
+            db.rollback()
+            print(f"[WARN] Could not drop Shaswata digests: {e}")
@@ -0,0 +1,205 @@
+"""
+S.T.A.R. Backend - Shaswata Health Counters
+============================================
+Counters behind the Shaswata health dashboard (`/shaswata/health`), kept
+in `shaswata_health_counters` so the dashboard reads a table whose size
+depends on the number of distinct dispatch / feedback dates, not on the
+number of subscriptions.
+
+Rows are (metric, bucket) → value:
+
+    dispatch / <last_dispatch_date | "">   active subscriptions ("" = never dispatched)
+    feedback / <last_feedback_date | "">   active, dispatched subscriptions ("" = no feedback yet)
+    revenue  / ""                          amount paid by devotees with an active subscription
+
+Dispatch, feedback, subscription and booking writes adjust the counters in
+their own transaction; `rebuild_health_counters` recomputes them from the
+source tables (startup + nightly) to absorb writes made elsewhere
+(sync, legacy import). Bucket dates are ISO strings, so the "overdue"
+cut-offs are plain portable comparisons.
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+OVERDUE_DISPATCH_DAYS = 30      # Active subscription not dispatched for this long
+MISSING_FEEDBACK_DAYS = 90      # Dispatched, no feedback for this long
+DISPATCH_CYCLE_DAYS = 25        # "Upcoming this week": next dispatch due within 7 days
+UPCOMING_DAYS = 7
+
+
+def _bucket(value) -> str:
+    """Date column value (SQLite returns text through raw SQL) → ISO bucket, "" for NULL."""
+    return str(value)[:10] if value else ""
+
+
+# =============================================================================
+# 1. MAINTENANCE
+# =============================================================================
+
+def _for_update(db: Session, lock: bool) -> str:
+    """
+    Row lock clause for reading a `before` state that is about to change.
+    PostgreSQL only: SQLite has no row locks, its writers are serialized for
+    the whole transaction once it has written.
+    """
+    return " FOR UPDATE" if lock and db.get_bind().dialect.name == "postgresql" else ""
+
+
+def subscription_state(db: Session, subscription_id: int, lock: bool = False):
+    """
+    (is_active, last_dispatch_date, last_feedback_date) of a subscription, None
+    if missing. `lock`: hold the row until commit (read before changing it).
+    """
+    row = db.execute(text(f"""
+        SELECT is_active, last_dispatch_date, last_feedback_date
+        FROM shaswata_subscriptions WHERE id = :id{_for_update(db, lock)}
+    """), {"id": subscription_id}).fetchone()
+    return (bool(row[0]), _bucket(row[1]), _bucket(row[2])) if row else None
+
+
+def subscription_states(db: Session, subscription_ids, lock: bool = False) -> dict:
+    """subscription_state for many subscriptions, in one query: {id: state}."""
+    if not subscription_ids:
+        return {}
+    rows = db.execute(text(f"""
+        SELECT id, is_active, last_dispatch_date, last_feedback_date
+        FROM shaswata_subscriptions WHERE id IN :ids
+        ORDER BY id{_for_update(db, lock)}
+    """).bindparams(bindparam("ids", expanding=True)), {"ids": list(subscription_ids)})
+    return {row[0]: (bool(row[1]), _bucket(row[2]), _bucket(row[3])) for row in rows}
+
+
+def _state_counters(state) -> list:
+    """(metric, bucket) rows a subscription in `state` counts towards."""
+    if not state or not state[0]:
+        return []
+    counters = [("dispatch", state[1])]
+    if state[1]:
+        counters.append(("feedback", state[2]))
+    return counters
+
+
+def _bump(db: Session, deltas: dict):
+    """Adds {(metric, bucket): delta} to the counters (upsert). Does not commit."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    db.execute(text("""
+        INSERT INTO shaswata_health_counters (metric, bucket, value)
+        VALUES (:metric, :bucket, :delta)
+        ON CONFLICT (metric, bucket) DO UPDATE SET value = shaswata_health_counters.value + excluded.value
+    """), [{"metric": metric, "bucket": bucket, "delta": delta} for (metric, bucket), delta in deltas.items()])
+
+
+def apply_subscription_change(db: Session, before, after):
+    """
+    Moves a subscription's counts from its `before` state to its `after`
+    state (see subscription_state; None = did not exist). Does not commit.
+    """
+    apply_subscription_changes(db, [(before, after)])
+
+
+def apply_subscription_changes(db: Session, changes):
+    """apply_subscription_change for many (before, after) pairs, in one statement."""
+    deltas = {}
+    for before, after in changes:
+        for key in _state_counters(before):
+            deltas[key] = deltas.get(key, 0) - 1
+        for key in _state_counters(after):
+            deltas[key] = deltas.get(key, 0) + 1
+    _bump(db, deltas)
+
+
+def add_subscriber_revenue(db: Session, devotee_id: int, amount=None):
+    """
+    Revenue for a devotee's payment. With `amount`, counted when the
+    devotee has an active subscription (a booking). Without it, the
+    devotee has just become a subscriber: all of their payments so far
+    now count. Does not commit.
+    """
+    if amount is None:
+        amount = db.execute(text(
+            "SELECT COALESCE(SUM(amount_paid), 0) FROM transactions WHERE devotee_id = :d"
+        ), {"d": devotee_id}).scalar()
+    elif not db.execute(text(
+        "SELECT 1 FROM shaswata_subscriptions WHERE devotee_id = :d AND is_active = TRUE LIMIT 1"
+    ), {"d": devotee_id}).first():
+        return
+    _bump(db, {("revenue", ""): float(amount or 0)})
+
+
+def rebuild_health_counters(db: Session) -> dict:
+    """
+    Recomputes every counter from the source tables: one grouped scan of
+    the active subscriptions and one revenue sum. Commits.
+    """
+    deltas = {("revenue", ""): 0}
+    groups = db.execute(text("""
+        SELECT last_dispatch_date, last_feedback_date, COUNT(*)
+        FROM shaswata_subscriptions WHERE is_active = TRUE
+        GROUP BY last_dispatch_date, last_feedback_date
+    """)).fetchall()
+    for dispatched, feedback, count in groups:
+        for key in _state_counters((True, _bucket(dispatched), _bucket(feedback))):
+            deltas[key] = deltas.get(key, 0) + count
+
+    deltas[("revenue", "")] = float(db.execute(text("""
+        SELECT COALESCE(SUM(amount_paid), 0) FROM transactions
+        WHERE devotee_id IN (SELECT devotee_id FROM shaswata_subscriptions WHERE is_active = TRUE)
+    """)).scalar() or 0)
+
+    db.execute(text("DELETE FROM shaswata_health_counters"))
+    db.execute(text("""
+        INSERT INTO shaswata_health_counters (metric, bucket, value)
+        VALUES (:metric, :bucket, :value)
+    """), [{"metric": metric, "bucket": bucket, "value": value} for (metric, bucket), value in deltas.items()])
+    db.commit()
+    return {"rows": len(deltas), "subscriptions": sum(c for *_k, c in groups)}
+
+
+# =============================================================================
+# 2. DASHBOARD
+# =============================================================================
+
+def shaswata_health(db: Session, today: date = None) -> dict:
+    """Health dashboard numbers in one scan of the counters table."""
+    today = today or date.today()
+    params = {
+        "overdue": str(today - timedelta(days=OVERDUE_DISPATCH_DAYS)),
+        "feedback_due": str(today - timedelta(days=MISSING_FEEDBACK_DAYS)),
+        "upcoming": str(today + timedelta(days=UPCOMING_DAYS - DISPATCH_CYCLE_DAYS)),
+    }
+    query = text("""
+        SELECT COUNT(*),
+               SUM(CASE WHEN metric = 'dispatch' THEN value ELSE 0 END),
+               SUM(CASE WHEN metric = 'dispatch' AND bucket <> '' AND bucket <= :overdue THEN value ELSE 0 END),
+               SUM(CASE WHEN metric = 'dispatch' AND bucket = '' THEN value ELSE 0 END),
+               SUM(CASE WHEN metric = 'feedback' AND (bucket = '' OR bucket <= :feedback_due) THEN value ELSE 0 END),
+               SUM(CASE WHEN metric = 'dispatch' AND (bucket = '' OR bucket <= :upcoming) THEN value ELSE 0 END),
+               SUM(CASE WHEN metric = 'revenue' THEN value ELSE 0 END)
+        FROM shaswata_health_counters
+    """)
+    row = db.execute(query, params).fetchone()
+    if not row[0]:
+        # Never built (new database): compute once from the source tables
+        rebuild_health_counters(db)
+        row = db.execute(query, params).fetchone()
+
+    active, overdue, never, missing, upcoming = (int(v or 0) for v in row[1:6])
+    return {
+        "active_subscriptions": active,
+        "overdue_dispatches": overdue,
+        "never_dispatched": never,
+        "missing_feedback": missing,
+        "upcoming_this_week": upcoming,
+        "total_revenue": float(row[6] or 0),
+        "health_score": max(0, 100 - (overdue * 5) - (never * 3) - (missing * 2)),
+    }
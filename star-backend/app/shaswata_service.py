@@ -4,100 +4,113 @@ S.T.A.R. Backend - Shaswata Seva Service
 Core business logic for Shaswata (Perpetual Pooja) lifecycle management.
 
 Responsibilities:
-1. Event Population — Auto-generate upcoming `shaswata_events` for next 30 days
-2. Messaging — Abstraction layer for WhatsApp/SMS (Console mode for V1)
+1. Event Population — Auto-generate upcoming `shaswata_events` for next 30 days,
+   and the year-ahead plan (chunked, resumable) built at startup
+2. Messaging — Abstraction layer for WhatsApp/SMS (Console mode for V1);
+   bulk campaigns live in app.messaging
 3. Delivery Feedback — 4-day post-dispatch follow-up logic
 """
 
-from datetime import date, datetime, timedelta
-from sqlalchemy import text
+import json
+import threading
+from datetime import date, timedelta
+from sqlalchemy import text, bindparam
 from sqlalchemy.orm import Session
 
-from .panchang import PanchangCalculator
+from .panchang import resolve_masa, resolve_paksha, resolve_tithi
+from .tithi_observance import (
+    observance_dates_in_range, select_occurrences, parse_tithi_rule, parse_adhika_rule,
+    DEFAULT_TITHI_RULE, DEFAULT_ADHIKA_RULE,
+)
+from .crud import get_panchang_calculator
+from .database import has_shaswata_event_key
+from .messaging import TEMPLATES, format_address
+from .shaswata_health import (
+    subscription_state, subscription_states, apply_subscription_change, apply_subscription_changes,
+)
 
 
 # =============================================================================
 # 1. EVENT POPULATION SERVICE
 # =============================================================================
 
+# Rows per multi-row INSERT (3 bound parameters each; stays under SQLite's limit)
+INSERT_BATCH_ROWS = 500
+
+# scheduler_watermarks rows of the event scheduler and the year-ahead planner
+WATERMARK_NAME = "shaswata_events"
+YEARLY_WATERMARK_NAME = "shaswata_yearly"
+
+# Year-ahead planner: window length and subscriptions per chunk (one commit each)
+YEARLY_HORIZON_DAYS = 365
+YEARLY_CHUNK_ROWS = 1000
+
+# Days read before a window so an Adhika masa entry just before it is seen
+# when choosing between Adhika and Nija (more than one lunation)
+ADHIKA_LOOKBACK_DAYS = 60
+
+YEARLY_STATUS = {"running": False, "progress": None, "horizon": None, "error": None}
+_yearly_lock = threading.Lock()
+
+_SUBSCRIPTION_COLUMNS = "id, subscription_type, event_day, event_month, maasa, paksha, tithi"
+
+# Watermark `last_modified` while there are no subscriptions: older than any row
+WATERMARK_EPOCH = "1970-01-01 00:00:00"
+
+
 def populate_upcoming_events(db: Session, days_ahead: int = 30) -> dict:
     """
     Daily Job: Scan all active subscriptions and create `shaswata_events`
     for any seva scheduled within the next `days_ahead` days.
     
-    Logic:
-    - GREGORIAN: Match event_day + event_month against each date in range
-    - LUNAR: Use PanchangCalculator to compute Tithi for each date and match
+    Logic (set-based):
+    - LUNAR: one (Maasa, Paksha, Tithi) → dates map for the whole range from the
+      tithi observance tables (kshaya / vriddhi / Adhika aware, see
+      app.tithi_observance and matching_rules); subscriptions are grouped by
+      their resolved key
+    - GREGORIAN: event_day + event_month in each year the range touches
+    - All candidates are written with multi-row INSERT ... ON CONFLICT DO NOTHING
+      in one transaction (unique key: subscription_id + year + scheduled_date)
     
-    Idempotent: Skips if an event already exists for that subscription + year + date.
+    Idempotent: existing events are left untouched. Also resets the watermark
+    used by populate_incremental_events.
     
     Returns: Summary dict with counts of events created.
     """
     today = date.today()
-    current_year = today.year
-    pc = PanchangCalculator()
-    
-    events_created = 0
-    events_skipped = 0
+    end = today + timedelta(days=days_ahead)
+    pc = get_panchang_calculator(db)
+    rules = matching_rules(db)
     errors = []
     
-    # --- Fetch all active subscriptions ---
-    subs = db.execute(text("""
-        SELECT id, subscription_type, event_day, event_month, 
-               maasa, paksha, tithi, devotee_id
+    newest = _newest_subscription_change(db)
+    subs = db.execute(text(f"""
+        SELECT {_SUBSCRIPTION_COLUMNS}
         FROM shaswata_subscriptions
-        WHERE is_active = 1
-    """)).fetchall()
+        WHERE is_active = :active
+    """), {"active": True}).fetchall()
     
     if not subs:
+        _save_watermark(db, pc, rules, newest, end)
+        db.commit()
         return {"events_created": 0, "events_skipped": 0, "message": "No active subscriptions found"}
     
-    # --- Pre-compute Panchangam for every day in the range ---
-    panchangam_cache = {}
-    for offset in range(days_ahead):
-        target_date = today + timedelta(days=offset)
-        try:
-            panchang = pc.calculate(target_date)
-            panchangam_cache[target_date] = panchang["attributes"]
-        except Exception as e:
-            errors.append(f"Panchang error for {target_date}: {str(e)}")
-            continue
-    
-    for sub in subs:
-        sub_id, sub_type, event_day, event_month, maasa, paksha, tithi, devotee_id = sub
-        
-        try:
-            if sub_type == "GREGORIAN":
-                # Check if the fixed date falls within next N days
-                try:
-                    target = date(current_year, event_month, event_day)
-                except (ValueError, TypeError):
-                    continue  # Invalid date (e.g., Feb 30)
-                
-                if today <= target <= today + timedelta(days=days_ahead):
-                    _create_event_if_not_exists(db, sub_id, target, current_year)
-                    events_created += 1
-                else:
-                    events_skipped += 1
-                    
-            elif sub_type == "LUNAR":
-                # Scan each day — if Panchangam matches Maasa+Paksha+Tithi, create event
-                for target_date, attrs in panchangam_cache.items():
-                    if (attrs.get("maasa") == maasa and 
-                        attrs.get("paksha") == paksha and 
-                        attrs.get("tithi") == tithi):
-                        
-                        created = _create_event_if_not_exists(db, sub_id, target_date, current_year)
-                        if created:
-                            events_created += 1
-                        else:
-                            events_skipped += 1
-                        break  # Only one match per cycle
-                        
-        except Exception as e:
-            errors.append(f"Sub {sub_id}: {str(e)}")
-    
-    db.commit()
+    # --- Lunar dates in the range: (masa, paksha, tithi) → observance dates ---
+    lunar_dates = {}
+    try:
+        lunar_dates = _lunar_dates(pc, rules, today, end)
+    except Exception as e:
+        errors.append(f"Panchang error: {str(e)}")
+    
+    candidates = _event_candidates(subs, today, end, lunar_dates, rules)
+    try:
+        events_created = _insert_events(db, candidates)
+        _save_watermark(db, pc, rules, newest, end)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    events_skipped = len(candidates) - events_created
     
     return {
         "events_created": events_created,
@@ -109,25 +122,341 @@ def populate_upcoming_events(db: Session, days_ahead: int = 30) -> dict:
     }
 
 
-def _create_event_if_not_exists(db: Session, subscription_id: int, scheduled_date: date, year: int) -> bool:
+def populate_incremental_events(db: Session, days_ahead: int = 30) -> dict:
     """
-    Insert a shaswata_event only if one doesn't already exist for this sub+year+date.
-    Returns True if created, False if already exists.
+    Hourly Job: same result as populate_upcoming_events, but only touches
+    what changed since the last run (see the `scheduler_watermarks` row):
+    
+    - subscriptions created / edited since the stored `last_modified`,
+      over the whole window
+    - days newly exposed at the end of the horizon, for the subscriptions
+      that fall on them (matched in SQL by their stored lunar / Gregorian date)
+    
+    Runs a full population instead when there is no watermark yet or the
+    Panchang location / calculator changed since it was written.
     """
-    existing = db.execute(text("""
-        SELECT id FROM shaswata_events 
-        WHERE subscription_id = :sub_id AND year = :year AND scheduled_date = :sched_date
-    """), {"sub_id": subscription_id, "year": year, "sched_date": scheduled_date}).fetchone()
+    today = date.today()
+    end = today + timedelta(days=days_ahead)
+    pc = get_panchang_calculator(db)
+    rules = matching_rules(db)
+    
+    from .models import SchedulerWatermark
+    mark = db.get(SchedulerWatermark, WATERMARK_NAME)
+    if (mark is None or mark.horizon is None or mark.last_modified is None
+            or not _watermark_matches(mark, pc, rules)):
+        result = populate_upcoming_events(db, days_ahead=days_ahead)
+        result["mode"] = "full"
+        return result
+    
+    newest = _newest_subscription_change(db) or mark.last_modified
+    candidates = []
+    
+    # --- 1. New / edited subscriptions: the whole window ---
+    changed = db.execute(text(f"""
+        SELECT {_SUBSCRIPTION_COLUMNS}
+        FROM shaswata_subscriptions
+        WHERE is_active = :active AND last_modified >= :since
+    """), {"active": True, "since": mark.last_modified}).fetchall()
+    if changed:
+        lunar_dates = {}
+        if any(sub[1] == "LUNAR" for sub in changed):
+            lunar_dates = _lunar_dates(pc, rules, today, end)
+        candidates += _event_candidates(changed, today, end, lunar_dates, rules)
+    
+    # --- 2. Newly exposed days: the subscriptions falling on them ---
+    first_new = max(mark.horizon + timedelta(days=1), today)
+    new_days = max((end - first_new).days + 1, 0)
+    matched = []
+    if new_days:
+        lunar_dates = _lunar_dates(pc, rules, first_new, end)
+        matched = _subscriptions_on(db, lunar_dates, first_new, end)
+        candidates += _event_candidates(matched, first_new, end, lunar_dates, rules)
+    
+    candidates = list(dict.fromkeys(candidates))
+    try:
+        events_created = _insert_events(db, candidates)
+        _save_watermark(db, pc, rules, newest, max(mark.horizon, end))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     
-    if existing:
-        return False
+    return {
+        "mode": "incremental",
+        "events_created": events_created,
+        "events_skipped": len(candidates) - events_created,
+        "changed_subscriptions": len(changed),
+        "new_days": new_days,
+        "subscriptions_checked": len({sub[0] for sub in changed} | {sub[0] for sub in matched}),
+        "message": f"Populated {events_created} new events "
+                   f"({len(changed)} changed subscriptions, {new_days} new days)"
+    }
+
+
+def populate_yearly_events(db: Session, days_ahead: int = YEARLY_HORIZON_DAYS,
+                           chunk_size: int = YEARLY_CHUNK_ROWS, progress=None) -> dict:
+    """
+    Startup Job: plan `shaswata_events` for the year ahead.
     
-    db.execute(text("""
-        INSERT INTO shaswata_events (subscription_id, scheduled_date, year, status)
-        VALUES (:sub_id, :sched_date, :year, 'PENDING')
-    """), {"sub_id": subscription_id, "sched_date": scheduled_date, "year": year})
+    The lunar dates of the whole window come from the lunar index (one map,
+    ~360 keys); subscriptions are then read `chunk_size` at a time in id
+    order and each chunk's events are inserted and committed together with
+    the position reached. A run that stops midway resumes after the last
+    committed chunk when started again on the same day.
     
-    return True
+    `progress(done, total)` is called after every chunk.
+    Returns: Summary dict with counts of events created.
+    """
+    if not _yearly_lock.acquire(blocking=False):
+        return {"events_created": 0, "events_skipped": 0, "message": "Year-ahead planning already running"}
+    try:
+        YEARLY_STATUS.update(running=True, progress=None, error=None)
+        result = _plan_year(db, days_ahead, chunk_size, progress)
+        YEARLY_STATUS["horizon"] = result["horizon"]
+        return result
+    except Exception as e:
+        db.rollback()
+        YEARLY_STATUS["error"] = str(e)
+        raise
+    finally:
+        YEARLY_STATUS["running"] = False
+        _yearly_lock.release()
+
+
+def _plan_year(db: Session, days_ahead: int, chunk_size: int, progress) -> dict:
+    from .models import SchedulerWatermark
+    today = date.today()
+    end = today + timedelta(days=days_ahead - 1)
+    pc = get_panchang_calculator(db)
+    rules = matching_rules(db)
+
+    mark = db.get(SchedulerWatermark, YEARLY_WATERMARK_NAME)
+    after = 0
+    if (mark is not None and mark.cursor is not None and mark.horizon == end
+            and _watermark_matches(mark, pc, rules)):
+        after = mark.cursor
+        newest = mark.last_modified
+        print(f"[BG] Shaswata yearly plan: resuming after subscription {after}")
+    else:
+        newest = _newest_subscription_change(db)
+
+    lunar_dates = _lunar_dates(pc, rules, today, end)
+    total = db.execute(text("""
+        SELECT COUNT(*) FROM shaswata_subscriptions WHERE is_active = :active
+    """), {"active": True}).scalar()
+    done = db.execute(text("""
+        SELECT COUNT(*) FROM shaswata_subscriptions WHERE is_active = :active AND id <= :after
+    """), {"active": True, "after": after}).scalar()
+
+    events_created = events_skipped = 0
+    YEARLY_STATUS["progress"] = f"{done}/{total}"
+    while True:
+        subs = db.execute(text(f"""
+            SELECT {_SUBSCRIPTION_COLUMNS}
+            FROM shaswata_subscriptions
+            WHERE is_active = :active AND id > :after
+            ORDER BY id
+            LIMIT :limit
+        """), {"active": True, "after": after, "limit": chunk_size}).fetchall()
+        if not subs:
+            break
+        after = subs[-1][0]
+        candidates = _event_candidates(subs, today, end, lunar_dates, rules)
+        created = _insert_events(db, candidates)
+        _save_watermark(db, pc, rules, newest, end, name=YEARLY_WATERMARK_NAME, cursor=after)
+        db.commit()
+
+        events_created += created
+        events_skipped += len(candidates) - created
+        done += len(subs)
+        YEARLY_STATUS["progress"] = f"{done}/{total}"
+        if progress:
+            progress(done, total)
+
+    _save_watermark(db, pc, rules, newest, end, name=YEARLY_WATERMARK_NAME)
+    db.commit()
+    return {
+        "events_created": events_created,
+        "events_skipped": events_skipped,
+        "subscriptions_checked": done,
+        "horizon": end.isoformat(),
+        "message": f"Planned {events_created} new events up to {end.isoformat()} "
+                   f"({events_skipped} already existed)"
+    }
+
+
+def _newest_subscription_change(db: Session):
+    """
+    Newest subscription last_modified, as stored (compared back in SQL);
+    WATERMARK_EPOCH when there are none, so the first one counts as changed.
+    Rows without one (raw inserts) are stamped first so they count as changed.
+    """
+    db.execute(text("""
+        UPDATE shaswata_subscriptions SET last_modified = CURRENT_TIMESTAMP
+        WHERE last_modified IS NULL
+    """))
+    newest = db.execute(text("SELECT MAX(last_modified) FROM shaswata_subscriptions")).scalar()
+    return str(newest) if newest is not None else WATERMARK_EPOCH
+
+
+def matching_rules(db: Session) -> tuple:
+    """
+    (tithi_rule, adhika_rule) for LUNAR subscriptions, from the
+    `shaswata_tithi_rule` / `shaswata_adhika_rule` SystemSettings.
+    Invalid values fall back to the defaults (udaya, nija).
+    """
+    from .models import SystemSetting
+    settings = {
+        s.key: s.value
+        for s in db.query(SystemSetting).filter(
+            SystemSetting.key.in_(["shaswata_tithi_rule", "shaswata_adhika_rule"])
+        ).all()
+    }
+    try:
+        tithi_rule = parse_tithi_rule(settings.get("shaswata_tithi_rule"))
+    except ValueError as e:
+        print(f"[WARN] {e}; using '{DEFAULT_TITHI_RULE}'")
+        tithi_rule = DEFAULT_TITHI_RULE
+    try:
+        adhika_rule = parse_adhika_rule(settings.get("shaswata_adhika_rule"))
+    except ValueError as e:
+        print(f"[WARN] {e}; using '{DEFAULT_ADHIKA_RULE}'")
+        adhika_rule = DEFAULT_ADHIKA_RULE
+    return tithi_rule, adhika_rule
+
+
+def _lunar_dates(pc, rules: tuple, start: date, end: date) -> dict:
+    """Observance dates by (masa, paksha, tithi) for [start, end], plus the Adhika look-back."""
+    return observance_dates_in_range(pc, start - timedelta(days=ADHIKA_LOOKBACK_DAYS), end, rules[0])
+
+
+def _watermark_matches(mark, pc, rules: tuple) -> bool:
+    """True when a watermark was written for this location, calculator and matching rules."""
+    return (mark.location_hash == pc.location_hash and mark.calc_version == pc.CALC_VERSION
+            and mark.rules == "/".join(rules))
+
+
+def _save_watermark(db: Session, pc, rules: tuple, last_modified, horizon: date,
+                    name: str = WATERMARK_NAME, cursor: int = None):
+    """Upserts a scheduler watermark (committed with the events by the caller)."""
+    from .models import SchedulerWatermark
+    mark = db.get(SchedulerWatermark, name) or SchedulerWatermark(name=name)
+    mark.last_modified = last_modified
+    mark.horizon = horizon
+    mark.cursor = cursor
+    mark.rules = "/".join(rules)
+    mark.location_hash = pc.location_hash
+    mark.calc_version = pc.CALC_VERSION
+    db.add(mark)
+
+
+def _event_candidates(subs, start: date, end: date, lunar_dates: dict, rules: tuple) -> list:
+    """
+    (subscription_id, scheduled_date) pairs for subscriptions falling in
+    [start, end]. `lunar_dates` is _lunar_dates for that window; the Adhika
+    rule picks between Adhika and Nija masa dates.
+    """
+    resolved = {}       # (maasa, paksha, tithi) as stored → index key, resolved once per distinct value
+    candidates = []
+    for sub_id, sub_type, event_day, event_month, maasa, paksha, tithi in subs:
+        if sub_type == "GREGORIAN":
+            for year in range(start.year, end.year + 1):
+                try:
+                    target = date(year, event_month, event_day)
+                except (ValueError, TypeError):
+                    continue  # Invalid date (e.g., Feb 30) or Feb 29 outside a leap year
+                if start <= target <= end:
+                    candidates.append((sub_id, target))
+
+        elif sub_type == "LUNAR":
+            raw = (maasa, paksha, tithi)
+            if raw not in resolved:
+                resolved[raw] = (resolve_masa(maasa), resolve_paksha(paksha), resolve_tithi(tithi))
+            for matched in select_occurrences(lunar_dates.get(resolved[raw], ()), rules[1]):
+                if start <= matched <= end:
+                    candidates.append((sub_id, matched))
+    return candidates
+
+
+def _subscriptions_on(db: Session, lunar_dates: dict, start: date, end: date) -> list:
+    """
+    Active subscriptions whose date falls in [start, end]: LUNAR ones whose
+    stored (maasa, paksha, tithi) has a `lunar_dates` entry in the range, and
+    GREGORIAN ones on one of the (month, day) pairs in the range.
+    """
+    # Distinct stored spellings only — resolved here, filtered in SQL
+    triples = db.execute(text("""
+        SELECT DISTINCT maasa, paksha, tithi FROM shaswata_subscriptions
+        WHERE is_active = :active AND subscription_type = 'LUNAR'
+    """), {"active": True}).fetchall()
+    keys = {key for key, dates in lunar_dates.items() if any(start <= d <= end for d, _a in dates)}
+    wanted = [
+        tuple(t) for t in triples
+        if (resolve_masa(t[0]), resolve_paksha(t[1]), resolve_tithi(t[2])) in keys
+    ]
+    month_days = sorted({((start + timedelta(days=i)).month, (start + timedelta(days=i)).day)
+                         for i in range((end - start).days + 1)})
+
+    clauses, params = [], {"active": True}
+    for n, (maasa, paksha, tithi) in enumerate(wanted):
+        clauses.append(f"(subscription_type = 'LUNAR' AND maasa = :m{n} AND paksha = :p{n} AND tithi = :t{n})")
+        params.update({f"m{n}": maasa, f"p{n}": paksha, f"t{n}": tithi})
+    for n, (month, day) in enumerate(month_days):
+        clauses.append(f"(subscription_type = 'GREGORIAN' AND event_month = :gm{n} AND event_day = :gd{n})")
+        params.update({f"gm{n}": month, f"gd{n}": day})
+    if not clauses:
+        return []
+    return db.execute(text(f"""
+        SELECT {_SUBSCRIPTION_COLUMNS}
+        FROM shaswata_subscriptions
+        WHERE is_active = :active AND ({" OR ".join(clauses)})
+    """), params).fetchall()
+
+
+def _insert_events(db: Session, candidates) -> int:
+    """
+    Inserts PENDING events for (subscription_id, scheduled_date) pairs,
+    INSERT_BATCH_ROWS per statement. `year` is the year of the scheduled
+    date. Uses ON CONFLICT DO NOTHING on the unique key, or NOT EXISTS when
+    the key could not be created (see database._migrate_shaswata_event_key).
+    Returns rows inserted. Does not commit.
+    """
+    candidates = list(dict.fromkeys(candidates))
+    keyed = has_shaswata_event_key()
+    created = 0
+    for i in range(0, len(candidates), INSERT_BATCH_ROWS):
+        batch = candidates[i:i + INSERT_BATCH_ROWS]
+        values, params = [], {}
+        for n, (sub_id, scheduled_date) in enumerate(batch):
+            values.append(f"(:s{n}, :d{n}, :y{n}, 'PENDING')")
+            params.update({f"s{n}": sub_id, f"d{n}": scheduled_date, f"y{n}": scheduled_date.year})
+        if keyed:
+            statement = f"""
+                INSERT INTO shaswata_events (subscription_id, scheduled_date, year, status)
+                VALUES {", ".join(values)}
+                ON CONFLICT (subscription_id, year, scheduled_date) DO NOTHING
+            """
+        else:
+            # VALUES columns are column1 .. column4 in both PostgreSQL and SQLite
+            statement = f"""
+                INSERT INTO shaswata_events (subscription_id, scheduled_date, year, status)
+                SELECT column1, column2, column3, column4 FROM (VALUES {", ".join(values)}) AS batch
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM shaswata_events e
+                    WHERE e.subscription_id = batch.column1 AND e.year = batch.column3
+                      AND e.scheduled_date = batch.column2
+                )
+            """
+        created += max(db.execute(text(statement), params).rowcount, 0)
+    return created
+
+
+def _create_event_if_not_exists(db: Session, subscription_id: int, scheduled_date: date, year: int) -> bool:
+    """
+    Insert a shaswata_event only if one doesn't already exist for this sub+year+date.
+    Returns True if created, False if already exists.
+    """
+    return _insert_events(db, [(subscription_id, scheduled_date)]) > 0
 
 
 # =============================================================================
@@ -224,23 +553,28 @@ def mark_event_dispatched(db: Session, event_id: int, dispatch_ref: str = None,
     
     today_str = str(date.today())
     
-    # Update event
-    db.execute(text("""
+    # Update event (guarded: a concurrent dispatch may have won since the read)
+    updated = db.execute(text("""
         UPDATE shaswata_events 
         SET status = 'DISPATCHED', 
             dispatch_date = :today, 
             dispatch_ref = :ref,
             dispatch_method = :method,
             updated_at = CURRENT_TIMESTAMP
-        WHERE id = :eid
-    """), {"today": today_str, "ref": dispatch_ref, "method": dispatch_method, "eid": event_id})
+        WHERE id = :eid AND status <> 'DISPATCHED'
+    """), {"today": today_str, "ref": dispatch_ref, "method": dispatch_method, "eid": event_id}).rowcount
+    if updated == 0:
+        db.rollback()
+        return {"event_id": event_id, "message": "Already dispatched", "status": "DISPATCHED"}
     
-    # Also update parent subscription's last_dispatch_date
+    # Also update parent subscription's last_dispatch_date (and the health counters)
+    before = subscription_state(db, event[1], lock=True)
     db.execute(text("""
         UPDATE shaswata_subscriptions 
         SET last_dispatch_date = :today, updated_at = CURRENT_TIMESTAMP
         WHERE id = :sub_id
     """), {"today": today_str, "sub_id": event[1]})
+    apply_subscription_change(db, before, subscription_state(db, event[1]))
     
     # Log the dispatch notification
     devotee = db.execute(text("""
@@ -338,6 +672,135 @@ def dispatch_adhoc_event(db: Session, subscription_id: int, dispatch_date: date,
     return mark_event_dispatched(db, event[0], dispatch_ref, dispatch_method)
 
 
+def dispatch_events_batch(db: Session, items, user_id: int = None, username: str = None) -> dict:
+    """
+    Marks many events DISPATCHED in one transaction — a courier batch.
+    `items`: dicts with event_id, dispatch_ref, dispatch_method.
+
+    Set-based: one SELECT of the events, one UPDATE of the events from a
+    VALUES list (per INSERT_BATCH_ROWS), one UPDATE of their subscriptions,
+    one executemany of the communication logs and one audit record.
+    The event UPDATE skips events already DISPATCHED and returns the ids it
+    changed; only those are reported DISPATCHED, logged and counted, so
+    concurrent batches (or single dispatches) never dispatch an event twice.
+    Returns a per-item status: DISPATCHED | ALREADY_DISPATCHED | NOT_FOUND | DUPLICATE.
+    """
+    from .models import AuditLog
+    today_str = str(date.today())
+    ids = list({item["event_id"] for item in items})
+    found = {}
+    for i in range(0, len(ids), INSERT_BATCH_ROWS):
+        for row in db.execute(text("""
+            SELECT se.id, se.subscription_id, se.status, d.id, d.phone_number
+            FROM shaswata_events se
+            JOIN shaswata_subscriptions ss ON se.subscription_id = ss.id
+            LEFT JOIN devotees d ON ss.devotee_id = d.id
+            WHERE se.id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), {"ids": ids[i:i + INSERT_BATCH_ROWS]}):
+            found[row[0]] = row
+
+    statuses, todo = {}, []
+    for item in items:
+        event_id = item["event_id"]
+        if event_id in statuses:
+            continue
+        if event_id not in found:
+            statuses[event_id] = "NOT_FOUND"
+        elif found[event_id][2] == "DISPATCHED":
+            statuses[event_id] = "ALREADY_DISPATCHED"
+        else:
+            statuses[event_id] = "DISPATCHED"
+            todo.append(item)
+
+    if todo:
+        # 1. Events, from a VALUES list of (id, ref, method); only those still not
+        #    DISPATCHED change, the others went out in a concurrent dispatch
+        dispatched = set()
+        for i in range(0, len(todo), INSERT_BATCH_ROWS):
+            values, params = [], {"today": today_str}
+            for n, item in enumerate(todo[i:i + INSERT_BATCH_ROWS]):
+                values.append(f"(:e{n}, :r{n}, :m{n})")
+                params.update({f"e{n}": item["event_id"], f"r{n}": item.get("dispatch_ref"),
+                               f"m{n}": item.get("dispatch_method") or "POST"})
+            dispatched.update(event_id for (event_id,) in db.execute(text(f"""
+                WITH batch (event_id, ref, method) AS (VALUES {", ".join(values)})
+                UPDATE shaswata_events
+                SET status = 'DISPATCHED',
+                    dispatch_date = :today,
+                    dispatch_ref = batch.ref,
+                    dispatch_method = batch.method,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM batch
+                WHERE shaswata_events.id = batch.event_id
+                  AND shaswata_events.status <> 'DISPATCHED'
+                RETURNING shaswata_events.id
+            """), params))
+        for item in todo:
+            if item["event_id"] not in dispatched:
+                statuses[item["event_id"]] = "ALREADY_DISPATCHED"
+        todo = [item for item in todo if item["event_id"] in dispatched]
+
+    if todo:
+        # 2. Parent subscriptions' last_dispatch_date (and the health counters),
+        #    read after the event UPDATE and locked until commit
+        sub_ids = list({found[item["event_id"]][1] for item in todo})
+        before = subscription_states(db, sub_ids, lock=True)
+        db.execute(text("""
+            UPDATE shaswata_subscriptions
+            SET last_dispatch_date = :today, updated_at = CURRENT_TIMESTAMP
+            WHERE id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), {"today": today_str, "ids": sub_ids})
+        apply_subscription_changes(db, [
+            (state, (state[0], today_str, state[2])) for state in before.values()
+        ])
+
+        # 3. Dispatch notifications, one executemany
+        logs = [
+            {"did": found[item["event_id"]][3], "sid": found[item["event_id"]][1], "eid": item["event_id"],
+             "phone": found[item["event_id"]][4],
+             "preview": f"Prasadam dispatched for your Shaswata Seva. Ref: {item.get('dispatch_ref') or 'N/A'}"}
+            for item in todo if found[item["event_id"]][3] is not None
+        ]
+        if logs:
+            db.execute(text("""
+                INSERT INTO communication_logs
+                    (devotee_id, subscription_id, event_id, message_type, channel,
+                     recipient_phone, status, message_preview)
+                VALUES (:did, :sid, :eid, 'DISPATCH', 'WHATSAPP', :phone, 'SENT', :preview)
+            """), logs)
+
+    results, seen = [], set()
+    for item in items:
+        event_id = item["event_id"]
+        status = "DUPLICATE" if event_id in seen else statuses[event_id]
+        seen.add(event_id)
+        results.append({"event_id": event_id, "status": status,
+                        "dispatch_ref": item.get("dispatch_ref") if status == "DISPATCHED" else None})
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+    # 4. One audit record for the whole batch
+    db.add(AuditLog(
+        user_id=user_id,
+        username=username,
+        action="DISPATCH",
+        resource_type="SHASWATA_EVENT",
+        details=json.dumps({"dispatch_date": today_str, "counts": counts,
+                            "event_ids": [item["event_id"] for item in todo]}),
+    ))
+    db.commit()
+
+    return {
+        "dispatch_date": today_str,
+        "dispatched": counts.get("DISPATCHED", 0),
+        "counts": counts,
+        "results": results,
+        "message": f"{counts.get('DISPATCHED', 0)} of {len(items)} events dispatched",
+    }
+
+
 def get_pending_delivery_checks(db: Session) -> list:
     """
     Get all events that were dispatched 4+ days ago but haven't received delivery feedback.
@@ -379,9 +842,10 @@ def get_pending_delivery_checks(db: Session) -> list:
 
 class MessagingService:
     """
-    Abstraction for sending messages to devotees.
+    Abstraction for sending messages to devotees, one at a time.
     V1: Prints to console + logs to communication_logs table.
     V2: Will integrate with Twilio/Interakt WhatsApp API.
+    Bulk sends go through campaigns and the outbox (app.messaging).
     """
     
     @staticmethod
@@ -401,12 +865,7 @@ class MessagingService:
         if not event:
             return {"status": "FAILED", "error": "Event not found"}
         
-        message = (
-            f"🙏 Namaste {event[3]}!\n"
-            f"Your Shaswata Seva ({event[5]}) is scheduled for tomorrow ({event[1]}).\n"
-            f"May Lord Subramanya bless you and your family.\n"
-            f"- Sri Subramanya Temple"
-        )
+        message = TEMPLATES["REMINDER"].render({"name": event[3], "seva": event[5], "date": event[1]})
         
         channel = event[7] or "WHATSAPP"
         
@@ -439,14 +898,7 @@ class MessagingService:
         if not event:
             return {"status": "FAILED", "error": "Event not found"}
         
-        message = (
-            f"🙏 Namaste {event[3]}!\n"
-            f"We dispatched Prasadam for your {event[5]} seva on {event[1]}.\n"
-            f"Did you receive it?\n"
-            f"Reply YES or NO.\n"
-            f"If your address has changed, please update it.\n"
-            f"- Sri Subramanya Temple"
-        )
+        message = TEMPLATES["DELIVERY_CHECK"].render({"name": event[3], "seva": event[5], "date": event[1]})
         
         channel = event[7] or "WHATSAPP"
         
@@ -472,14 +924,8 @@ class MessagingService:
         if not devotee:
             return {"status": "FAILED", "error": "Devotee not found"}
         
-        addr = f"{devotee[3] or ''}, {devotee[4] or ''} - {devotee[5] or ''}".strip(", -")
-        message = (
-            f"🙏 Namaste {devotee[1]}!\n"
-            f"Your annual Shaswata Seva is coming up soon.\n"
-            f"Current address: {addr}\n"
-            f"Is this correct? Reply YES or send us your new address.\n"
-            f"- Sri Subramanya Temple"
-        )
+        addr = format_address(devotee[3], devotee[4], devotee[5])
+        message = TEMPLATES["ADDRESS_VERIFY"].render({"name": devotee[1], "address": addr})
         
         # V1: Console
         print(f"\n📱 [WHATSAPP] ADDRESS VERIFY → {devotee[2]}")
@@ -493,6 +939,16 @@ class MessagingService:
         return {"status": "SENT", "channel": "WHATSAPP", "to": devotee[2]}
 
 
+def send_due_reminders(db: Session, days_ahead: int = 1) -> dict:
+    """
+    Scheduled Job: queues a reminder campaign for the PENDING events
+    `days_ahead` days from today that have not been reminded yet.
+    Messages are sent by the outbox dispatcher (app.messaging).
+    """
+    from .messaging import create_campaign
+    return create_campaign(db, "reminders", target_date=date.today() + timedelta(days=days_ahead))
+
+
 # =============================================================================
 # 5. INTERNAL HELPERS
 # =============================================================================
@@ -0,0 +1,206 @@
+"""
+S.T.A.R. Tithi Observance
+==========================
+Which civil day observes each tithi, derived from the exact tithi spans
+(app.panchang_spans) instead of the one-instant-per-day Panchangam.
+
+Rule (setting `shaswata_tithi_rule`):
+
+    "udaya"  - the tithi prevailing at local sunrise owns the day
+    "HH:MM"  - the tithi prevailing at that IST time owns the day
+               (e.g. "13:00" for an aparahna observance)
+
+Every tithi span is assigned to exactly one day:
+
+ - the first day whose anchor instant (sunrise / the configured time) falls
+   inside the span. A vriddhi tithi, covering two anchors, is observed on
+   the first of them.
+ - a kshaya tithi, which covers no anchor, is observed on the day during
+   which it runs, i.e. the day of the last anchor before it begins. That
+   day then observes two tithis.
+
+Masa and Adhika status come from the lunation containing the span
+(LunationTable), so an Adhika masa yields its own entries flagged
+is_adhika. Which of Adhika / Nija is used is the caller's choice
+(setting `shaswata_adhika_rule`, see select_occurrences).
+
+Each (location, year, rule) table is computed once and kept in memory.
+"""
+
+import threading
+from datetime import date, timedelta
+
+import ephem
+
+from .panchang import PanchangCalculator
+from .panchang_spans import spans_between
+from .panchang_tables import LUNATIONS, RISE_SET
+
+# ═══════════════════════════════════════════════════════════════════════
+# RULES
+# ═══════════════════════════════════════════════════════════════════════
+
+DEFAULT_TITHI_RULE = "udaya"
+
+# "nija": only the regular masa; "adhika": the Adhika masa when there is
+# one that year; "both": both
+ADHIKA_RULES = ("nija", "adhika", "both")
+DEFAULT_ADHIKA_RULE = "nija"
+
+# Two entries of one (Masa, Paksha, Tithi) closer than this are the same
+# yearly occurrence (Adhika + Nija masa)
+OCCURRENCE_GAP_DAYS = 180
+
+# IST offset from UTC, in days
+IST_OFFSET_DAYS = 5.5 / 24
+
+
+def parse_tithi_rule(value) -> str:
+    """
+    Normalises a tithi rule: "udaya" (aliases "sunrise", empty) or an IST
+    time "HH:MM". Raises ValueError otherwise.
+    """
+    rule = str(value or DEFAULT_TITHI_RULE).strip().lower()
+    if rule in ("udaya", "sunrise"):
+        return "udaya"
+    try:
+        hours, minutes = (int(part) for part in rule.split(":"))
+    except ValueError:
+        raise ValueError(f"Tithi rule must be 'udaya' or an IST time HH:MM, got {value!r}")
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Tithi rule time out of range: {value!r}")
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def parse_adhika_rule(value) -> str:
+    """Normalises an Adhika rule (one of ADHIKA_RULES). Raises ValueError otherwise."""
+    rule = str(value or DEFAULT_ADHIKA_RULE).strip().lower()
+    if rule not in ADHIKA_RULES:
+        raise ValueError(f"Adhika rule must be one of {', '.join(ADHIKA_RULES)}, got {value!r}")
+    return rule
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# YEARLY TABLE
+# ═══════════════════════════════════════════════════════════════════════
+
+_TABLES = {}
+_TABLES_MAX = 16
+_tables_lock = threading.Lock()
+
+
+def _anchors(calculator: PanchangCalculator, first: date, last: date, rule: str):
+    """Anchor instant (ephem days) of every civil day from `first` to `last`."""
+    if rule != "udaya":
+        hours, minutes = (int(part) for part in rule.split(":"))
+        fraction = (hours * 60 + minutes) / 1440.0 - IST_OFFSET_DAYS
+    anchors = []
+    day = first
+    while day <= last:
+        midnight = float(ephem.Date(day.strftime("%Y/%m/%d")))
+        anchor = None
+        if rule == "udaya":
+            anchor = RISE_SET.year(calculator.rise_set_location, day.year)[day.timetuple().tm_yday - 1][0]
+            if anchor is None:      # No sunrise at this latitude: the daily Panchangam instant
+                anchor = midnight + 0.5 / 24
+        else:
+            anchor = midnight + fraction
+        anchors.append(anchor)
+        day += timedelta(days=1)
+    return anchors
+
+
+def _build_table(calculator: PanchangCalculator, year: int, rule: str) -> dict:
+    # One day of margin each side so spans near the year boundary find their anchors
+    first = date(year, 1, 1) - timedelta(days=1)
+    last = date(year, 12, 31) + timedelta(days=1)
+    anchors = _anchors(calculator, first, last, rule)
+
+    table = {}
+    k = 0
+    for begin, finish, index in spans_between(calculator, "tithi", anchors[0], anchors[-1]):
+        while k + 1 < len(anchors) and anchors[k + 1] <= begin:
+            k += 1
+        # k: last anchor at or before the span start
+        if anchors[k] >= begin:
+            day_index = k                       # Span starts exactly on an anchor
+        elif k + 1 < len(anchors) and anchors[k + 1] < finish:
+            day_index = k + 1                   # First anchor inside the span
+        else:
+            day_index = k                       # Kshaya: no anchor inside
+        observed = first + timedelta(days=day_index)
+        if observed.year != year:
+            continue
+        _prev, _next, masa_index, is_adhika = LUNATIONS.lunation_at((begin + finish) / 2, calculator.ayanamsa)
+        key = (masa_index % 12, "Shukla" if index < 15 else "Krishna", index % 15)
+        table.setdefault(key, []).append((observed, bool(is_adhika)))
+
+    for dates in table.values():
+        dates.sort()
+    return table
+
+
+def observance_table(calculator: PanchangCalculator, year: int, rule: str = DEFAULT_TITHI_RULE) -> dict:
+    """
+    (masa_index, paksha, tithi_index) → [(date, is_adhika), ...] for the
+    tithis observed during `year` under `rule`. Computed once per
+    location + year + rule.
+    """
+    rule = parse_tithi_rule(rule)
+    key = (calculator.location_hash, calculator.CALC_VERSION, year, rule)
+    table = _TABLES.get(key)
+    if table is None:
+        table = _build_table(calculator, year, rule)
+        with _tables_lock:
+            if len(_TABLES) >= _TABLES_MAX:
+                _TABLES.pop(next(iter(_TABLES)))
+            _TABLES[key] = table
+    return table
+
+
+def observance_dates_in_range(calculator: PanchangCalculator, start: date, end: date,
+                              rule: str = DEFAULT_TITHI_RULE) -> dict:
+    """
+    Same shape as lunar_index.lunar_dates_in_range — key → [(date, is_adhika)]
+    ascending — for the days from `start` to `end` (inclusive), by observance.
+    """
+    by_key = {}
+    for year in range(start.year, end.year + 1):
+        for key, dates in observance_table(calculator, year, rule).items():
+            in_range = [d for d in dates if start <= d[0] <= end]
+            if in_range:
+                by_key.setdefault(key, []).extend(in_range)
+    return by_key
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# ADHIKA HANDLING
+# ═══════════════════════════════════════════════════════════════════════
+
+def select_occurrences(matches, adhika_rule: str = DEFAULT_ADHIKA_RULE) -> list:
+    """
+    Dates to observe from the (date, is_adhika) matches of one key, one per
+    yearly occurrence:
+
+    - "nija":   the regular masa only; Adhika entries are dropped
+    - "adhika": the Adhika masa entry when that year has one, else the regular one
+    - "both":   both entries
+    """
+    occurrences = []
+    for matched, is_adhika in matches:
+        if occurrences and (matched - occurrences[-1][0][0]).days <= OCCURRENCE_GAP_DAYS:
+            occurrences[-1].append((matched, is_adhika))
+        else:
+            occurrences.append([(matched, is_adhika)])
+
+    dates = []
+    for entries in occurrences:
+        nija = [d for d, adhika in entries if not adhika]
+        adhika = [d for d, adhika in entries if adhika]
+        if adhika_rule == "nija":
+            dates += nija[:1]
+        elif adhika_rule == "adhika":
+            dates += (adhika or nija)[:1]
+        else:
+            dates += adhika[:1] + nija[:1]
+    return dates
@@ -1,13 +1,14 @@
 """
 S.T.A.R. Automated Backup Script
 =================================
-Creates a daily backup of the embedded PostgreSQL database.
-Saves timestamped .sql dump files to star-backend/backups/
+Creates a daily backup of the embedded PostgreSQL database (or the SQLite
+fallback database). Saves timestamped .sql dump / .db files to
+star-backend/backups/
 
 Usage:
     python backup.py
 
-Can be registered as a Windows Task Scheduler job for daily automated backups.
+The backend also runs it daily through its job scheduler.
 """
 
 import os
@@ -32,31 +33,45 @@ def cleanup_old_backups(backup_dir, keep_days=30):
     import glob
     cutoff = datetime.now().timestamp() - (keep_days * 86400)
     
-    for f in glob.glob(os.path.join(backup_dir, "star_temple_*.sql")):
+    for f in glob.glob(os.path.join(backup_dir, "star_temple_*.sql")) + glob.glob(os.path.join(backup_dir, "star_temple_*.db")):
         if os.path.getmtime(f) < cutoff:
             os.remove(f)
             print(f"[CLEANUP] Removed old backup: {os.path.basename(f)}")
 
 
-def backup():
-    """Create a PostgreSQL database backup using pg_dump from pgserver."""
-    print("=" * 50)
-    print("  S.T.A.R. Database Backup")
-    print("=" * 50)
-    
+def create_backup(keep_days=30):
+    """
+    Creates one timestamped backup and removes those older than keep_days.
+    PostgreSQL: pg_dump from pgserver's bundled binaries (.sql).
+    SQLite: the sqlite3 online backup API (.db copy, safe while in use).
+    Returns {"file", "size_kb"}; raises RuntimeError when no backup could be made.
+    Also run daily by the job scheduler (job 'database_backup').
+    """
+    from app.database import is_postgres
+    backup_dir = get_backup_dir()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    if is_postgres():
+        backup_file = _pg_dump(os.path.join(backup_dir, f"star_temple_{timestamp}.sql"))
+    else:
+        backup_file = _sqlite_backup(os.path.join(backup_dir, f"star_temple_{timestamp}.db"))
+
+    size_kb = os.path.getsize(backup_file) / 1024
+    print(f"[BACKUP] Backup created: {os.path.basename(backup_file)} ({size_kb:.1f} KB)")
+    cleanup_old_backups(backup_dir, keep_days=keep_days)
+    return {"file": os.path.basename(backup_file), "size_kb": round(size_kb, 1)}
+
+
+def _pg_dump(backup_file):
     try:
         import pgserver
     except ImportError:
-        print("[ERROR] pgserver not installed. Cannot create backup.")
-        sys.exit(1)
-    
-    # Start the embedded PostgreSQL
-    from app.database import _pg_server, is_postgres, get_pg_data_dir
-    
-    if not is_postgres() or _pg_server is None:
-        print("[ERROR] PostgreSQL is not running. Cannot backup.")
-        sys.exit(1)
-    
+        raise RuntimeError("pgserver not installed. Cannot create backup.")
+
+    from app.database import _pg_server, DATABASE_URL
+    if _pg_server is None:
+        raise RuntimeError("PostgreSQL is not running. Cannot backup.")
+
     # Get pg_dump path from pgserver's bundled binaries
     try:
         pg_bin_dir = os.path.dirname(pgserver.pg_ctl)
@@ -64,24 +79,13 @@ def backup():
         if sys.platform == "win32":
             pg_dump_path += ".exe"
     except Exception:
-        print("[ERROR] Could not locate pg_dump binary.")
-        sys.exit(1)
-    
+        raise RuntimeError("Could not locate pg_dump binary.")
+
     if not os.path.exists(pg_dump_path):
-        print(f"[ERROR] pg_dump not found at: {pg_dump_path}")
-        sys.exit(1)
-    
-    # Create backup filename with timestamp
-    backup_dir = get_backup_dir()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = os.path.join(backup_dir, f"star_temple_{timestamp}.sql")
-    
-    # Get connection info from the running server
-    from app.database import DATABASE_URL
-    
+        raise RuntimeError(f"pg_dump not found at: {pg_dump_path}")
+
     print(f"[BACKUP] Using pg_dump: {pg_dump_path}")
     print(f"[BACKUP] Output: {backup_file}")
-    
     try:
         # Use pg_dump with the connection URI
         result = subprocess.run(
@@ -90,21 +94,40 @@ def backup():
             text=True,
             timeout=120
         )
-        
-        if result.returncode == 0:
-            size_kb = os.path.getsize(backup_file) / 1024
-            print(f"[BACKUP] ✅ Backup created: {os.path.basename(backup_file)} ({size_kb:.1f} KB)")
-        else:
-            print(f"[BACKUP] ⚠️ pg_dump stderr: {result.stderr}")
-            
     except subprocess.TimeoutExpired:
-        print("[BACKUP] ⚠️ Backup timed out after 120 seconds.")
-    except Exception as e:
-        print(f"[BACKUP] ❌ Error: {e}")
-    
-    # Cleanup old backups
-    cleanup_old_backups(backup_dir, keep_days=30)
-    
+        raise RuntimeError("Backup timed out after 120 seconds.")
+    if result.returncode != 0:
+        raise RuntimeError(f"pg_dump failed: {result.stderr.strip()}")
+    return backup_file
+
+
+def _sqlite_backup(backup_file):
+    import sqlite3
+    from app.database import get_sqlite_path
+    source_path = get_sqlite_path()
+    if not source_path or not os.path.exists(source_path):
+        raise RuntimeError(f"SQLite database not found: {source_path}")
+    print(f"[BACKUP] Output: {backup_file}")
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(backup_file)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return backup_file
+
+
+def backup():
+    """Command-line entry point."""
+    print("=" * 50)
+    print("  S.T.A.R. Database Backup")
+    print("=" * 50)
+    try:
+        create_backup(keep_days=30)
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
     print("[BACKUP] Done.")
 
 
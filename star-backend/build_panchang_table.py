@@ -0,0 +1,80 @@
+"""
+S.T.A.R. Panchang Table Builder
+================================
+Precomputes the language-neutral Panchangam for the temple location over a
+span of years and writes the memory-mapped table the server loads at startup
+(star-backend/data/panchang/panchang_<location>_v<version>.npy).
+
+Usage:
+    python build_panchang_table.py                      # this year - 1 .. this year + 10
+    python build_panchang_table.py 2000 2100 --workers 8
+    python build_panchang_table.py 2026 2030 --lat 12.97 --lon 77.59 --ayanamsa raman
+
+Location defaults to the temple_lat / temple_lon / temple_elevation /
+panchang_ayanamsa SystemSettings.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from datetime import date
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _settings_calculator():
+    """PanchangCalculator from the database SystemSettings."""
+    from app.database import SessionLocal
+    from app.crud import get_panchang_calculator
+    db = SessionLocal()
+    try:
+        return get_panchang_calculator(db)
+    finally:
+        db.close()
+
+
+def main():
+    this_year = date.today().year
+    parser = argparse.ArgumentParser(description="Build the precomputed Panchang table")
+    parser.add_argument("start_year", nargs="?", type=int, default=this_year - 1)
+    parser.add_argument("end_year", nargs="?", type=int, default=this_year + 10)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--lat")
+    parser.add_argument("--lon")
+    parser.add_argument("--elevation")
+    parser.add_argument("--ayanamsa")
+    args = parser.parse_args()
+
+    from app.panchang import PanchangCalculator
+    from app.panchang_store import build_panchang_table, HAS_NUMPY
+
+    if not HAS_NUMPY:
+        print("[ERROR] numpy not installed. Cannot build the Panchang table.")
+        sys.exit(1)
+
+    if args.lat and args.lon:
+        pc = PanchangCalculator(lat=args.lat, lon=args.lon, elevation=args.elevation, ayanamsa=args.ayanamsa)
+    else:
+        pc = _settings_calculator()
+
+    print("=" * 50)
+    print("  S.T.A.R. Panchang Table Builder")
+    print("=" * 50)
+    print(f"[TABLE] Location {pc.lat}, {pc.lon} ({pc.ayanamsa_mode}) → {args.start_year}..{args.end_year}")
+
+    started = time.time()
+
+    def _progress(year, done, total):
+        print(f"[TABLE] {year} done ({done}/{total})")
+
+    path = build_panchang_table(pc, args.start_year, args.end_year, workers=args.workers, progress=_progress)
+    size_kb = os.path.getsize(path) / 1024
+    print(f"[TABLE] ✅ {os.path.basename(path)} ({size_kb:.1f} KB) in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()
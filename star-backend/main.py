@@ -6,7 +6,7 @@ import webbrowser
 import threading
 from fastapi import FastAPI, Depends, HTTPException, status, Request, Header, BackgroundTasks
 from fastapi.security import OAuth2PasswordBearer
-from fastapi.responses import StreamingResponse, FileResponse, HTMLResponse
+from fastapi.responses import StreamingResponse, FileResponse, HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -16,6 +16,7 @@ from sqlalchemy.orm import Session
 from cachetools import TTLCache
 from typing import List, Optional
 from datetime import date, datetime, timedelta
+from email.utils import format_datetime
 import io
 import csv
 import traceback
@@ -35,12 +36,12 @@ if __name__ == "__main__":
 
 from app.database import get_db, init_database
 
-from app.models import SevaCatalog, SystemSetting, AuditLog, DailyPanchang
+from app.models import SevaCatalog, SystemSetting, AuditLog
 from app.schemas import (
     UserCreate, UserResponse, Token, UserLogin, TokenData,
     SevaResponse, SevaUpdate, SevaCreate,
     TransactionCreate, TransactionResponse,
-    ShaswataCreate, ShaswataResponse, ShaswataDispatchAdhoc,
+    ShaswataCreate, ShaswataResponse, ShaswataDispatchAdhoc, ShaswataDispatchBatch,
     PasswordChange, SystemSettingResponse, SystemSettingUpdate, AuditLogResponse,
 )
 
@@ -53,18 +54,41 @@ from app.crud import (
     get_daily_summary, get_transaction_trends,
     get_financial_report, get_enhanced_report, get_collection_details,
     log_dispatch, log_feedback_sent, get_pending_feedback_subscriptions,
-    send_address_confirmation, confirm_devotee_address, reset_address_confirmation
+    send_address_confirmation, confirm_devotee_address, reset_address_confirmation,
+    get_panchang_calculator
 )
 
-from app.panchang import PanchangCalculator
+from app.panchang import parse_fields
+from app.panchang_tables import RISE_SET
+from app.lunar_index import find_lunar_dates, warm_lunar_index, is_index_current, build_lunar_index
+from app.panchang_cache import get_panchang_core, PANCHANG_CACHE
+from app.panchang_spans import compute_spans, warm_span_tables, ELEMENTS as SPAN_ELEMENTS
+from app.tithi_observance import observance_table
+from app.muhurta import parse_constraints, search_muhurta, MAX_DAYS as MUHURTA_MAX_DAYS, MAX_RESULTS as MUHURTA_MAX_RESULTS
+from app.festivals import festival_calendar
+from app.ical_feed import (
+    festival_feed, festival_feed_version, shaswata_feed, shaswata_feed_version,
+    devotee_feed_start, devotee_feed_token, is_devotee_feed_token, is_not_modified,
+)
+from app.panchang_store import load_panchang_store, start_table_build, BUILD_STATUS as PANCHANG_TABLE_STATUS
 from app import daiva_setu  # Genesis Protocol (Level 15)
 from app.sync_engine import sync_engine
+from app.job_scheduler import scheduler, job_status, recent_runs, update_job
+from app.messaging import (
+    create_campaign, campaign_status, list_campaigns, outbox_dispatcher, CAMPAIGN_KINDS,
+)
 from app.shaswata_service import (
-    populate_upcoming_events, get_upcoming_events,
-    mark_event_dispatched, record_delivery_feedback, dispatch_adhoc_event,
+    populate_upcoming_events, populate_incremental_events, populate_yearly_events,
+    get_upcoming_events, YEARLY_STATUS as SHASWATA_YEARLY_STATUS,
+    send_due_reminders, matching_rules,
+    mark_event_dispatched, dispatch_events_batch, record_delivery_feedback, dispatch_adhoc_event,
     get_pending_delivery_checks, get_communication_history,
     MessagingService
 )
+from app.shaswata_health import shaswata_health, rebuild_health_counters
+from app.shaswata_digest import (
+    get_digest, refresh_digests, invalidate_digests, daily_festivals, DIGEST_SETTING_KEYS,
+)
 
 # Authentication Imports
 from passlib.context import CryptContext
@@ -109,29 +133,78 @@ app.add_middleware(
 def startup_event():
     """Initialize database tables on app startup."""
     init_database()
-    sync_engine.start()
-    
-    # Run yearly event population in background thread to not block startup
-    import threading
-    def _bg_populate():
-        try:
-            from app.database import SessionLocal
-            from app.shaswata_service import populate_yearly_events
-            db = SessionLocal()
-            try:
-                populate_yearly_events(db)
-                print("[BG] Shaswata yearly events populated.")
-            finally:
-                db.close()
-        except Exception as e:
-            print(f"[BG] Shaswata population error: {e}")
-    
-    bg_thread = threading.Thread(target=_bg_populate, daemon=True)
-    bg_thread.start()
+
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        pc = get_panchang_calculator(db)
+    finally:
+        db.close()
+
+    # Memory-map the precomputed Panchang table for this location, if built
+    store = load_panchang_store(pc)
+    if store:
+        print(f"[OK] Panchang table loaded: {store.span[0]} .. {store.span[1]}")
+
+    # Background work (cache warmup, event population, reminders, backups, sync)
+    _register_jobs()
+    scheduler.start()
+    outbox_dispatcher.start()
 
 @app.on_event("shutdown")
 def shutdown_event():
-    sync_engine.stop()
+    scheduler.stop()
+    outbox_dispatcher.stop()
+
+
+# =============================================================================
+# Scheduled Jobs (see app.job_scheduler)
+# =============================================================================
+
+def _job_panchang_warmup(db: Session):
+    """Per-worker: in-memory rise/set, span and tithi observance tables for this year + next."""
+    pc = get_panchang_calculator(db)
+    tithi_rule, _adhika_rule = matching_rules(db)
+    this_year = date.today().year
+    for year in (this_year, this_year + 1):
+        RISE_SET.year(pc.rise_set_location, year)
+        observance_table(pc, year, tithi_rule)      # Builds the span tables too
+    return {"years": [this_year, this_year + 1]}
+
+
+def _job_lunar_index(db: Session):
+    """Builds the lunar date index for this year + next if missing or stale."""
+    pc = get_panchang_calculator(db)
+    this_year = date.today().year
+    built = {}
+    for year in (this_year, this_year + 1):
+        if not is_index_current(db, year, pc):
+            built[year] = build_lunar_index(db, year, pc)
+    return {"built": built}
+
+
+def _job_database_backup(db: Session):
+    from backup import create_backup
+    return create_backup(keep_days=30)
+
+
+def _job_cloud_sync(db: Session):
+    sync_engine.sync_data()
+
+
+def _register_jobs():
+    scheduler.register("panchang_warmup", _job_panchang_warmup, "5 0 * * *",
+                       run_at_startup=True, per_worker=True)
+    scheduler.register("lunar_index_build", _job_lunar_index, "10 0 * * *", run_at_startup=True)
+    scheduler.register("shaswata_yearly_plan", populate_yearly_events, "15 0 * * *",
+                       run_at_startup=True, lease_seconds=3600)
+    scheduler.register("shaswata_incremental", populate_incremental_events, "0 * * * *")
+    scheduler.register("shaswata_reminders", send_due_reminders, "0 18 * * *")
+    scheduler.register("shaswata_digest", refresh_digests, "20 0 * * *", run_at_startup=True)
+    scheduler.register("shaswata_health_counters", rebuild_health_counters, "40 0 * * *", run_at_startup=True)
+    scheduler.register("database_backup", _job_database_backup, "30 2 * * *",
+                       max_retries=2, retry_backoff_seconds=300)
+    scheduler.register("cloud_sync", _job_cloud_sync, "* * * * *", max_retries=0)
 
 
 # Register Genesis Protocol Router (AI Engine)
@@ -413,17 +486,21 @@ def update_settings(
         )
     
     updated_keys = []
+    changed_keys = set()
     for key, value in data.settings.items():
         setting = db.query(SystemSetting).filter(SystemSetting.key == key).first()
         if setting:
             old_value = setting.value
             setting.value = str(value)
             updated_keys.append(key)
+            if old_value != setting.value:
+                changed_keys.add(key)
         else:
             # Create new setting if it doesn't exist
             new_setting = SystemSetting(key=key, value=str(value))
             db.add(new_setting)
             updated_keys.append(key)
+            changed_keys.add(key)
     
     # Audit log
     audit = AuditLog(
@@ -435,10 +512,32 @@ def update_settings(
     )
     db.add(audit)
     db.commit()
+
+    if changed_keys & PANCHANG_LOCATION_KEYS:
+        _refresh_panchang_location(db)
+    if changed_keys & DIGEST_SETTING_KEYS:
+        invalidate_digests(db)
     
     return {"message": f"Updated {len(updated_keys)} settings", "updated_keys": updated_keys}
 
 
+# Settings that change the Panchangam location (and so every per-location table)
+PANCHANG_LOCATION_KEYS = {"temple_lat", "temple_lon", "temple_elevation", "panchang_ayanamsa"}
+
+
+def _refresh_panchang_location(db: Session):
+    """Re-points the per-location Panchang tables at the newly configured location."""
+    pc = get_panchang_calculator(db)
+    RISE_SET.invalidate(keep=pc.rise_set_location)
+    PANCHANG_CACHE.clear()
+    this_year = date.today().year
+    RISE_SET.build_in_background(pc.rise_set_location, [this_year, this_year + 1])
+    warm_span_tables(pc, [this_year, this_year + 1])
+    load_panchang_store(pc)
+    warm_lunar_index(pc)
+    print(f"[OK] Panchang location changed -> {pc.lat}, {pc.lon}, {pc.elevation} m ({pc.ayanamsa_mode})")
+
+
 # =============================================================================
 # API Routes - System Operations
 # =============================================================================
@@ -605,10 +704,15 @@ def update_seva_endpoint(
         updated_seva = update_seva(db, seva_id, seva_update)
         if not updated_seva:
              raise HTTPException(status_code=404, detail="Seva not found")
-        return updated_seva
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update Seva: {str(e)}")
 
+    # The stored daily digests join the seva catalog
+    invalidate_digests(db)
+    return updated_seva
+
 @app.post("/sevas", response_model=SevaResponse, status_code=status.HTTP_201_CREATED, tags=["Seva Catalog"])
 def create_seva_endpoint(
     seva: SevaCreate,
@@ -649,6 +753,7 @@ def delete_seva_endpoint(
     updated_seva = delete_seva(db, seva_id)
     if not updated_seva:
         raise HTTPException(status_code=404, detail="Seva not found")
+    invalidate_digests(db)
     return None
 
 
@@ -671,6 +776,7 @@ def restore_seva_endpoint(
     updated_seva = restore_seva(db, seva_id)
     if not updated_seva:
         raise HTTPException(status_code=404, detail="Seva not found")
+    invalidate_digests(db)
     return updated_seva
 
 
@@ -697,6 +803,7 @@ def permanently_delete_seva_endpoint(
         raise HTTPException(status_code=400, detail=str(e))
     if not result:
         raise HTTPException(status_code=404, detail="Seva not found")
+    invalidate_digests(db)
     return None
 
 
@@ -716,6 +823,8 @@ def empty_recycle_bin_endpoint(
     
     from app.crud import permanently_delete_all_inactive_sevas
     count = permanently_delete_all_inactive_sevas(db)
+    if count:
+        invalidate_digests(db)
     return {"message": f"Permanently deleted {count} seva(s)", "count": count}
 
 
@@ -860,12 +969,15 @@ def book_seva(
         result = book_seva_transaction(db=db, transaction=transaction)
         if idempotency_key:
             idempotency_cache[idempotency_key] = result
-        return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Booking failed: {str(e)}")
 
+    # Booking is committed: the digest update cannot fail the request
+    invalidate_digests(db, transaction_id=result["transaction_id"])
+    return result
+
 @app.get("/transactions", tags=["Transactions"])
 def list_transactions(
     date: Optional[str] = None,
@@ -977,6 +1089,7 @@ def update_transaction_note(
     )
     db.add(audit)
     db.commit()
+    invalidate_digests(db, transaction_id=transaction_id)
     return {"message": "Note updated", "id": transaction_id, "note": note}
 
 
@@ -1062,10 +1175,14 @@ def subscribe_shaswata(subscription: ShaswataCreate, db: Session = Depends(get_d
     validate_transaction_payload(subscription)
     
     try:
-        return create_shaswata_subscription(db=db, subscription=subscription)
+        result = create_shaswata_subscription(db=db, subscription=subscription)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Subscription failed: {str(e)}")
 
+    # Subscription is committed; the payment (if any) is booked today
+    invalidate_digests(db, subscription_id=result["subscription_id"], days=[date.today()])
+    return result
+
 @app.get("/shaswata/subscriptions", tags=["Shaswata"])
 def list_shaswata_subscriptions(active_only: bool = True, db: Session = Depends(get_db)):
     return get_shaswata_subscriptions(db, active_only=active_only)
@@ -1082,67 +1199,10 @@ def get_tomorrow_shaswata_pujas(db: Session = Depends(get_db)):
     Get all Shaswata subscriptions scheduled for TOMORROW.
     Used to power the notification bell in the Navbar.
     Returns list of pujas with devotee details and address confirmation status.
+    Served from the daily digest (app.shaswata_digest).
     """
-    from app.models import Devotee
     tomorrow = date.today() + timedelta(days=1)
-    
-    pc = PanchangCalculator()
-    panchangam_tomorrow = pc.calculate(tomorrow)
-    
-    # 1. LUNAR subscriptions matching tomorrow's Tithi
-    lunar_query = text("""
-        SELECT ss.id, d.id as devotee_id, d.full_name_en, d.phone_number, d.address, d.area, d.pincode,
-               sc.name_eng, ss.maasa, ss.paksha, ss.tithi, ss.occasion,
-               d.address_confirmed, d.address_confirmation_sent_at
-        FROM shaswata_subscriptions ss
-        JOIN devotees d ON ss.devotee_id = d.id
-        JOIN seva_catalog sc ON ss.seva_id = sc.id
-        WHERE ss.is_active = TRUE AND ss.subscription_type = 'LUNAR'
-        AND ss.maasa = :maasa AND ss.paksha = :paksha AND ss.tithi = :tithi
-    """)
-    lunar_result = db.execute(lunar_query, {
-        "maasa": panchangam_tomorrow["attributes"]["maasa"],
-        "paksha": panchangam_tomorrow["attributes"]["paksha"],
-        "tithi": panchangam_tomorrow["attributes"]["tithi"]
-    }).fetchall()
-    
-    # 2. GREGORIAN subscriptions matching tomorrow's date
-    greg_query = text("""
-        SELECT ss.id, d.id as devotee_id, d.full_name_en, d.phone_number, d.address, d.area, d.pincode,
-               sc.name_eng, ss.event_day, ss.event_month, ss.occasion,
-               d.address_confirmed, d.address_confirmation_sent_at
-        FROM shaswata_subscriptions ss
-        JOIN devotees d ON ss.devotee_id = d.id
-        JOIN seva_catalog sc ON ss.seva_id = sc.id
-        WHERE ss.is_active = TRUE AND ss.subscription_type = 'GREGORIAN'
-        AND ss.event_day = :day AND ss.event_month = :month
-    """)
-    greg_result = db.execute(greg_query, {"day": tomorrow.day, "month": tomorrow.month}).fetchall()
-    
-    pujas = []
-    for row in lunar_result:
-        pujas.append({
-            "id": row[0], "devotee_id": row[1], "name": row[2], "phone": row[3],
-            "address": row[4], "area": row[5], "pincode": row[6],
-            "seva": row[7], "date_info": f"{row[8]} {row[9]} {row[10]}",
-            "occasion": row[11], "type": "LUNAR",
-            "address_confirmed": row[12] or False,
-            "confirmation_sent": row[13] is not None
-        })
-    for row in greg_result:
-        month_names = ["", "January", "February", "March", "April", "May", "June",
-                       "July", "August", "September", "October", "November", "December"]
-        month_idx = row[9]
-        month_str = month_names[month_idx] if 0 < month_idx <= 12 else str(month_idx)
-        pujas.append({
-            "id": row[0], "devotee_id": row[1], "name": row[2], "phone": row[3],
-            "address": row[4], "area": row[5], "pincode": row[6],
-            "seva": row[7], "date_info": f"{month_str} {row[8]}",
-            "occasion": row[10], "type": "GREGORIAN",
-            "address_confirmed": row[11] or False,
-            "confirmation_sent": row[12] is not None
-        })
-    
+    pujas = get_digest(db, tomorrow)["shaswata"]
     return {
         "count": len(pujas),
         "date": tomorrow.strftime("%d-%m-%Y"),
@@ -1157,6 +1217,7 @@ def send_address_confirmation_endpoint(devotee_id: int, db: Session = Depends(ge
     """
     try:
         devotee = send_address_confirmation(db, devotee_id)
+        invalidate_digests(db, devotee_id=devotee.id)
         return {
             "status": "confirmation_sent",
             "devotee_id": devotee.id,
@@ -1180,6 +1241,7 @@ def confirm_address_endpoint(
     """
     try:
         devotee = confirm_devotee_address(db, devotee_id, address, area, pincode)
+        invalidate_digests(db, devotee_id=devotee.id)
         return {
             "status": "confirmed",
             "devotee_id": devotee.id,
@@ -1241,19 +1303,30 @@ def get_subscriptions_pending_feedback(db: Session = Depends(get_db)):
 # =============================================================================
 
 @app.post("/shaswata/events/populate", tags=["Shaswata Manager"])
-def populate_shaswata_events(days: int = 30, db: Session = Depends(get_db)):
+def populate_shaswata_events(days: int = 30, incremental: bool = False, db: Session = Depends(get_db)):
     """
     Populate shaswata_events for the next N days.
     Scans all active subscriptions and creates PENDING events.
+    With incremental=true only subscriptions changed since the last run and
+    the newly exposed days at the end of the window are processed.
     Idempotent: safe to call multiple times.
     """
     try:
-        result = populate_upcoming_events(db, days_ahead=days)
+        if incremental:
+            result = populate_incremental_events(db, days_ahead=days)
+        else:
+            result = populate_upcoming_events(db, days_ahead=days)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Event population failed: {str(e)}")
 
 
+@app.get("/shaswata/events/yearly-status", tags=["Shaswata Manager"])
+def get_shaswata_yearly_status():
+    """Progress of the year-ahead event planning run started at boot."""
+    return SHASWATA_YEARLY_STATUS
+
+
 @app.get("/shaswata/upcoming", tags=["Shaswata Manager"])
 def get_upcoming_shaswata(days: int = 30, db: Session = Depends(get_db)):
     """
@@ -1270,6 +1343,94 @@ def get_upcoming_shaswata(days: int = 30, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
 
+# =============================================================================
+# API Routes - Calendar Feeds (.ics)
+# =============================================================================
+
+def _ics_response(request: Request, version, build, filename: str):
+    """
+    Streams an .ics feed, or 304 when the client's ETag / Last-Modified is
+    current. `build(stamp)` returns the line generator (only called on 200).
+    """
+    etag, last_modified = version
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified.replace(microsecond=0), usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    return StreamingResponse(build(last_modified), media_type="text/calendar; charset=utf-8", headers=headers)
+
+
+@app.get("/calendar/festivals.ics", tags=["Calendar"])
+def festival_ics(request: Request, year: int = None, db: Session = Depends(get_db)):
+    """Subscribable iCalendar feed of the temple festival calendar for a year (default: this year)."""
+    target_year = year if year else date.today().year
+    pc = get_panchang_calculator(db)
+    return _ics_response(
+        request, festival_feed_version(db, pc, target_year),
+        lambda stamp: festival_feed(pc, target_year, stamp),
+        f"festivals_{target_year}.ics",
+    )
+
+
+@app.get("/calendar/shaswata.ics", tags=["Calendar"])
+def shaswata_ics(request: Request, days: int = 90, db: Session = Depends(get_db)):
+    """Subscribable iCalendar feed of upcoming Shaswata events (next `days` days)."""
+    if not (1 <= days <= 730):
+        raise HTTPException(status_code=400, detail="days must be between 1 and 730")
+    start = date.today()
+    end = start + timedelta(days=days)
+    return _ics_response(
+        request, shaswata_feed_version(db, start, end),
+        lambda stamp: shaswata_feed("Shaswata Sevas", start, end, None, stamp),
+        "shaswata.ics",
+    )
+
+
+@app.post("/calendar/devotees/{devotee_id}/token", tags=["Calendar"])
+def devotee_calendar_link(
+    devotee_id: int,
+    rotate: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Feed URL (with its secret token) for one devotee's Shaswata calendar.
+    `rotate=true` issues a new token, so links shared earlier stop working.
+    """
+    from app.models import Devotee
+    devotee = db.query(Devotee).filter(Devotee.id == devotee_id).first()
+    if not devotee:
+        raise HTTPException(status_code=404, detail="Devotee not found")
+    token = devotee_feed_token(db, devotee, rotate)
+    return {
+        "devotee_id": devotee.id,
+        "token": token,
+        "url": f"/calendar/devotees/{devotee.id}/shaswata.ics?token={token}",
+    }
+
+
+@app.get("/calendar/devotees/{devotee_id}/shaswata.ics", tags=["Calendar"])
+def devotee_shaswata_ics(request: Request, devotee_id: int, token: str = "", db: Session = Depends(get_db)):
+    """
+    iCalendar feed of one devotee's Shaswata events (from the start of last year onwards).
+    Needs the devotee's feed `token`; an unknown devotee or a wrong token is a 404.
+    """
+    from app.models import Devotee
+    devotee = db.query(Devotee).filter(Devotee.id == devotee_id).first()
+    if not devotee or not is_devotee_feed_token(devotee, token):
+        raise HTTPException(status_code=404, detail="Devotee not found")
+    start = devotee_feed_start()
+    return _ics_response(
+        request, shaswata_feed_version(db, start, None, devotee_id),
+        lambda stamp: shaswata_feed(f"Shaswata Sevas - {devotee.full_name_en}", start, None, devotee_id, stamp),
+        f"shaswata_devotee_{devotee_id}.ics",
+    )
+
+
 @app.post("/shaswata/events/{event_id}/dispatch", tags=["Shaswata Manager"])
 def dispatch_event(
     event_id: int,
@@ -1289,6 +1450,60 @@ def dispatch_event(
         raise HTTPException(status_code=500, detail=f"Dispatch failed: {str(e)}")
 
 
+@app.post("/shaswata/events/dispatch-batch", tags=["Shaswata Manager"])
+def dispatch_event_batch(
+    payload: ShaswataDispatchBatch,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Mark many events as DISPATCHED in one transaction (a whole courier batch).
+    Returns a per-item status: DISPATCHED, ALREADY_DISPATCHED, NOT_FOUND or DUPLICATE.
+    """
+    try:
+        return dispatch_events_batch(
+            db, [item.model_dump() for item in payload.items],
+            user_id=current_user.id, username=current_user.username,
+        )
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Dispatch failed: {str(e)}")
+
+
+@app.get("/shaswata/events/dispatch-sheet", tags=["Shaswata Manager"])
+def get_dispatch_sheet(
+    target_date: Optional[date] = None,
+    status: str = "PENDING",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Address labels (3 × 8 per A4 page) + post-office manifest for the events
+    of `target_date` (default today), grouped by pincode, as one PDF.
+    status: event status to include (default PENDING), ALL for every event.
+    """
+    from app.dispatch_pdf import generate_dispatch_pdf
+
+    target_date = target_date or date.today()
+    try:
+        output, _count = generate_dispatch_pdf(db, target_date, None if status.upper() == "ALL" else status.upper())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Dispatch sheet failed: {str(e)}")
+
+    def chunks():
+        try:
+            while chunk := output.read(64 * 1024):
+                yield chunk
+        finally:
+            output.close()
+
+    return StreamingResponse(
+        chunks(),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="dispatch_{target_date.isoformat()}.pdf"'}
+    )
+
+
 @app.post("/shaswata/events/{event_id}/delivery-feedback", tags=["Shaswata Manager"])
 def submit_delivery_feedback(
     event_id: int,
@@ -1350,6 +1565,50 @@ def legacy_dispatch_adapter(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/shaswata/campaigns", tags=["Shaswata Manager"])
+def create_message_campaign(
+    kind: str = "reminders",
+    target_date: Optional[date] = None,
+    channel: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a bulk message campaign; messages are sent in the background.
+    - reminders: PENDING events on target_date (default: tomorrow)
+    - delivery_checks: dispatched on or before target_date (default: 4 days ago), no feedback yet
+    - address_verify: events on target_date (default: in 7 days), address not confirmed
+    Events already messaged are skipped, so repeating a campaign is safe.
+    """
+    if kind not in CAMPAIGN_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(CAMPAIGN_KINDS)}")
+    if channel and channel.upper() not in ("WHATSAPP", "SMS", "EMAIL"):
+        raise HTTPException(status_code=400, detail="channel must be WHATSAPP, SMS or EMAIL")
+    try:
+        return create_campaign(db, kind, target_date=target_date, channel=channel, user_id=current_user.id)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Campaign failed: {str(e)}")
+
+
+@app.get("/shaswata/campaigns", tags=["Shaswata Manager"])
+def get_message_campaigns(limit: int = 20, db: Session = Depends(get_db)):
+    """Recent campaigns with their progress, and the dispatcher counters."""
+    return {
+        "campaigns": list_campaigns(db, limit=max(1, min(limit, 100))),
+        "dispatcher": outbox_dispatcher.stats,
+    }
+
+
+@app.get("/shaswata/campaigns/{campaign_id}", tags=["Shaswata Manager"])
+def get_message_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    """Progress of one campaign (counts by outbox status)."""
+    result = campaign_status(db, campaign_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return result
+
+
 @app.post("/shaswata/events/{event_id}/send-reminder", tags=["Shaswata Manager"])
 def send_event_reminder(event_id: int, db: Session = Depends(get_db)):
     """
@@ -1398,62 +1657,10 @@ def get_shaswata_health(
     """
     Shaswata Funding Health Check Dashboard.
     Returns active count, overdue dispatches, missing feedback, and revenue.
+    Read from the maintained counters (app.shaswata_health).
     """
-    from sqlalchemy import text as sa_text
-    
     try:
-        # 1. Total Active Subscriptions
-        active_count = db.execute(sa_text(
-            "SELECT COUNT(*) FROM shaswata_subscriptions WHERE is_active = true"
-        )).scalar() or 0
-        
-        # 2. Overdue Dispatches (>30 days since last dispatch)
-        overdue_dispatches = db.execute(sa_text("""
-            SELECT COUNT(*) FROM shaswata_subscriptions
-            WHERE is_active = true
-              AND last_dispatch_date IS NOT NULL
-              AND last_dispatch_date + INTERVAL '30 days' <= CURRENT_DATE
-        """)).scalar() or 0
-        
-        # 3. Never Dispatched (active but no dispatch ever)
-        never_dispatched = db.execute(sa_text("""
-            SELECT COUNT(*) FROM shaswata_subscriptions
-            WHERE is_active = true AND last_dispatch_date IS NULL
-        """)).scalar() or 0
-        
-        # 4. Missing Feedback (>90 days since last feedback)
-        missing_feedback = db.execute(sa_text("""
-            SELECT COUNT(*) FROM shaswata_subscriptions
-            WHERE is_active = true
-              AND last_dispatch_date IS NOT NULL
-              AND (last_feedback_date IS NULL
-                   OR last_feedback_date + INTERVAL '90 days' <= CURRENT_DATE)
-        """)).scalar() or 0
-
-        # 5. Total Revenue (amount paid for active subscriptions)
-        total_revenue = db.execute(sa_text("""
-            SELECT COALESCE(SUM(t.amount_paid), 0) FROM transactions t
-            JOIN shaswata_subscriptions ss ON t.devotee_id = ss.devotee_id
-            WHERE ss.is_active = true
-        """)).scalar() or 0
-        
-        # 6. Upcoming this week (subscriptions needing dispatch in next 7 days)
-        upcoming_week = db.execute(sa_text("""
-            SELECT COUNT(*) FROM shaswata_subscriptions
-            WHERE is_active = true
-              AND (last_dispatch_date IS NULL
-                   OR last_dispatch_date + INTERVAL '25 days' <= CURRENT_DATE + INTERVAL '7 days')
-        """)).scalar() or 0
-        
-        return {
-            "active_subscriptions": active_count,
-            "overdue_dispatches": overdue_dispatches,
-            "never_dispatched": never_dispatched,
-            "missing_feedback": missing_feedback,
-            "upcoming_this_week": upcoming_week,
-            "total_revenue": float(total_revenue),
-            "health_score": max(0, 100 - (overdue_dispatches * 5) - (never_dispatched * 3) - (missing_feedback * 2)),
-        }
+        return shaswata_health(db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
@@ -1462,15 +1669,13 @@ def get_shaswata_health(
 # =============================================================================
 
 @app.get("/daily-sankalpa", tags=["Priest Dashboard"])
-def get_daily_sankalpa(date_str: str = None, lang: str = "en", db: Session = Depends(get_db)):
+def get_daily_sankalpa(date_str: str = None, lang: str = "en", fields: str = None, db: Session = Depends(get_db)):
     """
     Get daily sankalpa/schedule with cached Panchangam. 
     If date_str provided (DD-MM-YYYY), use that date. 
     Otherwise default to today.
+    `fields` limits the returned Panchangam sections (e.g. "attributes,sun_cycle").
     """
-    import json as json_lib
-    import hashlib
-    
     try:
         if date_str:
             target_date = datetime.strptime(date_str, "%d-%m-%Y").date()
@@ -1478,135 +1683,28 @@ def get_daily_sankalpa(date_str: str = None, lang: str = "en", db: Session = Dep
             target_date = date.today()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use DD-MM-YYYY")
+    try:
+        selection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # ── Read Location & Ayanamsa from SystemSettings ──
-    def _get_setting(key, default):
-        s = db.query(SystemSetting).filter_by(key=key).first()
-        return s.value if s else default
-    
-    temple_lat = _get_setting("temple_lat", "12.6745")
-    temple_lon = _get_setting("temple_lon", "75.3370")
-    temple_elev = _get_setting("temple_elevation", "120")
-    ayanamsa = _get_setting("panchang_ayanamsa", "lahiri")
-    cache_version = int(_get_setting("panchang_cache_version", "1"))
-    
-    location_hash = hashlib.md5(f"{temple_lat}:{temple_lon}:{ayanamsa}".encode()).hexdigest()[:12]
-
-    # ── Cache Check ──
-    cached = db.query(DailyPanchang).filter_by(date=target_date).first()
-    if cached and cached.version == cache_version and cached.location_hash == location_hash:
-        panchangam = json_lib.loads(cached.data_json)
+    # Pujas, bookings, revenue and the English Panchangam: one digest row per day
+    digest = get_digest(db, target_date)
+    if lang.lower() == "en" and selection is None:
+        panchangam, festivals = digest["panchangam"], digest["festivals"]
     else:
-        # Calculate fresh
-        pc = PanchangCalculator(
-            lat=temple_lat,
-            lon=temple_lon,
-            elevation=temple_elev,
-            ayanamsa=ayanamsa
-        )
-        panchangam = pc.calculate(target_date, lang=lang)
-        
-        # Save to cache
-        try:
-            if cached:
-                cached.data_json = json_lib.dumps(panchangam, ensure_ascii=False)
-                cached.version = cache_version
-                cached.location_hash = location_hash
-            else:
-                new_cache = DailyPanchang(
-                    date=target_date,
-                    data_json=json_lib.dumps(panchangam, ensure_ascii=False),
-                    version=cache_version,
-                    location_hash=location_hash
-                )
-                db.add(new_cache)
-            db.commit()
-        except Exception as cache_err:
-            print(f"[WARN] Panchang cache write failed: {cache_err}")
-            db.rollback()
-    
-    # 1. Lunar Query - Find subscriptions matching TODAY's Tithi
-    lunar_query = text("""
-        SELECT ss.id, d.full_name_en, d.phone_number, d.gothra_en, sc.name_eng, 
-               ss.maasa, ss.paksha, ss.tithi, ss.notes, d.address, d.nakshatra, d.rashi, ss.occasion
-        FROM shaswata_subscriptions ss
-        JOIN devotees d ON ss.devotee_id = d.id
-        JOIN seva_catalog sc ON ss.seva_id = sc.id
-        WHERE ss.is_active = TRUE 
-        AND ss.subscription_type = 'LUNAR'
-        AND ss.maasa = :maasa
-        AND ss.paksha = :paksha
-        AND ss.tithi = :tithi
-    """)
-    
-    lunar_result = db.execute(lunar_query, {
-        "maasa": panchangam["attributes"]["maasa"],
-        "paksha": panchangam["attributes"]["paksha"],
-        "tithi": panchangam["attributes"]["tithi"]
-    }).fetchall()
-    
-    lunar_pujas = [{
-        "id": row[0], "name": row[1], "phone": row[2], "gothra": row[3],
-        "seva": row[4], "date_info": f"{row[5]} {row[6]} {row[7]}", "notes": row[8], "address": row[9],
-        "nakshatra": row[10], "rashi": row[11], "type": "LUNAR", "occasion": row[12]
-    } for row in lunar_result]
-    
-    # 2. Gregorian Query (Dynamic based on selected date)
-    gregorian_query = text("""
-        SELECT ss.id, d.full_name_en, d.phone_number, d.gothra_en, sc.name_eng, 
-               ss.event_day, ss.event_month, ss.notes, d.address, d.nakshatra, d.rashi, ss.occasion
-        FROM shaswata_subscriptions ss
-        JOIN devotees d ON ss.devotee_id = d.id
-        JOIN seva_catalog sc ON ss.seva_id = sc.id
-        WHERE ss.is_active = TRUE AND ss.subscription_type = 'GREGORIAN'
-          AND ss.event_day = :day AND ss.event_month = :month
-    """)
-    gregorian_result = db.execute(gregorian_query, {"day": target_date.day, "month": target_date.month}).fetchall()
-    
-    gregorian_pujas = []
-    month_names = ["", "January", "February", "March", "April", "May", "June", 
-                  "July", "August", "September", "October", "November", "December"]
-
-    for row in gregorian_result:
-        month_idx = row[6]
-        month_str = month_names[month_idx] if 0 < month_idx <= 12 else str(month_idx)
-        
-        gregorian_pujas.append({
-            "id": row[0], "name": row[1], "phone": row[2], "gothra": row[3],
-            "seva": row[4], "date_info": f"{month_str} {row[5]}", "notes": row[7], "address": row[8],
-            "nakshatra": row[9], "rashi": row[10], "type": "GREGORIAN", "occasion": row[11]
-        })
-
-    # 3. One-Time Transactions (Check BOTH seva_date AND transaction_date)
-    transaction_query = text("""
-        SELECT t.id, t.devotee_name, d.phone_number, d.gothra_en, s.name_eng, t.notes, d.address, d.nakshatra, d.rashi
-        FROM transactions t
-        JOIN devotees d ON t.devotee_id = d.id
-        JOIN seva_catalog s ON t.seva_id = s.id
-        WHERE t.seva_date = :date 
-           OR CAST(t.transaction_date AS DATE) = :date
-    """)
-    transaction_result = db.execute(transaction_query, {"date": target_date}).fetchall()
-
-    transaction_pujas = [{
-        "id": row[0], "name": row[1], "phone": row[2], "gothra": row[3],
-        "seva": row[4], "date_info": "One-Time", "notes": row[5] or "Booked via App", "address": row[6],
-        "nakshatra": row[7], "rashi": row[8], "type": "BOOKING"
-    } for row in transaction_result]
-    
-    # 4. Calculate Daily Revenue
-    revenue_query = text("""
-        SELECT SUM(amount_paid in inr)tansactions 
-        WHERE seva_date = :date OR DATE(transaction_date) = :date
-    """)
-    daily_revenue = db.execute(revenue_query, {"date": target_date}).scalar() or 0
+        # Other languages / field selections: projected from the shared Panchang cache
+        pc = get_panchang_calculator(db)
+        core = get_panchang_core(db, target_date, pc)
+        panchangam = pc.project(core, lang, selection)
+        festivals = daily_festivals(panchangam, core)
 
     return {
         "date": {"day": target_date.day, "month": target_date.month, "year": target_date.year, "weekday": target_date.strftime("%A")},
         "panchangam": panchangam,
-        "pujas": lunar_pujas + gregorian_pujas + transaction_pujas,
-        "revenue": daily_revenue,
-        "festivals": [panchangam["is_festival"]] if panchangam.get("is_festival") else (["Shiva Rathri (Upcoming)", "Pradosha"] if panchangam["attributes"]["maasa"] == "Magha" else ["Daily Sevas"])
+        "pujas": digest["shaswata"] + digest["bookings"],
+        "revenue": digest["revenue"],
+        "festivals": festivals
     }
 
 # =============================================================================
@@ -1879,62 +1977,264 @@ def migrate_legacy_database(
         migrate_legacy_data(temp_filename)
         
     except Exception as e:
+        invalidate_digests(db)
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         if os.path.exists(temp_filename):
             os.remove(temp_filename)
 
+    # Imported bookings are not in the stored daily digests
+    invalidate_digests(db)
+
 # =============================================================================
 # Level 16: The Celestial Compass (Reverse Panchangam Search)
 # =============================================================================
 
+PANCHANG_RANGE_MAX_DAYS = 366
+
+
+@app.get("/panchangam/range", tags=["Panchangam"])
+def get_panchangam_range(
+    start: str,
+    end: str,
+    lang: str = "en",
+    fields: str = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Panchangam for every date from `start` to `end` (YYYY-MM-DD, inclusive).
+    Computed in one pass with shared ephemeris state (max 366 days per call).
+    `fields` (e.g. "attributes,sun_cycle.sunrise") returns only those sections
+    and skips the ephemeris work the others would need.
+    """
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    span = (end_date - start_date).days + 1
+    if span < 1:
+        raise HTTPException(status_code=400, detail="end must be on or after start")
+    if span > PANCHANG_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range too large (max {PANCHANG_RANGE_MAX_DAYS} days)")
+
+    pc = get_panchang_calculator(db)
+    try:
+        days = list(pc.calculate_range(start_date, end_date, lang=lang, fields=fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"start": str(start_date), "end": str(end_date), "count": len(days), "days": days}
+
+
+@app.get("/panchangam/spans", tags=["Panchangam"])
+def get_panchangam_spans(
+    start: str,
+    end: str,
+    elements: str = "tithi,nakshatra,yoga,karana",
+    lang: str = "en",
+    db: Session = Depends(get_db)
+):
+    """
+    Exact start/end instants (IST) of every Tithi, Nakshatra, Yoga and Karana
+    overlapping `start`..`end` (YYYY-MM-DD, max 366 days). Exposes kshaya and
+    vriddhi tithis that the once-a-day Panchangam cannot show.
+    """
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    span = (end_date - start_date).days + 1
+    if span < 1:
+        raise HTTPException(status_code=400, detail="end must be on or after start")
+    if span > PANCHANG_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range too large (max {PANCHANG_RANGE_MAX_DAYS} days)")
+
+    requested = [e.strip().lower() for e in elements.split(",") if e.strip()]
+    unknown = [e for e in requested if e not in SPAN_ELEMENTS]
+    if unknown or not requested:
+        raise HTTPException(status_code=400, detail=f"Unknown elements: {unknown}. Use {list(SPAN_ELEMENTS)}")
+
+    pc = get_panchang_calculator(db)
+    spans = compute_spans(pc, start_date, end_date, elements=requested, lang=lang)
+    return {"start": str(start_date), "end": str(end_date), "timezone": "Asia/Kolkata", "spans": spans}
+
+
+@app.get("/panchangam/sankranti", tags=["Panchangam"])
+def get_sankrantis(year: int = None, lang: str = "en", db: Session = Depends(get_db)):
+    """Solar ingress (Sankranti) dates and exact IST instants for a year, plus the next one from now."""
+    target_year = year if year else datetime.now().year
+    pc = get_panchang_calculator(db)
+    return {
+        "year": target_year,
+        "sankrantis": pc.sankrantis(target_year, lang=lang),
+        "next": pc.next_sankranti(datetime.utcnow(), lang=lang),
+    }
+
+
+@app.get("/panchangam/festivals", tags=["Panchangam"])
+def get_festival_calendar(year: int = None, db: Session = Depends(get_db)):
+    """All festivals (tithi, nakshatra, weekday and solar) for a Gregorian year, in date order."""
+    target_year = year if year else datetime.now().year
+    festivals = festival_calendar(target_year, get_panchang_calculator(db))
+    return {"year": target_year, "count": len(festivals), "festivals": festivals}
+
+
+@app.post("/system/panchang-table/build", tags=["System"])
+def build_panchang_table_job(
+    start_year: int = None,
+    end_year: int = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Precompute the Panchangam for the temple location over a span of years
+    (default: last year .. 10 years ahead) in the background (Admin only).
+    Same job as `python build_panchang_table.py`.
+    """
+    if current_user.role.lower() != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only Admins can rebuild the Panchang table"
+        )
+    this_year = date.today().year
+    start_year = start_year or this_year - 1
+    end_year = end_year or this_year + 10
+    if end_year < start_year or end_year - start_year > 200:
+        raise HTTPException(status_code=400, detail="Invalid year span (max 200 years)")
+
+    if not start_table_build(get_panchang_calculator(db), start_year, end_year):
+        raise HTTPException(status_code=409, detail="A Panchang table build is already running")
+    return {"message": f"Building Panchang table {start_year}..{end_year}", "status": PANCHANG_TABLE_STATUS}
+
+
+@app.get("/system/panchang-table", tags=["System"])
+def get_panchang_table_status(current_user: User = Depends(get_current_user)):
+    """Status of the precomputed Panchang table build."""
+    return PANCHANG_TABLE_STATUS
+
+
+@app.get("/system/jobs", tags=["System"])
+def list_scheduled_jobs(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Background jobs with their schedule, state and run-duration metrics."""
+    return {"worker": scheduler.worker_id, "jobs": job_status(db)}
+
+
+@app.get("/system/jobs/{name}/runs", tags=["System"])
+def list_job_runs(name: str, limit: int = 20, current_user: User = Depends(get_current_user),
+                  db: Session = Depends(get_db)):
+    """Most recent runs of one job."""
+    return {"job": name, "runs": recent_runs(db, name, limit=max(1, min(limit, 200)))}
+
+
+@app.post("/system/jobs/{name}", tags=["System"])
+def update_scheduled_job(
+    name: str,
+    schedule: Optional[str] = None,
+    enabled: Optional[bool] = None,
+    run_now: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Change a job's cron schedule (e.g. "30 2 * * *") or enabled flag, or
+    make it due now (run_now=true). Admin only.
+    """
+    if current_user.role.lower() != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only Admins can change scheduled jobs"
+        )
+    try:
+        return update_job(db, name, schedule=schedule, enabled=enabled, run_now=run_now)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {name}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/panchangam/find", tags=["Panchangam"])
 def find_date_by_panchangam(
     masa: str, 
     paksha: str, 
     tithi: str, 
-    year: int = None
+    year: int = None,
+    db: Session = Depends(get_db)
 ):
     """
     Finds the Gregorian date for a given Panchangam date (Masa, Paksha, Tithi).
-    Iterates through the specified Gregorian year to find the first match.
+    Answered from the lunar date index (built per year + temple location);
+    falls back to a live scan while the index is being built.
     """
     target_year = year if year else datetime.now().year
-    
-    # Normalize inputs
-    t_masa = masa.lower().strip()
-    t_paksha = paksha.lower().strip()
-    t_tithi = tithi.lower().strip()
-    
-    # Alias handling
-    # Calculator uses 'Shasthi' (one 'h' after 's'), but inputs might be 'Shashthi' or 'Shasti'
-    if 'shashthi' in t_tithi: t_tithi = 'shasthi'
-    if 'shasti' in t_tithi: t_tithi = 'shasthi'
+    pc = get_panchang_calculator(db)
 
-    # Optimization: Reduce search space based on Masa
-    # (Optional, but simple iteration is fast enough for 365 days)
-    
     start_date = date(target_year, 1, 1)
-    # Search for 380 days to cover overlaps into next year
-    for i in range(380):
-        current_date = start_date + timedelta(days=i)
-        
-        # Calculate Panchangam for this date
-        p = PanchangCalculator.calculate(current_date)
-        attrs = p['attributes']
-        
-        # Check Match
-        # Case-insensitive partial matches
-        p_masa = attrs['maasa'].lower()
-        p_paksha = attrs['paksha'].lower()
-        p_tithi = attrs['tithi'].lower()
-        
-        # We check if target input is IN the calculated string (e.g. "Shashthi" in "Shashthi")
-        if t_masa in p_masa and t_paksha in p_paksha and t_tithi in p_tithi:
-            return {"date": p['date'], "panchangam": attrs}
-            
-            
-    raise HTTPException(status_code=404, detail="Panchangam date not found in this year")
+    # Search 380 days to cover overlaps into next year
+    try:
+        matches = find_lunar_dates(db, pc, start_date, start_date + timedelta(days=379), masa, paksha, tithi)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not matches:
+        raise HTTPException(status_code=404, detail="Panchangam date not found in this year")
+
+    first = matches[0][0]
+    return {
+        "date": str(first),
+        "panchangam": pc.calculate(first, fields="attributes")["attributes"],
+        "matches": [{"date": str(d), "is_adhika": adhika} for d, adhika in matches],
+    }
+
+
+@app.get("/panchangam/muhurta/search", tags=["Panchangam"])
+def search_muhurta_windows(
+    start: str = None,
+    days: int = 180,
+    tithi: str = None,
+    paksha: str = None,
+    nakshatra: str = None,
+    weekday: str = None,
+    masa: str = None,
+    festival_type: str = None,
+    avoid: str = None,
+    min_minutes: int = 24,
+    limit: int = 10,
+    order: str = "score",
+    lang: str = "en",
+    db: Session = Depends(get_db)
+):
+    """
+    Auspicious daytime windows matching the given constraints, best first.
+    Lists are comma-separated; "!" excludes (nakshatra=!Bharani,!Krittika).
+    `avoid` cuts out rahu, yama, gulika and/or durmuhurtham.
+    e.g. ?tithi=Shashthi&paksha=Shukla&weekday=Tuesday&avoid=rahu&days=180
+    """
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start must be YYYY-MM-DD")
+    if not (1 <= days <= MUHURTA_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MUHURTA_MAX_DAYS}")
+    if not (1 <= limit <= MUHURTA_MAX_RESULTS):
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MUHURTA_MAX_RESULTS}")
+    if order not in ("score", "date"):
+        raise HTTPException(status_code=400, detail="order must be 'score' or 'date'")
+
+    try:
+        constraints = parse_constraints(
+            tithi=tithi, paksha=paksha, nakshatra=nakshatra, weekday=weekday,
+            masa=masa, festival_type=festival_type, avoid=avoid,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    pc = get_panchang_calculator(db)
+    windows = search_muhurta(pc, start_date, days, constraints,
+                             min_minutes=max(min_minutes, 1), limit=limit, order=order, lang=lang)
+    return {"start": str(start_date), "days": days, "timezone": "Asia/Kolkata", "count": len(windows), "windows": windows}
 
 # =============================================================================
 # Level 17: The Divine Scroll (Thermal Printer Integration)
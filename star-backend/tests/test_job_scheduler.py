@@ -0,0 +1,168 @@
+import threading
+from datetime import datetime, timedelta
+
+
+def test_cron_schedule():
+    # Runs in-process (no server)
+    from app.job_scheduler import CronSchedule
+
+    print("Testing Cron Schedules")
+    now = datetime(2026, 10, 16, 23, 17)
+    cases = {
+        "0 * * * *": datetime(2026, 10, 17, 0, 0),
+        "*/15 * * * *": datetime(2026, 10, 16, 23, 30),
+        "30 2 * * *": datetime(2026, 10, 17, 2, 30),
+        "0 9 * * 1-5": datetime(2026, 10, 19, 9, 0),      # Next weekday (Monday)
+        "0 0 29 2 *": datetime(2028, 2, 29, 0, 0),       # Next leap day
+        "@daily": datetime(2026, 10, 17, 0, 0),
+    }
+    for expr, expected in cases.items():
+        fired = CronSchedule(expr).next_after(now)
+        print(f"{expr!r:>16} -> {fired}")
+        assert fired == expected, (expr, fired)
+
+    for bad in ("61 * * * *", "* * *", "0 0 31 2 *"):
+        try:
+            CronSchedule(bad).next_after(now)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+        else:
+            raise AssertionError(f"{bad!r} should be rejected")
+    print("[SUCCESS] Cron schedules OK")
+
+
+def _fresh_scheduler(worker_id, name, func=None, **options):
+    # A scheduler with one job and a clean `scheduled_jobs` row for it
+    from app.database import SessionLocal, engine
+    from app.job_scheduler import JobScheduler
+    from app.models import ScheduledJob, JobRun
+
+    ScheduledJob.__table__.create(bind=engine, checkfirst=True)
+    JobRun.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    db.query(JobRun).filter(JobRun.job_name == name).delete()
+    db.query(ScheduledJob).filter(ScheduledJob.name == name).delete()
+    db.commit()
+    db.close()
+
+    sched = JobScheduler()
+    sched.worker_id = worker_id
+    sched.register(name, func or (lambda db: None), "0 3 * * *", **options)
+    sched._sync_jobs()
+    return sched
+
+
+def test_claim_exclusive():
+    # Runs in-process (no server) against the configured database
+    from app.database import SessionLocal
+    from app.job_scheduler import JobScheduler
+    from app.models import ScheduledJob
+
+    print("Testing Job Claim / Lease Exclusivity")
+    name = "_test_claim"
+    workers = [_fresh_scheduler("test:0", name, lease_seconds=60)]
+    for n in range(1, 6):
+        worker = JobScheduler()
+        worker.worker_id = f"test:{n}"
+        worker.jobs = workers[0].jobs
+        workers.append(worker)
+
+    db = SessionLocal()
+    now = datetime.now()
+    db.query(ScheduledJob).filter(ScheduledJob.name == name).update({"next_run_at": now - timedelta(minutes=1)})
+    db.commit()
+
+    # Several workers claim the same due run at once: exactly one wins
+    wins, barrier = [], threading.Barrier(len(workers))
+    def claim(worker):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            if worker._claim(session, name, now):
+                wins.append(worker.worker_id)
+        finally:
+            session.close()
+    threads = [threading.Thread(target=claim, args=(w,)) for w in workers]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    print(f"Winner: {wins}")
+    assert len(wins) == 1
+
+    # Lease still held: nobody else claims; expired: another worker takes over
+    loser = next(w for w in workers if w.worker_id != wins[0])
+    assert not loser._claim(db, name, now + timedelta(seconds=30))
+    assert loser._claim(db, name, now + timedelta(seconds=61))
+    db.expire_all()
+    assert db.get(ScheduledJob, name).locked_by == loser.worker_id
+
+    db.query(ScheduledJob).filter(ScheduledJob.name == name).delete()
+    db.commit()
+    db.close()
+    print("[SUCCESS] Claims are exclusive")
+
+
+def test_retry_backoff():
+    # Runs in-process (no server) against the configured database
+    from app.database import SessionLocal
+    from app.models import ScheduledJob, JobRun
+
+    print("Testing Job Retry Backoff")
+    name = "_test_retry"
+    def fail(db):
+        raise RuntimeError("boom")
+    sched = _fresh_scheduler("test:retry", name, fail, max_retries=2, retry_backoff_seconds=60)
+    job = sched.jobs[name]
+
+    db = SessionLocal()
+    for attempt, backoff in ((0, 60), (1, 120)):
+        before = datetime.now()
+        sched._execute(job, attempt)
+        db.expire_all()
+        row = db.get(ScheduledJob, name)
+        delay = (row.next_run_at - before).total_seconds()
+        print(f"attempt {attempt} failed -> retry in {delay:.0f}s")
+        assert row.attempt == attempt + 1 and backoff <= delay < backoff + 5
+
+    # Retries exhausted: back to the cron schedule
+    sched._execute(job, 2)
+    db.expire_all()
+    row = db.get(ScheduledJob, name)
+    assert row.attempt == 0 and (row.next_run_at.hour, row.next_run_at.minute) == (3, 0)
+    assert row.run_count == 3 and row.failure_count == 3 and row.last_status == "FAILED"
+
+    db.query(JobRun).filter(JobRun.job_name == name).delete()
+    db.query(ScheduledJob).filter(ScheduledJob.name == name).delete()
+    db.commit()
+    db.close()
+    print("[SUCCESS] Retry backoff OK")
+
+
+def test_per_worker_metrics():
+    # Runs in-process (no server): per-worker runs finishing together all count
+    from app.database import SessionLocal
+    from app.models import ScheduledJob, JobRun
+
+    print("Testing Per-Worker Job Metrics")
+    name = "_test_per_worker"
+    sched = _fresh_scheduler("test:pw", name, per_worker=True)
+    threads = [threading.Thread(target=sched._execute, args=(sched.jobs[name], 0)) for _ in range(8)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+    db = SessionLocal()
+    row = db.get(ScheduledJob, name)
+    print(f"runs={row.run_count} next={row.next_run_at}")
+    assert row.run_count == 8 and row.next_run_at > datetime.now()
+
+    db.query(JobRun).filter(JobRun.job_name == name).delete()
+    db.query(ScheduledJob).filter(ScheduledJob.name == name).delete()
+    db.commit()
+    db.close()
+    print("[SUCCESS] Per-worker metrics OK")
+
+
+if __name__ == "__main__":
+    test_cron_schedule()
+    test_claim_exclusive()
+    test_retry_backoff()
+    test_per_worker_metrics()
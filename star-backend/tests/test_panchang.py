@@ -0,0 +1,433 @@
+import math
+
+import requests
+
+BASE_URL = "http://127.0.0.1:8000"
+
+
+def test_panchang_find():
+    endpoint = f"{BASE_URL}/panchangam/find"
+    params = {"masa": "Magha", "paksha": "Shukla", "tithi": "Panchami", "year": 2026}
+
+    print("Testing Reverse Panchangam Search (Lunar Date Index)")
+    response = requests.get(endpoint, params=params)
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {response.text[:300]}")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["date"] == "2026-01-23"
+    assert data["matches"][0]["date"] == data["date"]
+
+    # Schema spellings (Ashwina) resolve to the calculator's names (Ashwayuja)
+    response = requests.get(endpoint, params={"masa": "Ashwina", "paksha": "Krishna", "tithi": "Amavasya", "year": 2026})
+    assert response.status_code == 200
+    print(f"Ashwina Amavasya 2026: {response.json()['date']}")
+
+    response = requests.get(endpoint, params={"masa": "Nomasa", "paksha": "Shukla", "tithi": "Panchami"})
+    assert response.status_code == 400
+    print("[SUCCESS] Reverse Panchangam Search OK")
+
+
+def test_panchang_spans():
+    endpoint = f"{BASE_URL}/panchangam/spans"
+    params = {"start": "2026-02-19", "end": "2026-02-20", "elements": "tithi,nakshatra"}
+
+    print("Testing Tithi / Nakshatra Spans")
+    response = requests.get(endpoint, params=params)
+    print(f"Status Code: {response.status_code}")
+    assert response.status_code == 200
+
+    spans = response.json()["spans"]
+    for element, items in spans.items():
+        print(f"{element}: " + ", ".join(f"{s['name']} until {s['end']}" for s in items))
+        # Spans are contiguous: each one ends where the next begins
+        assert all(a["end"] == b["start"] for a, b in zip(items, items[1:]))
+
+    response = requests.get(endpoint, params={"start": "2026-02-19", "end": "2026-02-20", "elements": "rashi"})
+    assert response.status_code == 400
+    print("[SUCCESS] Spans OK")
+
+
+def test_festival_calendar():
+    endpoint = f"{BASE_URL}/panchangam/festivals"
+
+    print("Testing Yearly Festival Calendar")
+    response = requests.get(endpoint, params={"year": 2026})
+    print(f"Status Code: {response.status_code}")
+    assert response.status_code == 200
+
+    festivals = response.json()["festivals"]
+    dates = [f["date"] for f in festivals]
+    assert dates == sorted(dates)
+    assert sum(1 for f in festivals if f["type"] == "solar") == 12  # One Sankranti per month
+    print(f"[SUCCESS] {len(festivals)} festivals in 2026")
+
+
+def test_festival_ics_feed():
+    endpoint = f"{BASE_URL}/calendar/festivals.ics"
+
+    print("Testing Festival iCalendar Feed")
+    response = requests.get(endpoint, params={"year": 2026})
+    print(f"Status Code: {response.status_code}")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/calendar")
+    assert response.text.count("BEGIN:VEVENT") == requests.get(f"{BASE_URL}/panchangam/festivals", params={"year": 2026}).json()["count"]
+
+    response = requests.get(endpoint, params={"year": 2026}, headers={"If-Modified-Since": response.headers["Last-Modified"]})
+    assert response.status_code == 304
+    print("[SUCCESS] Festival feed OK")
+
+
+def test_panchang_fields():
+    endpoint = f"{BASE_URL}/panchangam/range"
+    params = {"start": "2026-03-01", "end": "2026-03-07", "fields": "attributes.tithi,sun_cycle.sunrise"}
+
+    print("Testing Field-Selective Panchangam")
+    response = requests.get(endpoint, params=params)
+    print(f"Status Code: {response.status_code}")
+    assert response.status_code == 200
+
+    day = response.json()["days"][0]
+    print(f"Day: {day}")
+    assert set(day) == {"date", "attributes", "sun_cycle"}
+    assert set(day["attributes"]) == {"tithi"} and set(day["sun_cycle"]) == {"sunrise"}
+
+    response = requests.get(endpoint, params={**params, "fields": "horoscope"})
+    assert response.status_code == 400
+    print("[SUCCESS] Field selection OK")
+
+
+def test_daily_sankalpa_concurrent_cache():
+    from concurrent.futures import ThreadPoolExecutor
+    endpoint = f"{BASE_URL}/daily-sankalpa"
+    params = {"date_str": "21-03-2026"}
+
+    print("Testing Concurrent /daily-sankalpa (single-flight Panchang cache)")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda _: requests.get(endpoint, params=params), range(8)))
+    print(f"Status Codes: {[r.status_code for r in responses]}")
+
+    # No cache-row conflicts: every request succeeds with the same Panchangam
+    assert all(r.status_code == 200 for r in responses)
+    assert len({str(r.json()["panchangam"]) for r in responses}) == 1
+    print("[SUCCESS] Concurrent cache OK")
+
+
+def test_muhurta_search():
+    endpoint = f"{BASE_URL}/panchangam/muhurta/search"
+    params = {"start": "2026-01-01", "days": 366, "tithi": "Shashthi", "paksha": "Shukla",
+              "weekday": "Tuesday", "avoid": "rahu", "order": "date"}
+
+    print("Testing Muhurta Search")
+    response = requests.get(endpoint, params=params)
+    print(f"Status Code: {response.status_code}")
+    assert response.status_code == 200
+
+    windows = response.json()["windows"]
+    for w in windows:
+        print(f"{w['start']} .. {w['end']} ({w['minutes']} min, score {w['score']})")
+        assert w["tithi"] == "Shashthi" and w["paksha"] == "Shukla" and "Tuesday" in w["weekday"]
+    assert windows and [w["start"] for w in windows] == sorted(w["start"] for w in windows)
+
+    response = requests.get(endpoint, params={**params, "avoid": "lunch"})
+    assert response.status_code == 400
+    print("[SUCCESS] Muhurta search OK")
+
+
+def test_vector_backend_accuracy():
+    # Runs in-process (no server): vectorized series vs pyephem
+    from app.panchang_vector import HAS_NUMPY, accuracy_report
+    if not HAS_NUMPY:
+        print("[SKIP] numpy not installed")
+        return
+
+    print("Testing Vectorized Ephemeris Backend vs ephem")
+    report = accuracy_report(start_year=2000, end_year=2050)
+    print(report)
+    assert report["sun_max_arcsec"] < 10 and report["moon_max_arcsec"] < 30
+    assert not any(report["index_mismatches"].values())
+    print("[SUCCESS] Vector backend OK")
+
+
+def test_ayanamsa_time_varying():
+    # Runs in-process (no server): per-day ayanamsa tables
+    import ephem
+    from app.panchang_ayanamsa import get_ayanamsa
+
+    print("Testing Time-Varying Ayanamsa")
+    lahiri = get_ayanamsa("lahiri")
+    at_2000 = lahiri.value(ephem.Date("2000/1/1 12:00"))
+    at_2026 = lahiri.value(ephem.Date("2026/1/1"))
+    print(f"Lahiri: J2000 {at_2000:.4f}, 2026 {at_2026:.4f}")
+    assert abs(at_2000 - 23.857) < 0.002 and abs(at_2026 - 24.220) < 0.002
+
+    # Spica (Chitra) stays at ~180 deg sidereal in every century
+    spica = ephem.star("Spica")
+    for year in (1900, 2000, 2100):
+        when = ephem.Date(f"{year}/1/1")
+        spica.compute(when)
+        lon = lahiri.sidereal(math.degrees(ephem.Ecliptic(spica).lon), when)
+        assert abs(lon - 180.0) < 0.05, (year, lon)
+    print("[SUCCESS] Ayanamsa OK")
+
+
+def test_tithi_observance():
+    # Runs in-process (no server): kshaya / vriddhi / Adhika aware LUNAR matching
+    from datetime import date
+    from app.panchang import PanchangCalculator
+    from app.tithi_observance import observance_table, select_occurrences
+
+    print("Testing Tithi Observance (udaya rule)")
+    table = observance_table(PanchangCalculator(), 2026)
+    per_day = {}
+    for key, dates in table.items():
+        for day, _is_adhika in dates:
+            per_day.setdefault(day, []).append(key)
+    kshaya_days = [d for d, keys in per_day.items() if len(keys) > 1]
+    vriddhi_days = 365 - len(per_day)
+    print(f"{len(kshaya_days)} days observe a kshaya tithi too, {vriddhi_days} vriddhi days")
+    # ~360 tithis in ~354 days: kshaya tithis outnumber vriddhi days by about six a year
+    assert kshaya_days and 3 <= len(kshaya_days) - vriddhi_days <= 9
+
+    # 2026 has Adhika Jyeshtha: each Jyeshtha tithi occurs twice, resolved by the rule
+    both = table[(2, "Shukla", 0)]
+    assert [a for _d, a in both] == [True, False]
+    assert select_occurrences(both, "nija") == [both[1][0]]
+    assert select_occurrences(both, "adhika") == [both[0][0]]
+    assert select_occurrences(both, "both") == [both[0][0], both[1][0]]
+    print("[SUCCESS] Tithi observance OK")
+
+
+def test_panchang_store_roundtrip():
+    # Runs in-process (no server): built table rows decode to the live cores
+    import os
+    import tempfile
+    from datetime import date
+    from app.panchang import PanchangCalculator, PanchangCore
+    from app.panchang_store import HAS_NUMPY, CORE_DTYPE, PanchangStore, build_panchang_table, _core_to_row
+    if not HAS_NUMPY:
+        print("[SKIP] numpy not installed")
+        return
+    import numpy as np
+
+    print("Testing Precomputed Panchang Table Round-Trip")
+    pc = PanchangCalculator()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PanchangStore(build_panchang_table(pc, 2026, 2026, workers=1, path=os.path.join(tmp, "year.npy")))
+        assert store.span == (date(2026, 1, 1), date(2026, 12, 31))
+        assert store.get(date(2025, 12, 31).toordinal()) is None
+        assert store.get(date(2027, 1, 1).toordinal()) is None
+
+        live = list(pc.compute_core_range(date(2026, 1, 1), date(2026, 12, 31)))
+        mismatches = [core.date for core in live if store.get(core.ordinal) != core]
+        sankrantis = sum(1 for core in live if store.get(core.ordinal).sankranti is not None)
+        print(f"{len(live)} days, {sankrantis} sankrantis, {len(mismatches)} mismatches")
+        assert not mismatches and sankrantis == 12, mismatches[:5]
+
+        # NaN / 255 sentinels: a day without rise / set instants (polar) and no sankranti
+        polar = PanchangCore(**{name: getattr(live[0], name) for name in PanchangCore.__slots__})
+        polar.sunrise = polar.sunset = polar.moonrise = polar.moonset = None
+        polar.sankranti = None
+        path = os.path.join(tmp, "sentinels.npy")
+        np.save(path, np.array([_core_to_row(polar), _core_to_row(live[1])], dtype=CORE_DTYPE))
+        sentinels = PanchangStore(path)
+        assert sentinels.get(polar.ordinal) == polar and sentinels.get(live[1].ordinal) == live[1]
+        del store, sentinels
+    print("[SUCCESS] Panchang table round-trip OK")
+
+def test_calculate_range_matches_calculate():
+    # Runs in-process (no server): shared-context range vs independent per-day calls
+    from datetime import date, timedelta
+    from app.panchang import PanchangCalculator
+
+    print("Testing calculate_range vs calculate")
+    pc = PanchangCalculator()
+    start, end = date(2026, 5, 10), date(2026, 6, 20)   # Crosses new / full moons and a Sankranti
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    for lang in ("en", "kn"):
+        ranged = list(pc.calculate_range(start, end, lang))
+        assert len(ranged) == len(days)
+        mismatches = [d for d, r in zip(days, ranged) if r != pc.calculate(d, lang)]
+        assert not mismatches, (lang, mismatches[:5])
+    print(f"[SUCCESS] {len(days)} days match")
+
+
+def test_lunation_table():
+    # Runs in-process (no server): lunation table vs direct ephem searches
+    import ephem
+    from app.panchang import PanchangCalculator
+    from app.panchang_tables import LUNATIONS
+
+    print("Testing Lunation Table vs ephem")
+    pc = PanchangCalculator()
+    sun = ephem.Sun()
+
+    def sun_rashi(when):
+        sun.compute(when)
+        return int(pc.get_sidereal_lon(ephem.Ecliptic(sun).lon, when) / 30)
+
+    adhika = []
+    when = ephem.Date("2025/1/1 05:00")
+    while when < ephem.Date("2028/1/1"):
+        prev_nm, next_nm = ephem.previous_new_moon(when), ephem.next_new_moon(when)
+        assert abs(LUNATIONS.previous_new_moon(when) - prev_nm) < 1 / 86400
+        assert abs(LUNATIONS.next_new_moon(when) - next_nm) < 1 / 86400
+        assert abs(LUNATIONS.next_full_moon(when) - ephem.next_full_moon(when)) < 1 / 86400
+
+        # Masa: the Sun's rashi at the bounding new moons (the per-call algorithm it replaced)
+        rashi_start, rashi_end = sun_rashi(prev_nm), sun_rashi(next_nm)
+        expected = (rashi_start + 1, True) if rashi_start == rashi_end else (rashi_end, False)
+        table_prev, table_next, masa_index, is_adhika = LUNATIONS.lunation_at(when, pc.ayanamsa)
+        assert abs(table_prev - prev_nm) < 1 / 86400 and abs(table_next - next_nm) < 1 / 86400
+        assert (masa_index, is_adhika) == expected, (str(when), (masa_index, is_adhika), expected)
+        if is_adhika:
+            adhika.append((str(when), masa_index % 12))
+        when = ephem.Date(when + 3.7)
+    print(f"Adhika samples: {adhika}")
+    # 2026 has Adhika Jyeshtha (masa index 2), and no other Adhika masa in 2025-2027
+    assert adhika and {m for _w, m in adhika} == {2} and all(w.startswith("2026/") for w, _m in adhika)
+    print("[SUCCESS] Lunation table OK")
+
+
+def test_sankranti_table():
+    # Runs in-process (no server): ingress table vs day-by-day Sun Rashi at 00:00 UTC
+    from datetime import date, timedelta
+    import ephem
+    from app.panchang import PanchangCalculator
+    from app.panchang_tables import SANKRANTIS
+
+    print("Testing Sankranti Table vs daily Sun evaluations")
+    pc = PanchangCalculator()
+    sun = ephem.Sun()
+
+    def midnight_rashi(day):
+        when = ephem.Date(day.strftime("%Y/%m/%d"))
+        sun.compute(when)
+        return int(pc.get_sidereal_lon(ephem.Ecliptic(sun).lon, when) / 30)
+
+    for year in (2025, 2026, 2027):
+        day, found = date(year, 1, 1), []
+        previous = midnight_rashi(day - timedelta(days=1))
+        while day.year == year:
+            rashi = midnight_rashi(day)
+            expected = rashi if rashi != previous else None
+            assert SANKRANTIS.on_date(day, pc.ayanamsa) == expected, (day, expected)
+            if expected is not None:
+                found.append(day)
+            previous = rashi
+            day += timedelta(days=1)
+        assert len(found) == 12 and len(SANKRANTIS.year(year, pc.ayanamsa)) == 12, (year, found)
+
+        # Each ingress instant is the first second of the new rashi
+        for instant, rashi in SANKRANTIS.year(year, pc.ayanamsa):
+            sun.compute(ephem.Date(instant))
+            assert int(pc.get_sidereal_lon(ephem.Ecliptic(sun).lon, instant) / 30) == rashi
+            sun.compute(ephem.Date(instant - 2 / 86400))
+            assert int(pc.get_sidereal_lon(ephem.Ecliptic(sun).lon, instant - 2 / 86400) / 30) == (rashi - 1) % 12
+        print(f"{year}: {', '.join(d.isoformat() for d in found)}")
+
+    # next_after crosses into the following year's table
+    first_instant, first_rashi = SANKRANTIS.year(2027, pc.ayanamsa)[0]
+    assert SANKRANTIS.next_after(ephem.Date("2026/12/31"), pc.ayanamsa) == (ephem.Date(first_instant), first_rashi)
+    print("[SUCCESS] Sankranti table OK")
+
+
+def test_panchang_core_encoding():
+    # Runs in-process (no server): core bytes / JSON round-trip and en / kn projections
+    from datetime import date
+    from app.panchang import PanchangCalculator, PanchangCore
+
+    print("Testing Panchang Core Encoding and Projections")
+    pc = PanchangCalculator()
+    cores = list(pc.compute_core_range(date(2026, 1, 10), date(2026, 1, 20)))   # Includes Makara Sankranti
+    assert any(core.sankranti is not None for core in cores)
+    for core in cores:
+        for decoded in (PanchangCore.from_bytes(core.to_bytes()), PanchangCore.from_json(core.to_json())):
+            assert decoded == core
+            for lang in ("en", "kn"):
+                assert pc.project(decoded, lang) == pc.project(core, lang) == pc.calculate(core.date, lang)
+
+        # One core, two languages: same shape, same language-neutral values
+        en, kn = pc.project(core, "en"), pc.project(core, "kn")
+        assert en.keys() == kn.keys() and en["attributes"].keys() == kn["attributes"].keys()
+        assert en["sun_cycle"] == kn["sun_cycle"] and en["meta"] == kn["meta"]
+        assert en["attributes"]["is_adhika"] == kn["attributes"]["is_adhika"]
+        assert en["moon_cycle"]["illumination"] == kn["moon_cycle"]["illumination"]
+
+    # Days without rise / set instants encode as NaN and decode back to None
+    polar = PanchangCore(**{name: getattr(cores[0], name) for name in PanchangCore.__slots__})
+    polar.sunrise = polar.sunset = polar.moonrise = polar.moonset = None
+    assert PanchangCore.from_bytes(polar.to_bytes()) == polar
+    assert PanchangCore.from_json(polar.to_json()) == polar
+
+    # Another encoding version is rejected, not misread
+    stale = bytearray(cores[0].to_bytes())
+    stale[0] = PanchangCore.CORE_FORMAT_VERSION + 1
+    for bad in (lambda: PanchangCore.from_bytes(bytes(stale)),
+                lambda: PanchangCore.from_json(cores[0].to_json().replace('"v":', '"v":9')),
+                lambda: PanchangCore.from_bytes(cores[0].to_bytes()[:-1])):
+        try:
+            bad()
+            assert False, "stale encoding accepted"
+        except ValueError:
+            pass
+    print(f"[SUCCESS] {len(cores)} cores round-trip")
+
+
+def test_rise_set_table():
+    # Runs in-process (no server): per-location rise / set table vs live observer searches
+    from datetime import datetime, timedelta
+    import ephem
+    from app.panchang import PanchangCalculator
+    from app.panchang_tables import RISE_SET
+
+    print("Testing Rise / Set Table vs live ephem searches")
+    pc = PanchangCalculator(lat="12.9716", lon="77.5946", elevation=920)   # Not the temple location
+    location = pc.rise_set_location
+    # Elevation moves sunrise / sunset, so it keys the cached cores as well as this table
+    assert pc.location_hash != PanchangCalculator(lat="12.9716", lon="77.5946", elevation=0).location_hash
+    assert RISE_SET.get(location, datetime(2027, 3, 1)) is None   # Nothing built yet
+    assert len(RISE_SET.year(location, 2027)) == 365
+
+    sun, moon = ephem.Sun(), ephem.Moon()
+    day = datetime(2027, 1, 1)
+    while day.year == 2027:
+        obs = pc._make_observer(day)
+        live = [float(obs.next_rising(sun)), float(obs.next_setting(sun)), None, None]
+        for i, search in ((2, obs.next_rising), (3, obs.next_setting)):
+            try:
+                live[i] = float(search(moon))
+            except (ephem.AlwaysUpError, ephem.NeverUpError):
+                pass
+        assert RISE_SET.get(location, day) == tuple(live), day
+
+        # The daily Panchangam reads its instants from the table
+        if day.day == 1:
+            core = pc.compute_core(day)
+            assert (core.sunrise, core.sunset, core.moonrise, core.moonset) == tuple(live), day
+        day += timedelta(days=7)
+
+    # Moving the temple drops tables for every other location
+    RISE_SET.invalidate(keep=PanchangCalculator().rise_set_location)
+    assert RISE_SET.get(location, datetime(2027, 3, 1)) is None
+    print("[SUCCESS] Rise / set table OK")
+
+
+if __name__ == "__main__":
+    test_panchang_find()
+    test_panchang_spans()
+    test_festival_calendar()
+    test_festival_ics_feed()
+    test_panchang_fields()
+    test_daily_sankalpa_concurrent_cache()
+    test_muhurta_search()
+    test_vector_backend_accuracy()
+    test_ayanamsa_time_varying()
+    test_tithi_observance()
+    test_panchang_store_roundtrip()
+    test_calculate_range_matches_calculate()
+    test_lunation_table()
+    test_sankranti_table()
+    test_panchang_core_encoding()
+    test_rise_set_table()
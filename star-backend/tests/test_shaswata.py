@@ -1,5 +1,7 @@
 import requests
 import json
+import time
+from datetime import datetime, timedelta
 
 BASE_URL = "http://127.0.0.1:8000"
 
@@ -41,5 +43,237 @@ def test_shaswata_booking():
     except Exception as e:
         print(f"Error: {e}")
 
+def test_gregorian_leap_day():
+    # Runs in-process (no server): a Feb 29 subscription in a window starting in a non-leap year
+    from datetime import date
+    from app.shaswata_service import _event_candidates
+
+    print("Testing GREGORIAN Feb 29 Scheduling")
+    sub = (1, "GREGORIAN", 29, 2, None, None, None)
+    assert _event_candidates([sub], date(2027, 3, 10), date(2028, 3, 9), {}, ("udaya", "nija")) == [(1, date(2028, 2, 29))]
+    assert _event_candidates([sub], date(2025, 1, 1), date(2027, 12, 31), {}, ("udaya", "nija")) == []
+    print("[SUCCESS] Leap day OK")
+
+def test_populate_events_idempotent():
+    endpoint = f"{BASE_URL}/shaswata/events/populate"
+
+    print("Testing Set-Based Event Population")
+    first = requests.post(endpoint, params={"days": 60})
+    print(f"Status Code: {first.status_code}, {first.json()['message']}")
+    assert first.status_code == 200
+
+    # Second run: every candidate hits the unique key, nothing new is inserted
+    second = requests.post(endpoint, params={"days": 60}).json()
+    print(second["message"])
+    assert second["events_created"] == 0
+    assert second["events_skipped"] == first.json()["events_created"] + first.json()["events_skipped"]
+    print("[SUCCESS] Population is idempotent")
+
+
+def test_populate_events_incremental():
+    endpoint = f"{BASE_URL}/shaswata/events/populate"
+
+    print("Testing Incremental Event Population")
+    requests.post(endpoint, params={"days": 60})
+
+    # A subscription created after the full run is picked up by the next incremental one
+    tomorrow = datetime.now() + timedelta(days=1)
+    response = requests.post(f"{BASE_URL}/shaswata/subscribe", json={
+        "devotee_name": "Incremental Tester",
+        "phone_number": f"7{int(time.time() * 1000) % 10**9:09d}",
+        "seva_id": 1,
+        "amount": 1000.0,
+        "payment_mode": "CASH",
+        "subscription_type": "GREGORIAN",
+        "event_day": tomorrow.day,
+        "event_month": tomorrow.month,
+    })
+    assert response.status_code == 200
+    result = requests.post(endpoint, params={"days": 60, "incremental": True}).json()
+    print(result["message"])
+    assert result["mode"] == "incremental"
+    assert result["changed_subscriptions"] >= 1
+
+    # Nothing changed and the horizon is already covered: nothing to do
+    result = requests.post(endpoint, params={"days": 60, "incremental": True}).json()
+    print(result["message"])
+    assert result["mode"] == "incremental"
+    assert result["new_days"] == 0
+    assert result["events_created"] == 0
+
+    # A longer window only exposes the extra days
+    result = requests.post(endpoint, params={"days": 90, "incremental": True}).json()
+    print(result["message"])
+    assert result["new_days"] == 30
+    print("[SUCCESS] Incremental population OK")
+
+
+def test_yearly_plan_status():
+    endpoint = f"{BASE_URL}/shaswata/events/yearly-status"
+
+    print("Testing Year-Ahead Planning Status")
+    status = requests.get(endpoint).json()
+    print(status)
+    assert set(status) >= {"running", "progress", "horizon", "error"}
+    if not status["running"]:
+        assert status["error"] is None
+        done, total = status["progress"].split("/")
+        assert done == total
+    print("[SUCCESS] Year-ahead plan status OK")
+
+
+def test_shaswata_ics_feed():
+    endpoint = f"{BASE_URL}/calendar/shaswata.ics"
+
+    print("Testing Shaswata iCalendar Feed")
+    response = requests.get(endpoint, params={"days": 365})
+    print(f"Status Code: {response.status_code}")
+    assert response.status_code == 200
+    assert response.text.startswith("BEGIN:VCALENDAR\r\n")
+    print(f"{response.text.count('BEGIN:VEVENT')} events, ETag {response.headers['ETag']}")
+
+    # A client with the current copy gets 304 without the feed being rebuilt
+    response = requests.get(endpoint, params={"days": 365}, headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    print("[SUCCESS] Shaswata feed OK")
+
+
+def test_devotee_ics_feed():
+    print("Testing Per-Devotee iCalendar Feed (token)")
+    session = requests.Session()
+    session.post(f"{BASE_URL}/token", json={"username": "admin", "password": "admin123"})
+    tomorrow = datetime.strptime(requests.get(f"{BASE_URL}/shaswata/tomorrow").json()["date"], "%d-%m-%Y").date()
+    phone = f"6{int(time.time() * 1000) % 10**9:09d}"
+    response = requests.post(f"{BASE_URL}/shaswata/subscribe", json={
+        "devotee_name": "Feed Tester", "phone_number": phone, "seva_id": 1,
+        "subscription_type": "GREGORIAN", "event_day": tomorrow.day, "event_month": tomorrow.month,
+    })
+    assert response.status_code == 200, f"Setup failed: subscribe returned {response.status_code}"
+    requests.post(f"{BASE_URL}/shaswata/events/populate", params={"days": 7})
+    pujas = requests.get(f"{BASE_URL}/shaswata/tomorrow").json()["pujas"]
+    devotee_id = next(p["devotee_id"] for p in pujas if p["phone"] == phone)
+
+    # The id alone is not enough: a feed needs the devotee's token
+    feed = f"{BASE_URL}/calendar/devotees/{devotee_id}/shaswata.ics"
+    assert requests.get(feed).status_code == 404
+    assert requests.get(feed, params={"token": "guess"}).status_code == 404
+    assert requests.post(f"{BASE_URL}/calendar/devotees/{devotee_id}/token").status_code == 401
+
+    link = session.post(f"{BASE_URL}/calendar/devotees/{devotee_id}/token").json()
+    response = requests.get(f"{BASE_URL}{link['url']}")
+    print(f"Status Code: {response.status_code}, {response.text.count('BEGIN:VEVENT')} events")
+    assert response.status_code == 200 and "BEGIN:VEVENT" in response.text
+    assert phone not in response.text   # Names and dates only, no contact details
+
+    # Rotating the token retires the old link
+    rotated = session.post(f"{BASE_URL}/calendar/devotees/{devotee_id}/token", params={"rotate": True}).json()
+    assert rotated["token"] != link["token"]
+    assert requests.get(f"{BASE_URL}{link['url']}").status_code == 404
+    assert requests.get(f"{BASE_URL}{rotated['url']}").status_code == 200
+    print("[SUCCESS] Devotee feed OK")
+
+
+def test_reminder_campaign():
+    endpoint = f"{BASE_URL}/shaswata/campaigns"
+
+    print("Testing Reminder Campaign")
+    session = requests.Session()
+    session.post(f"{BASE_URL}/token", json={"username": "admin", "password": "admin123"})
+    first = session.post(endpoint, params={"kind": "reminders"})
+    print(f"Status Code: {first.status_code}, {first.text}")
+    assert first.status_code == 200
+
+    # Events already queued are skipped, so a second run queues nothing
+    second = session.post(endpoint, params={"kind": "reminders"}).json()
+    assert second["total"] == 0
+
+    status = requests.get(f"{endpoint}/{first.json()['campaign_id']}").json()
+    print(f"Outbox: {status['outbox']}")
+    assert session.post(endpoint, params={"kind": "unknown"}).status_code == 400
+    print("[SUCCESS] Campaign OK")
+
+
+def test_tomorrow_digest():
+    endpoint = f"{BASE_URL}/shaswata/tomorrow"
+
+    print("Testing Tomorrow's Pujas (daily digest)")
+    first = requests.get(endpoint)
+    print(f"Status Code: {first.status_code}, {first.json()['count']} pujas")
+    assert first.status_code == 200
+
+    # A subscription for tomorrow patches the stored digest at once
+    tomorrow = datetime.strptime(first.json()["date"], "%d-%m-%Y").date()
+    response = requests.post(f"{BASE_URL}/shaswata/subscribe", json={
+        "devotee_name": "Digest Tester", "phone_number": "8877665500", "seva_id": 1,
+        "subscription_type": "GREGORIAN", "event_day": tomorrow.day, "event_month": tomorrow.month,
+    })
+    assert response.status_code == 200, f"Setup failed: subscribe returned {response.status_code}"
+    second = requests.get(endpoint).json()
+    assert second["count"] == first.json()["count"] + 1
+    print("[SUCCESS] Digest OK")
+
+
+def test_shaswata_health():
+    print("Testing Shaswata Health Dashboard")
+    session = requests.Session()
+    session.post(f"{BASE_URL}/token", json={"username": "admin", "password": "admin123"})
+    before = session.get(f"{BASE_URL}/shaswata/health")
+    print(f"Status Code: {before.status_code}, {before.text}")
+    assert before.status_code == 200
+
+    # Counters follow subscription writes without a recount
+    response = requests.post(f"{BASE_URL}/shaswata/subscribe", json={
+        "devotee_name": "Health Tester", "phone_number": "8877665511", "seva_id": 1,
+        "subscription_type": "GREGORIAN", "event_day": 1, "event_month": 1,
+    })
+    assert response.status_code == 200, f"Setup failed: subscribe returned {response.status_code}"
+    after = session.get(f"{BASE_URL}/shaswata/health").json()
+    assert after["active_subscriptions"] == before.json()["active_subscriptions"] + 1
+    assert after["never_dispatched"] == before.json()["never_dispatched"] + 1
+    print("[SUCCESS] Health counters OK")
+
+
+def test_dispatch_batch():
+    print("Testing Bulk Dispatch")
+    session = requests.Session()
+    session.post(f"{BASE_URL}/token", json={"username": "admin", "password": "admin123"})
+    upcoming = requests.get(f"{BASE_URL}/shaswata/upcoming", params={"days": 30}).json()
+    pending = [e["event_id"] for e in upcoming.get("events", []) if e["status"] == "PENDING"][:5]
+
+    items = [{"event_id": e, "dispatch_ref": f"BATCH-{e}", "dispatch_method": "COURIER"} for e in pending]
+    items.append({"event_id": 99999999})
+    response = session.post(f"{BASE_URL}/shaswata/events/dispatch-batch", json={"items": items})
+    print(f"Status Code: {response.status_code}, {response.json()['message']}")
+    assert response.status_code == 200
+    statuses = [r["status"] for r in response.json()["results"]]
+    assert statuses == ["DISPATCHED"] * len(pending) + ["NOT_FOUND"]
+
+    # Posting the same batch again changes nothing
+    again = session.post(f"{BASE_URL}/shaswata/events/dispatch-batch", json={"items": items}).json()
+    assert again["dispatched"] == 0
+    print("[SUCCESS] Bulk dispatch OK")
+
+def test_dispatch_sheet():
+    print("Testing Dispatch Labels / Manifest PDF")
+    session = requests.Session()
+    session.post(f"{BASE_URL}/token", json={"username": "admin", "password": "admin123"})
+    response = session.get(f"{BASE_URL}/shaswata/events/dispatch-sheet", params={"status": "ALL"})
+    print(f"Status Code: {response.status_code}, {len(response.content)} bytes")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF")
+    print("[SUCCESS] Dispatch sheet OK")
+
 if __name__ == "__main__":
     test_shaswata_booking()
+    test_gregorian_leap_day()
+    test_populate_events_idempotent()
+    test_populate_events_incremental()
+    test_yearly_plan_status()
+    test_shaswata_ics_feed()
+    test_devotee_ics_feed()
+    test_reminder_campaign()
+    test_tomorrow_digest()
+    test_shaswata_health()
+    test_dispatch_batch()
+    test_dispatch_sheet()